@@ -2,6 +2,7 @@ import os
 import pathlib
 import secrets
 
+import click
 from flask import Flask
 from flask_login import LoginManager
 from flask_migrate import Migrate
@@ -34,6 +35,8 @@ def create_app(config=None):
     app.config["AUTH_PROXY_HEADER"] = os.environ.get("AUTH_PROXY_HEADER") or None
     _app_root = os.environ.get("APPLICATION_ROOT", "").strip()
     app.config["APPLICATION_ROOT"] = _app_root if _app_root else "/"
+    # Where the search indexer runs: thread | external | inline (see index_queue).
+    app.config["SEARCH_INDEX_WORKER"] = os.environ.get("SEARCH_INDEX_WORKER") or "thread"
     if config:
         app.config.update(config)
 
@@ -78,12 +81,113 @@ def create_app(config=None):
     app.register_blueprint(stats_blueprint)
 
     @app.cli.command("reindex")
-    def reindex_command():
+    @click.option("--batch-size", default=None, type=click.IntRange(min=1),
+                  help="Events per embedding batch / commit.")
+    @click.option("--changed-only", is_flag=True,
+                  help="Only re-embed new/changed events and drop orphans; never wipes.")
+    @click.option("--convert", is_flag=True,
+                  help="Re-encode stored vectors to SEARCH_EMBED_ENCODING; no re-embedding.")
+    def reindex_command(batch_size, changed_only, convert):
         """Rebuild the search index (embeddings + FTS) for all events."""
-        from search_index import reindex_all
-
-        count = reindex_all()
+        from search_index import (
+            EMBED_ENCODING,
+            REINDEX_BATCH_SIZE,
+            convert_embeddings,
+            dedup_stats,
+            reindex_all,
+            reindex_changed,
+        )
+
+        def report(done, total, elapsed):
+            rate = done / elapsed if elapsed > 0 else 0.0
+            print(f"  {done}/{total} events ({rate:.1f} docs/sec)")
+
+        def rebuild_vocabulary():
+            import vocabulary
+
+            users = vocabulary.rebuild_all()
+            db.session.commit()
+            print(f"Rebuilt the people/places vocabulary for {users} users.")
+
+        def report_dedup():
+            dedup = dedup_stats()
+            print(
+                f"{dedup['chunks']} chunks share {dedup['vectors']} vectors "
+                f"(dedup ratio {dedup['dedup_ratio']:.1%})."
+            )
+
+        batch_size = batch_size or REINDEX_BATCH_SIZE
+        if convert:
+            count = convert_embeddings(
+                batch_size=batch_size,
+                progress=lambda done, total, _: print(f"  {done}/{total} vectors"),
+            )
+            print(f"Converted {count} vectors to {EMBED_ENCODING}.")
+            return
+        if changed_only:
+            stats = reindex_changed(batch_size=batch_size, progress=report)
+            print(
+                f"Checked {stats.checked} events: {stats.embedded} re-embedded, "
+                f"{stats.reused} reused an identical text's vector, {stats.removed} removed."
+            )
+            report_dedup()
+            rebuild_vocabulary()
+            return
+        count = reindex_all(batch_size=batch_size, progress=report)
         print(f"Reindexed {count} events.")
+        report_dedup()
+        rebuild_vocabulary()
+
+    @app.cli.command("day-summary")
+    @click.option("--check", is_flag=True,
+                  help="Only report days whose summary disagrees with the source tables.")
+    def day_summary_command(check):
+        """Rebuild the per-day summary behind the month and year grids."""
+        import day_summary
+
+        if check:
+            mismatches = day_summary.check()
+            for user_id, day, stored, expected in mismatches:
+                print(f"  user {user_id} {day}: stored {stored}, expected {expected}")
+            print(f"{len(mismatches)} days out of step.")
+            if mismatches:
+                raise SystemExit(1)
+            return
+        rows = day_summary.rebuild()
+        db.session.commit()
+        print(f"Rebuilt the day summary: {rows} days.")
+
+    @app.cli.command("index-worker")
+    @click.option("--once", is_flag=True, help="Drain the queue once and exit.")
+    def index_worker_command(once):
+        """Drain the search indexing queue (run one per host, alongside gunicorn)."""
+        from index_queue import queue_depth, run_worker
+
+        print(f"{queue_depth()} entries queued for indexing.")
+        run_worker(once=once)
+
+    @app.cli.command("compact-vectors")
+    @click.option("--min-dead", default=None, type=click.FloatRange(0.0, 1.0),
+                  help="Tombstoned share of rows that triggers a rewrite (default 0.25).")
+    def compact_vectors_command(min_dead):
+        """Rewrite per-user vector files to drop rows left behind by edits and deletes."""
+        from search_index import VECTOR_COMPACT_RATIO, compact_vector_stores
+
+        ratio = VECTOR_COMPACT_RATIO if min_dead is None else min_dead
+        files, rows = compact_vector_stores(min_dead_ratio=ratio)
+        print(f"Compacted {files} vector files, dropping {rows} dead rows.")
+
+    @app.cli.command("embed-server")
+    @click.option("--socket", "socket_path", default=None,
+                  help="Unix socket to listen on (default: $SEARCH_EMBED_SOCKET).")
+    def embed_server_command(socket_path):
+        """Serve the embedding model to every worker on this host over a Unix socket."""
+        from embedding_backend import DEFAULT_SOCKET, LocalBackend, SidecarServer
+
+        socket_path = socket_path or os.environ.get("SEARCH_EMBED_SOCKET") or DEFAULT_SOCKET
+        with SidecarServer(socket_path, LocalBackend()) as server:
+            print(f"Embedding sidecar listening on {socket_path}")
+            server.serve_forever()
 
     db.init_app(app)
     Migrate(app, db)
@@ -0,0 +1,157 @@
+"""Day-by-day event expansion against the vectorized day counts.
+
+    uv run python -m benchmarks.calendar_benchmark --years 1 5 20
+
+Generates a synthetic history per size (mostly single-day entries, some
+weekends away, the odd long trip) and times the per-event, per-day `timedelta`
+walk the calendar grids used before `day_summary` against
+`day_summary.event_day_counts`: for a month window; for a year grid (the walk
+once per month against one counting pass bucketed by month); and for per-day
+counts over the whole history, which is what `day_summary.rebuild` computes.
+Results are checked to be identical before timing. Reports milliseconds per
+call as JSON.
+"""
+
+import argparse
+import json
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+from day_summary import event_day_counts
+
+FIRST_DAY = date(2000, 1, 1)
+
+
+def _loop_days(events, start_date, end_date):
+    """The former `utils.collect_event_days_in_range`, kept as the reference."""
+    days_with_events = set()
+    for event in events:
+        end_time = event.end_time or event.start_time
+        event_start = max(event.start_time.date(), start_date)
+        event_end = min(end_time.date(), end_date - timedelta(days=1))
+
+        current_date = event_start
+        while current_date <= event_end:
+            days_with_events.add(current_date.day)
+            current_date += timedelta(days=1)
+
+    return sorted(days_with_events)
+
+
+def _loop_counts(events, start_date, end_date):
+    counts = Counter()
+    for event in events:
+        current_date = max(event.start_time.date(), start_date)
+        event_end = min((event.end_time or event.start_time).date(), end_date - timedelta(days=1))
+        while current_date <= event_end:
+            counts[current_date] += 1
+            current_date += timedelta(days=1)
+    return dict(counts)
+
+
+def _history(years, rng, per_day=3):
+    events = []
+    for offset in range(years * 365):
+        day = datetime.combine(FIRST_DAY + timedelta(days=offset), datetime.min.time())
+        for _ in range(rng.randint(0, per_day * 2)):
+            start = day + timedelta(hours=rng.randint(6, 20))
+            roll = rng.random()
+            if roll < 0.9:
+                end = start + timedelta(hours=1)
+            elif roll < 0.99:
+                end = start + timedelta(days=rng.randint(1, 3))
+            else:
+                end = start + timedelta(days=rng.randint(7, 21))
+            events.append(SimpleNamespace(start_time=start, end_time=end if roll > 0.05 else None))
+    return events
+
+
+def _ms(fn, seconds):
+    calls, started = 0, time.perf_counter()
+    while (elapsed := time.perf_counter() - started) < seconds:
+        fn()
+        calls += 1
+    return round(elapsed / calls * 1000, 3)
+
+
+def _year_grid(collect, events, year):
+    return [
+        collect(events, date(year, month, 1),
+                date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1))
+        for month in range(1, 13)
+    ]
+
+
+def _counted(events, start_date, end_date):
+    """{date: events covering it} from one `event_day_counts` pass."""
+    counts = event_day_counts(events, start_date, end_date)
+    return {
+        start_date + timedelta(days=int(offset)): int(counts[offset])
+        for offset in np.flatnonzero(counts)
+    }
+
+
+def _counted_days(events, start_date, end_date):
+    return sorted({day.day for day in _counted(events, start_date, end_date)})
+
+
+def _year_grid_one_pass(events, year):
+    """Count the year once and bucket the covered days by month."""
+    by_month = defaultdict(list)
+    for day in _counted(events, date(year, 1, 1), date(year + 1, 1, 1)):
+        by_month[day.month].append(day.day)
+    return [sorted(by_month[month]) for month in range(1, 13)]
+
+
+def measure(years, *, seconds, seed):
+    rng = random.Random(seed)
+    events = _history(years, rng)
+    year = FIRST_DAY.year + years - 1
+    year_events = [
+        e for e in events
+        if e.start_time.year <= year and (e.end_time or e.start_time).year >= year
+    ]
+    month = (date(year, 5, 1), date(year, 6, 1))
+    history = (FIRST_DAY, FIRST_DAY + timedelta(days=years * 365 + 30))
+
+    assert _counted_days(events, *month) == _loop_days(events, *month)
+    assert _year_grid_one_pass(year_events, year) == _year_grid(_loop_days, year_events, year)
+    assert _counted(events, *history) == _loop_counts(events, *history)
+
+    cases = {
+        "month": (lambda: _loop_days(events, *month),
+                  lambda: _counted_days(events, *month)),
+        "year_grid": (lambda: _year_grid(_loop_days, year_events, year),
+                      lambda: _year_grid_one_pass(year_events, year)),
+        "history_counts": (lambda: _loop_counts(events, *history),
+                           lambda: _counted(events, *history)),
+    }
+    report = {"years": years, "events": len(events)}
+    for name, (loop, vectorized) in cases.items():
+        loop_ms, vectorized_ms = _ms(loop, seconds), _ms(vectorized, seconds)
+        report[name] = {
+            "loop_ms": loop_ms,
+            "numpy_ms": vectorized_ms,
+            "speedup": round(loop_ms / vectorized_ms, 1),
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 5, 20],
+                        help="Years of history per run (about three entries a day).")
+    parser.add_argument("--seconds", type=float, default=0.5, help="Timing per case.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    results = [measure(years, seconds=args.seconds, seed=args.seed) for years in args.years]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Query-routing throughput against growing people/places vocabularies.
+
+    uv run python -m benchmarks.router_benchmark --sizes 100 1000 10000
+
+For each vocabulary size, compiles a VocabularyMatcher once (as vocabulary.py
+does per user generation) and routes a fixed query mix — people, places and
+the date forms — through `route_query` with it: once parsing every query
+(memo off) and once with the matcher's memo, as repeated searches see it.
+Reports compile time and routed queries per second for both as JSON.
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import date
+
+from query_router import VocabularyMatcher, route_query
+
+TODAY = date(2026, 6, 30)
+QUERIES = [
+    "coffee with {p1}", "dinner with {p1} and {p2} at {place}", "{p1} or {p2}",
+    "lunch at the {place}", "with {p1}, {p2} last week", "gym", "what happened in march",
+    "walk in {place} with {p1}", "great days", "trip to {place} in may",
+    "dinner between 1 May and 10 May", "from 2026-01-05 to 2026-02-02", "3 weeks ago",
+    "before June with {p1}", "what did I do on 16th June, 2025", "last weekend",
+    "past 10 days feeling low", "since March 2026 at {place}",
+]
+_SYLLABLES = ["an", "bel", "cor", "da", "el", "fin", "gro", "ha", "is", "jo", "ka", "lu",
+              "mar", "no", "ol", "pe", "qui", "ro", "sa", "ti", "ur", "ve", "wil", "ya"]
+
+
+def _vocabulary(size, rng):
+    def word():
+        return "".join(rng.sample(_SYLLABLES, rng.randint(2, 3))).capitalize()
+
+    people = list(dict.fromkeys(
+        word() if rng.random() < 0.7 else f"{word()} {word()}" for _ in range(size)
+    ))
+    places = list(dict.fromkeys(f"{word()} {rng.choice(('Cafe', 'Park', 'Hall', 'Market'))}"
+                                for _ in range(max(1, size // 4))))
+    return people, places
+
+
+def _throughput(queries, matcher, seconds):
+    routed, started = 0, time.perf_counter()
+    while (elapsed := time.perf_counter() - started) < seconds:
+        for query in queries:
+            route_query(query, today=TODAY, matcher=matcher)
+        routed += len(queries)
+    return round(routed / elapsed, 1)
+
+
+def measure(size, *, seconds, seed):
+    rng = random.Random(seed)
+    people, places = _vocabulary(size, rng)
+    started = time.perf_counter()
+    matcher = VocabularyMatcher(people, places, memo_size=0)
+    compile_ms = (time.perf_counter() - started) * 1000
+    queries = [
+        template.format(p1=rng.choice(people), p2=rng.choice(people), place=rng.choice(places))
+        for template in QUERIES
+    ]
+    parsed = _throughput(queries, matcher, seconds)
+    matcher.memo_size = len(queries)
+    return {
+        "people": len(people),
+        "places": len(places),
+        "compile_ms": round(compile_ms, 2),
+        "queries_per_sec": parsed,
+        "memoized_queries_per_sec": _throughput(queries, matcher, seconds),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 5_000, 20_000],
+                        help="Known people per run (places are a quarter of that).")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Routing time per size.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    results = [measure(size, seconds=args.seconds, seed=args.seed) for size in args.sizes]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+"""Search benchmark: synthetic multi-user diary → index build, latency and recall.
+
+    uv run python -m benchmarks.search_benchmark --events 100000 --out run.json
+
+Generates a deterministic diary (events with subevents, people, places and
+daily moods) in a throwaway SQLite DB, builds the index with `reindex_all`, then
+runs a fixed query mix through `route_query` + `search_index.search` exactly as
+/search/data does. Reports, as JSON:
+
+  * build    — index build time, docs/sec and the embedding dedup ratio
+  * latency  — p50/p95/p99 per pipeline stage (search_timing), with the dense and
+               keyword legs run side by side and one after the other
+  * recall   — recall@k of the dense ranking (ANN, compact encodings) against an
+               exact float32 brute-force ranking over the same candidates
+  * where    — the where-filter candidate query answered from the trigram index
+               against the LIKE scan of `events.where` it replaced
+  * memory   — peak RSS and the bytes of vectors held by the matrix cache
+
+Embeddings come from the deterministic `fake` backend unless `--backend` says
+otherwise. Its vectors are near-orthogonal, which is a worst case for IVF
+recall; run with `--backend local` to judge recall on the real model.
+"""
+
+import argparse
+import json
+import pathlib
+import random
+import resource
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+import embedding_backend
+import search_index
+import search_timing
+import vector_codec
+import vocabulary
+from app import create_app
+from models import DailyLog, Event, EventEmbedding, SubEvent, User, db
+from moods import MOODS
+from query_router import route_query
+from routes.events import retrieve_event_data
+
+END = date(2026, 6, 30)  # the corpus's last day, and `today` for the query mix
+ACTIVITIES = [
+    "Gym", "Coffee", "Dinner", "Lunch", "Brunch", "Run along the river", "Yoga class",
+    "Team meeting", "Dentist appointment", "Groceries", "Book club", "Cinema",
+    "Walk in the park", "Piano lesson", "Call", "Haircut", "Swimming", "Board games",
+    "Concert", "Museum visit", "Cooking class", "Doctor checkup", "Climbing",
+]
+NOTES = [
+    "monthly catch-up", "talked about the new job", "felt tired afterwards",
+    "tried the new place", "great conversation", "rained the whole time",
+    "planning the summer holiday", "quick one", "ran late", "birthday celebration",
+    "finally finished the project", "lovely weather", "need to book the next one",
+    "argued about politics", "watched the sunset", "too crowded", "lots of laughs",
+]
+PEOPLE = [
+    "Mom", "Dad", "Sam", "Alex", "Priya", "Jonas", "Maya", "Leo", "Chen", "Fatima",
+    "Tom", "Ines", "Noah", "Zoe", "Omar", "Lucia", "Ben", "Hana", "Marco", "Ada",
+]
+PLACES = [
+    "Blue Bottle", "Home", "the office", "Riverside Park", "City Gym", "Lisbon",
+    "Central Library", "Odeon", "Sushi Den", "Grandma's house", "the clinic",
+    "Climbing Works", "Tate Modern", "Borough Market", "the studio",
+]
+TRIP_STOPS = [
+    "Flight out", "Museum", "Tram ride to the castle", "Beach afternoon", "Old town walk",
+    "Food market", "Train back", "Boat tour", "Hike to the viewpoint", "Hotel check-in",
+]
+# {person}/{place} are filled from the searching user's own vocabulary.
+QUERY_MIX = [
+    "coffee", "gym", "dinner with {person}", "{person}", "at {place}", "trip",
+    "yoga last month", "what happened in march", "great days", "museum",
+    "coffee with {person} at {place}", "running", "talked about work", "last week",
+    "birthday", "tram ride to the castle", "rough days in may", "something relaxing",
+]
+_BATCH = 10_000
+
+
+def generate_corpus(*, users, events, years, subevent_share, seed):
+    """Bulk-insert a synthetic diary; returns counts. Deterministic per seed."""
+    rng = random.Random(seed)
+    first_day = END - timedelta(days=int(365 * years) - 1)
+    span_days = (END - first_day).days + 1
+    db.session.execute(db.insert(User), [
+        {"id": uid, "username": f"bench{uid}"} for uid in range(1, users + 1)
+    ])
+
+    event_rows, sub_rows, sub_id, subevents = [], [], 1, 0
+    for event_id in range(1, events + 1):
+        activity = rng.choice(ACTIVITIES)
+        start = datetime.combine(first_day, datetime.min.time()) + timedelta(
+            days=rng.randrange(span_days), hours=rng.randrange(7, 22)
+        )
+        trip = rng.random() < subevent_share
+        event_rows.append({
+            "id": event_id,
+            "user_id": rng.randint(1, users),
+            "name": f"Trip to {rng.choice(PLACES)}" if trip else activity,
+            "notes": rng.choice(NOTES) if rng.random() < 0.4 else None,
+            "with_who": ", ".join(rng.sample(PEOPLE, rng.choice((0, 0, 1, 1, 2)))) or None,
+            "where": rng.choice(PLACES) if rng.random() < 0.6 else None,
+            "start_time": start,
+            "end_time": start + timedelta(hours=1),
+        })
+        if trip:
+            for stop in rng.sample(TRIP_STOPS, rng.randint(2, 5)):
+                sub_rows.append({
+                    "id": sub_id, "event_id": event_id, "name": stop,
+                    "notes": rng.choice(NOTES) if rng.random() < 0.3 else None,
+                    "start_time": start, "end_time": start + timedelta(hours=1),
+                })
+                sub_id += 1
+                subevents += 1
+        if len(event_rows) >= _BATCH:
+            db.session.execute(db.insert(Event), event_rows)
+            event_rows = []
+        if len(sub_rows) >= _BATCH:
+            db.session.execute(db.insert(SubEvent), sub_rows)
+            sub_rows = []
+    for table, rows in ((Event, event_rows), (SubEvent, sub_rows)):
+        if rows:
+            db.session.execute(db.insert(table), rows)
+
+    mood_keys = [mood.key for mood in MOODS]
+    logs = [
+        {"user_id": uid, "date": first_day + timedelta(days=offset),
+         "mood_key": rng.choice(mood_keys), "has_marker": False}
+        for uid in range(1, users + 1)
+        for offset in range(span_days)
+        if rng.random() < 0.7
+    ]
+    for start in range(0, len(logs), _BATCH):
+        db.session.execute(db.insert(DailyLog), logs[start:start + _BATCH])
+    vocabulary.rebuild_all()  # bulk inserts bypass the write paths that keep it
+    db.session.commit()
+    return {"users": users, "events": events, "subevents": subevents, "daily_logs": len(logs)}
+
+
+def _query_mix(user_id, rng):
+    known = vocabulary.for_user(user_id)
+    people, places = list(known.people), list(known.places)
+    return [
+        template.format(person=rng.choice(people or PEOPLE), place=rng.choice(places or PLACES))
+        for template in QUERY_MIX
+    ]
+
+
+def _timed_search(user_id, text, k):
+    """One query the way /search/data runs it → its SearchTrace."""
+    trace = search_timing.SearchTrace()
+    with trace.stage("vocab"):
+        known = vocabulary.for_user(user_id)
+    with trace.stage("route"):
+        routed = route_query(text, today=END, matcher=known.matcher)
+    matches = search_index.search(
+        user_id, routed.residual_q, date_from=routed.date_from, date_to=routed.date_to,
+        mood=routed.mood, who=routed.who, who_op=routed.who_op, where=routed.where,
+        limit=k, trace=trace,
+    )
+    with trace.stage("serialize"):
+        [retrieve_event_data(event) for event, _ in matches]
+    return trace
+
+
+def measure_latency(mixes, *, rounds, k):
+    """{stage: {count, p50, p95, p99}} over `rounds` passes of every user's mix."""
+    for user_id, mix in mixes.items():  # warm-up: matrices loaded, query vectors cached
+        for text in mix:
+            _timed_search(user_id, text, k)
+    stats = search_timing.StageStats(window=rounds * sum(len(mix) for mix in mixes.values()))
+    for _ in range(rounds):
+        for user_id, mix in mixes.items():
+            for text in mix:
+                stats.record(_timed_search(user_id, text, k))
+                db.session.rollback()  # end the read transaction, as a request would
+    return stats.percentiles()
+
+
+def _exact_chunks(user_id, exact):
+    """The user's chunks against the float32 vectors captured at build time."""
+    rows = (
+        db.session.query(EventEmbedding.event_id, EventEmbedding.source_hash)
+        .join(Event, Event.id == EventEmbedding.event_id)
+        .filter(Event.user_id == user_id)
+        .all()
+    )
+    digests = sorted({digest for _, digest in rows})
+    position = {digest: i for i, digest in enumerate(digests)}
+    ids = np.fromiter((event_id for event_id, _ in rows), dtype=np.int64, count=len(rows))
+    which = np.fromiter((position[d] for _, d in rows), dtype=np.int64, count=len(rows))
+    return ids, which, np.stack([exact[d] for d in digests])
+
+
+def measure_recall(mixes, exact, *, k):
+    """Mean / min recall@k of `_dense_rank` against exact brute force, per query."""
+    recalls = []
+    for user_id, mix in mixes.items():
+        ids, which, vectors = _exact_chunks(user_id, exact)
+        known = vocabulary.for_user(user_id)
+        for text in mix:
+            routed = route_query(text, today=END, matcher=known.matcher)
+            if not routed.residual_q:
+                continue
+            candidates = {r.id for r in search_index._candidate_events(
+                user_id, date_from=routed.date_from, date_to=routed.date_to,
+                mood=routed.mood, who=routed.who, who_op=routed.who_op, where=routed.where,
+            )}
+            if not candidates:
+                continue
+            query = search_index.embed_query(routed.residual_q)
+            rows = np.flatnonzero(np.isin(ids, list(candidates)))
+            event_ids, scores = search_index._max_per_event(
+                ids[rows], (vectors @ query)[which[rows]]
+            )
+            truth = {int(event_ids[i]) for i in np.argsort(-scores, kind="stable")[:k]}
+            if not truth:
+                continue
+            found = set(search_index._dense_rank(routed.residual_q, user_id, candidates)[:k])
+            recalls.append(len(found & truth) / len(truth))
+    if not recalls:
+        return {"k": k, "queries": 0, "mean": None, "min": None}
+    return {"k": k, "queries": len(recalls),
+            "mean": round(float(np.mean(recalls)), 4), "min": round(min(recalls), 4)}
+
+
+def _where_terms(user_id):
+    """Each of the user's places whole, as a lowercase substring and with a typo."""
+    terms = []
+    for place in list(vocabulary.for_user(user_id).places)[:5]:
+        word = max(place.split(), key=len).lower()
+        terms += [place, word, place[:len(place) // 2] + place[len(place) // 2 + 1:]]
+    return terms
+
+
+def _scan_where(user_id, where):
+    return (
+        db.session.query(Event.id, Event.start_time)
+        .filter(Event.user_id == user_id, Event.where.ilike(f"%{where}%"))
+        .order_by(Event.start_time.desc(), Event.id.desc())
+        .all()
+    )
+
+
+def _index_where(user_id, where):
+    return search_index._candidate_events(
+        user_id, date_from=None, date_to=None, mood=None, who=None, who_op="and", where=where,
+    )
+
+
+def measure_where(user_ids, *, rounds):
+    """{index, scan: {count, p50, p95, p99}} ms for where-filtered candidate queries."""
+    timings = {"index": [], "scan": []}
+    for _ in range(rounds):
+        for user_id in user_ids:
+            for term in _where_terms(user_id):
+                for mode, query in (("index", _index_where), ("scan", _scan_where)):
+                    started = time.perf_counter()
+                    query(user_id, term)
+                    timings[mode].append((time.perf_counter() - started) * 1000)
+                db.session.rollback()
+    report = {}
+    for mode, samples in timings.items():
+        points = np.percentile(samples, (50, 95, 99)) if samples else (None,) * 3
+        report[mode] = {"count": len(samples)} | {
+            f"p{p}": round(float(ms), 3) if ms is not None else None
+            for p, ms in zip((50, 95, 99), points, strict=True)
+        }
+    index, scan = report["index"]["p50"], report["scan"]["p50"]
+    report["speedup_p50"] = round(scan / index, 2) if index else None
+    return report
+
+
+@contextmanager
+def _overrides(module, **values):
+    saved = {name: getattr(module, name) for name in values}
+    for name, value in values.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(module, name, value)
+
+
+def _capturing(embed, exact):
+    """Wrap `embed_texts` to keep each new text's float32 vector for the baseline."""
+    def embed_texts(texts):
+        vectors = embed(texts)
+        exact.update(
+            (search_index._source_hash(text), vector)
+            for text, vector in zip(texts, vectors, strict=True)
+        )
+        return vectors
+    return embed_texts
+
+
+def run(args, workdir):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{workdir / 'bench.db'}",
+        "ATTACHMENT_DIR": str(workdir / "attachments"),
+        "SEARCH_INDEX_WORKER": "external",
+    })
+    previous_backend = embedding_backend._backend
+    embedding_backend.set_backend(embedding_backend.make_backend(args.backend))
+    exact = {}
+    knobs = {
+        "EMBED_ENCODING": args.encoding, "EMBED_RESCORE": args.rescore,
+        "ANN_MIN_ROWS": args.ann_min_rows, "ANN_NPROBE": args.nprobe,
+        "VECTOR_STORE": not args.no_vector_store,
+        "embed_texts": _capturing(search_index.embed_texts, exact),
+    }
+    report = {"config": {k: v for k, v in vars(args).items() if k != "out"}}
+    try:
+        with app.app_context(), _overrides(search_index, **knobs):
+            db.create_all()
+            started = time.perf_counter()
+            report["corpus"] = generate_corpus(
+                users=args.users, events=args.events, years=args.years,
+                subevent_share=args.subevent_share, seed=args.seed,
+            )
+            report["corpus"]["generate_seconds"] = round(time.perf_counter() - started, 2)
+
+            started = time.perf_counter()
+            search_index.reindex_all(batch_size=args.batch_size)
+            seconds = time.perf_counter() - started
+            report["build"] = {
+                "seconds": round(seconds, 2),
+                "docs_per_sec": round(args.events / seconds, 1) if seconds else None,
+                **search_index.dedup_stats(),
+                "db_bytes": (workdir / "bench.db").stat().st_size,
+            }
+
+            rng = random.Random(args.seed)
+            mixes = {uid: _query_mix(uid, rng) for uid in range(1, args.users + 1)}
+            latency = report["latency_ms"] = {}
+            for mode, parallel in (("parallel", True), ("serial", False)):
+                with _overrides(search_index, SEARCH_PARALLEL=parallel):
+                    latency[mode] = measure_latency(mixes, rounds=args.rounds, k=args.k)
+            serial = latency["serial"]["total"]["p50"]
+            parallel = latency["parallel"]["total"]["p50"]
+            report["parallel_speedup_p50"] = round(serial / parallel, 3) if parallel else None
+
+            with _overrides(search_index, DENSE_MIN_SCORE=-1.0):  # rank every candidate
+                report["recall"] = measure_recall(mixes, exact, k=args.k)
+
+            report["where"] = measure_where(list(mixes), rounds=args.rounds)
+
+            with search_index._matrix_lock:
+                resident = sum(
+                    entry.matrix.nbytes for entry in search_index._matrix_cache.values()
+                )
+            report["memory"] = {
+                # ru_maxrss is KiB on Linux.
+                "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+                "resident_vectors_mb": round(resident / 2**20, 2),
+            }
+            db.session.remove()
+            db.engine.dispose()
+    finally:
+        embedding_backend.set_backend(previous_backend)
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--events", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--years", type=float, default=3.0, help="Span of the diary.")
+    parser.add_argument("--subevent-share", type=float, default=0.08,
+                        help="Share of events that are trips with 2-5 subevents.")
+    parser.add_argument("--rounds", type=int, default=5, help="Timed passes of the query mix.")
+    parser.add_argument("-k", type=int, default=10, help="Results per query; recall@k.")
+    parser.add_argument("--batch-size", type=int, default=search_index.REINDEX_BATCH_SIZE)
+    parser.add_argument("--backend", default="fake", choices=("fake", "local", "sidecar"))
+    parser.add_argument("--encoding", default=search_index.EMBED_ENCODING,
+                        choices=vector_codec.ENCODINGS)
+    parser.add_argument("--rescore", type=int, default=search_index.EMBED_RESCORE)
+    parser.add_argument("--ann-min-rows", type=int, default=search_index.ANN_MIN_ROWS)
+    parser.add_argument("--nprobe", type=int, default=search_index.ANN_NPROBE)
+    parser.add_argument("--no-vector-store", action="store_true",
+                        help="Hold vectors in process memory, not memory-mapped files.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dir", type=pathlib.Path,
+                        help="Keep the DB here for inspection (default: a temp dir).")
+    parser.add_argument("--out", type=pathlib.Path, help="Write the JSON here (default: stdout).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.dir is not None:
+        if (args.dir / "bench.db").exists():
+            sys.exit(f"{args.dir / 'bench.db'} already exists; pick an empty --dir.")
+        args.dir.mkdir(parents=True, exist_ok=True)
+        report = run(args, args.dir)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            report = run(args, pathlib.Path(tmp))
+    output = json.dumps(report, indent=2, default=str)
+    if args.out is None:
+        print(output)
+    else:
+        args.out.write_text(output + "\n")
+        total = report["latency_ms"]["parallel"]["total"]
+        print(f"{args.events} events: built in {report['build']['seconds']}s, "
+              f"p50 {total['p50']} ms / p95 {total['p95']} ms, "
+              f"recall@{args.k} {report['recall']['mean']} → {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Per-user, per-day summary (`day_summary`) behind the month and year grids.
+
+The grids show which days have events, their mood colour and marker. Rather
+than re-reading `events` and `daily_logs` and expanding multi-day events on
+every page load, those live in one row per day kept up to date incrementally
+by the write paths, in the same transaction:
+
+  * events — `record_event` moves an event's count off the days it covered
+    and onto the days it covers now (subevents don't count, as before);
+  * mood, marker, attachments — `record_day` re-reads that day's log.
+
+`rebuild` recomputes everything from the source tables and `check` reports
+rows that disagree with them (`flask day-summary [--check]`), for after the
+database has been edited by hand.
+"""
+
+from collections import Counter
+from datetime import date, timedelta
+from itertools import chain
+
+import numpy as np
+
+from models import Attachment, DailyLog, DaySummary, Event, db
+
+_UPSERT = (
+    "INSERT INTO day_summary (user_id, date, event_count, has_marker, attachment_count) "
+    "VALUES (:uid, :day, :change, 0, 0) "
+    "ON CONFLICT(user_id, date) DO UPDATE SET event_count = event_count + :change"
+)
+
+# A day with no event, mood, marker or attachment keeps no row.
+_PRUNE = (
+    "DELETE FROM day_summary WHERE user_id = :uid AND date = :day AND event_count <= 0 "
+    "AND mood_key IS NULL AND NOT has_marker AND attachment_count = 0"
+)
+
+
+def span_of(event):
+    """(user id, first day, last day) an event covers; None for a subevent or
+    an unowned event, which the grids don't show."""
+    if not isinstance(event, Event) or event.user_id is None:
+        return None
+    end = event.end_time or event.start_time
+    return event.user_id, event.start_time.date(), end.date()
+
+
+def _days(first, last):
+    day = first
+    while day <= last:
+        yield day
+        day += timedelta(days=1)
+
+
+def day_counts(first, last, start, end):
+    """How many of the spans [first, last] (arrays of day ordinals) cover each
+    day of [start, end) (dates), as an int array indexed by days since `start`.
+
+    A difference array gets +1 where each span (clipped to the window) starts
+    and -1 the day after it ends, and a running sum turns that into counts, so
+    a three-week trip costs no more than a lunch.
+    """
+    size = max((end - start).days, 0)
+    origin = start.toordinal()
+    lo = np.clip(first - origin, 0, size)
+    hi = np.clip(last - origin + 1, 0, size)
+    covered = lo < hi
+    marks = np.bincount(lo[covered], minlength=size + 1)
+    marks -= np.bincount(hi[covered], minlength=size + 1)
+    return np.cumsum(marks[:size])
+
+
+def event_day_counts(events, start, end):
+    """`day_counts` for events' start days and (effective) end days."""
+    events = list(events)
+    first = np.fromiter((e.start_time.toordinal() for e in events), np.int64, len(events))
+    last = np.fromiter(
+        ((e.end_time or e.start_time).toordinal() for e in events), np.int64, len(events)
+    )
+    return day_counts(first, last, start, end)
+
+
+def _ordinal(day):
+    """A date column as `date.toordinal()`, computed in SQLite (no date parsing)."""
+    return db.cast(db.func.julianday(day) - 1721424.5, db.Integer)
+
+
+def record_event(before=None, after=None):
+    """Move one event from the days of span `before` to those of `after`
+    (`span_of` values; caller commits). Omit `before` for a creation and
+    `after` for a deletion."""
+    delta = Counter()
+    for span, change in ((before, -1), (after, 1)):
+        if span is not None:
+            user_id, first, last = span
+            for day in _days(first, last):
+                delta[user_id, day] += change
+    params = [
+        {"uid": user_id, "day": day.isoformat(), "change": change}
+        for (user_id, day), change in delta.items()
+        if change
+    ]
+    if not params:
+        return
+    db.session.execute(db.text(_UPSERT), params)
+    db.session.execute(db.text(_PRUNE), [{"uid": p["uid"], "day": p["day"]} for p in params])
+
+
+def record_day(user_id, day):
+    """Refresh one day's mood, marker and attachment count from its log (caller commits)."""
+    db.session.flush()
+    log = (
+        db.session.query(
+            DailyLog.mood_key, DailyLog.has_marker, db.func.count(Attachment.id)
+        )
+        .outerjoin(Attachment, Attachment.daily_log_id == DailyLog.id)
+        .filter(DailyLog.user_id == user_id, DailyLog.date == day)
+        .group_by(DailyLog.id)
+        .first()
+    )
+    mood_key, has_marker, attachments = log or (None, False, 0)
+    params = {
+        "uid": user_id, "day": day.isoformat(),
+        "mood": mood_key, "marker": bool(has_marker), "attachments": attachments,
+    }
+    db.session.execute(
+        db.text(
+            "INSERT INTO day_summary "
+            "(user_id, date, event_count, mood_key, has_marker, attachment_count) "
+            "VALUES (:uid, :day, 0, :mood, :marker, :attachments) "
+            "ON CONFLICT(user_id, date) DO UPDATE SET mood_key = excluded.mood_key, "
+            "has_marker = excluded.has_marker, attachment_count = excluded.attachment_count"
+        ),
+        params,
+    )
+    db.session.execute(db.text(_PRUNE), {"uid": user_id, "day": params["day"]})
+
+
+def _expected(user_id=None):
+    """{(user id, day): (event_count, mood_key, has_marker, attachment_count)}
+    computed from the source tables."""
+    events = (
+        db.select(Event.user_id, _ordinal(Event.start_day), _ordinal(Event.end_day))
+        .where(Event.user_id.isnot(None))
+    )
+    logs = (
+        db.session.query(
+            DailyLog.user_id, DailyLog.date, DailyLog.mood_key, DailyLog.has_marker,
+            db.func.count(Attachment.id),
+        )
+        .outerjoin(Attachment, Attachment.daily_log_id == DailyLog.id)
+        .group_by(DailyLog.id)
+    )
+    if user_id is not None:
+        events = events.where(Event.user_id == user_id)
+        logs = logs.filter(DailyLog.user_id == user_id)
+
+    fetched = db.session.execute(events).all()
+    spans = np.fromiter(chain.from_iterable(fetched), np.int64, 3 * len(fetched)).reshape(-1, 3)
+    spans = spans[np.argsort(spans[:, 0], kind="stable")]
+    counts = {}
+    # One window per user, from their first event's day to their last one's.
+    for user_spans in np.split(spans, np.flatnonzero(np.diff(spans[:, 0])) + 1):
+        if not len(user_spans):
+            continue
+        uid, first, last = int(user_spans[0, 0]), user_spans[:, 1], user_spans[:, 2]
+        start = date.fromordinal(int(first.min()))
+        per_day = day_counts(first, last, start, date.fromordinal(int(last.max()) + 1))
+        for offset in np.flatnonzero(per_day):
+            counts[uid, start + timedelta(days=int(offset))] = int(per_day[offset])
+    rows = {key: (count, None, False, 0) for key, count in counts.items()}
+    for uid, day, mood_key, has_marker, attachments in logs:
+        row = (counts.get((uid, day), 0), mood_key, bool(has_marker), attachments)
+        if row != (0, None, False, 0):
+            rows[uid, day] = row
+    return rows
+
+
+def _stored(user_id=None):
+    query = db.session.query(
+        DaySummary.user_id, DaySummary.date, DaySummary.event_count,
+        DaySummary.mood_key, DaySummary.has_marker, DaySummary.attachment_count,
+    )
+    if user_id is not None:
+        query = query.filter(DaySummary.user_id == user_id)
+    return {(uid, day): tuple(rest) for uid, day, *rest in query}
+
+
+def rebuild(user_id=None):
+    """Recompute the summary of one user, or of everyone (caller commits).
+    Returns the number of rows written."""
+    rows = _expected(user_id)
+    query = DaySummary.query
+    if user_id is not None:
+        query = query.filter_by(user_id=user_id)
+    query.delete()
+    if rows:
+        db.session.execute(db.insert(DaySummary), [
+            {
+                "user_id": uid, "date": day, "event_count": count, "mood_key": mood_key,
+                "has_marker": has_marker, "attachment_count": attachments,
+            }
+            for (uid, day), (count, mood_key, has_marker, attachments) in rows.items()
+        ])
+    return len(rows)
+
+
+def check(user_id=None):
+    """Rows that disagree with the source tables, as (user id, day, stored,
+    expected) sorted by user and day; either side is None when the row is missing."""
+    stored, expected = _stored(user_id), _expected(user_id)
+    return [
+        (uid, day, stored.get((uid, day)), expected.get((uid, day)))
+        for uid, day in sorted(stored.keys() | expected.keys())
+        if stored.get((uid, day)) != expected.get((uid, day))
+    ]
+
+
+def for_range(user_id, start, end):
+    """The user's summary rows for days in [start, end), by date."""
+    return (
+        DaySummary.query.filter(
+            DaySummary.user_id == user_id, DaySummary.date >= start, DaySummary.date < end
+        )
+        .order_by(DaySummary.date)
+        .all()
+    )
@@ -0,0 +1,264 @@
+"""Pluggable embedding backends behind search_index.embed_texts / embed_query.
+
+  * local   — fastembed/ONNX in this process (one model copy per process)
+  * sidecar — a client for `flask embed-server`: one model per host, serving
+              every gunicorn worker over a Unix socket and batching their
+              concurrent requests into shared forward passes
+  * fake    — deterministic hash-seeded vectors for tests and benchmarks
+
+Chosen with `SEARCH_EMBED_BACKEND` (default `local`); the sidecar socket is
+`SEARCH_EMBED_SOCKET`. Backends return raw vectors; normalization stays in
+search_index.
+"""
+
+import abc
+import hashlib
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+EMBED_MODEL = "BAAI/bge-small-en-v1.5"  # 384-dim, ONNX, ~tens of MB (no torch)
+DEFAULT_SOCKET = "/tmp/calendar-embed.sock"
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("!I")  # request: JSON payload length
+_REPLY = struct.Struct("!iI")  # reply: rows (-1 = error) and dim / message length
+
+
+class EmbeddingBackend(abc.ABC):
+    """Turns texts into vectors. `kind` is "passage" (documents) or "query"."""
+
+    model = EMBED_MODEL
+
+    @abc.abstractmethod
+    def embed(self, texts, kind="passage"):
+        """One float32 vector per text, in order."""
+
+
+class LocalBackend(EmbeddingBackend):
+    """fastembed in-process, loaded lazily on first use."""
+
+    def __init__(self, model_name=EMBED_MODEL):
+        self.model = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _get_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from fastembed import TextEmbedding
+
+                    # FASTEMBED_CACHE_PATH points at the model baked into the image
+                    # at build time, so runtime needs no network (see Dockerfile).
+                    self._model = TextEmbedding(
+                        model_name=self.model,
+                        cache_dir=os.environ.get("FASTEMBED_CACHE_PATH") or None,
+                    )
+        return self._model
+
+    def embed(self, texts, kind="passage"):
+        model = self._get_model()
+        # query_embed applies bge's query-side retrieval instruction.
+        vectors = model.query_embed(list(texts)) if kind == "query" else model.embed(list(texts))
+        return [np.asarray(v, dtype=np.float32) for v in vectors]
+
+
+class FakeBackend(EmbeddingBackend):
+    """Deterministic, model-free vectors: identical text → identical vector,
+    distinct texts → near-orthogonal ones. For tests and benchmarks."""
+
+    model = "fake-sha256"
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def embed(self, texts, kind="passage"):
+        out = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "big")
+            out.append(np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32))
+        return out
+
+
+# --- sidecar --------------------------------------------------------------
+
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("embedding sidecar closed the connection")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+class SidecarBackend(EmbeddingBackend):
+    """Client for the host's embedding sidecar.
+
+    Falls back to an in-process model if the sidecar is unreachable (missing
+    socket, refused or reset connection, timeout, truncated reply), so search
+    and indexing degrade to the old per-worker cost rather than failing. The
+    sidecar is tried again `retry_after` seconds later; the in-process model
+    stays loaded in case it is needed again.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, timeout=30.0, retry_after=30.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._fallback = None
+        self._down_until = None  # monotonic time of the next sidecar attempt
+
+    def embed(self, texts, kind="passage"):
+        texts = list(texts)
+        if not texts:
+            return []
+        if self._down_until is None or time.monotonic() >= self._down_until:
+            try:
+                vectors = self._request(texts, kind)
+            except OSError as exc:
+                if self._down_until is None:
+                    logger.warning(
+                        "Embedding sidecar unreachable at %s (%s); embedding in-process, "
+                        "retrying it in %.0fs", self.socket_path, exc, self.retry_after,
+                    )
+                self._down_until = time.monotonic() + self.retry_after
+            else:
+                if self._down_until is not None:
+                    logger.info("Embedding sidecar at %s is back", self.socket_path)
+                    self._down_until = None
+                return vectors
+        if self._fallback is None:
+            self._fallback = LocalBackend()
+        return self._fallback.embed(texts, kind)
+
+    def _request(self, texts, kind):
+        payload = json.dumps({"kind": kind, "texts": texts}).encode()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            sock.sendall(_HEADER.pack(len(payload)) + payload)
+            rows, size = _REPLY.unpack(_recv_exact(sock, _REPLY.size))
+            if rows < 0:
+                raise RuntimeError(_recv_exact(sock, size).decode())
+            raw = _recv_exact(sock, rows * size * 4)
+        return list(np.frombuffer(raw, dtype=np.float32).reshape(rows, size))
+
+
+class _Batcher(threading.Thread):
+    """Coalesces concurrent sidecar requests into one backend call per kind.
+
+    Waits up to `max_wait` after the first pending request for others to
+    arrive, then embeds up to `max_batch` texts in a single forward pass.
+    """
+
+    def __init__(self, backend, max_batch, max_wait):
+        super().__init__(name="embed-batcher", daemon=True)
+        self.backend = backend
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.pending = queue.Queue()
+        self.calls = 0
+
+    def submit(self, texts, kind):
+        future = Future()
+        self.pending.put((texts, kind, future))
+        return future
+
+    def run(self):
+        while True:
+            batch = [self.pending.get()]
+            size = len(batch[0][0])
+            while size < self.max_batch:
+                try:
+                    item = self.pending.get(timeout=self.max_wait)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            for kind in {kind for _, kind, _ in batch}:
+                self._run_kind([item for item in batch if item[1] == kind], kind)
+
+    def _run_kind(self, items, kind):
+        texts = [text for item_texts, _, _ in items for text in item_texts]
+        try:
+            vectors = self.backend.embed(texts, kind) if texts else []
+            self.calls += 1
+        except Exception as exc:
+            for _, _, future in items:
+                future.set_exception(exc)
+            return
+        offset = 0
+        for item_texts, _, future in items:
+            future.set_result(vectors[offset:offset + len(item_texts)])
+            offset += len(item_texts)
+
+
+class _SidecarHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        (length,) = _HEADER.unpack(_recv_exact(self.request, _HEADER.size))
+        request = json.loads(_recv_exact(self.request, length))
+        try:
+            vectors = self.server.batcher.submit(request["texts"], request["kind"]).result()
+        except Exception as exc:
+            message = str(exc).encode()
+            self.request.sendall(_REPLY.pack(-1, len(message)) + message)
+            return
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+        self.request.sendall(_REPLY.pack(*matrix.shape) + matrix.tobytes())
+
+
+class SidecarServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, backend, *, max_batch=64, max_wait=0.005):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # stale socket from a previous run
+        self.batcher = _Batcher(backend, max_batch, max_wait)
+        self.batcher.start()
+        super().__init__(socket_path, _SidecarHandler)
+
+
+# --- selection ------------------------------------------------------------
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def make_backend(name):
+    if name == "local":
+        return LocalBackend()
+    if name == "sidecar":
+        return SidecarBackend(os.environ.get("SEARCH_EMBED_SOCKET") or DEFAULT_SOCKET)
+    if name == "fake":
+        return FakeBackend()
+    raise ValueError(f"Unknown embedding backend: {name!r}")
+
+
+def get_backend():
+    """The process-wide backend named by SEARCH_EMBED_BACKEND (default local)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = make_backend(os.environ.get("SEARCH_EMBED_BACKEND") or "local")
+    return _backend
+
+
+def set_backend(backend):
+    """Swap the process-wide backend (tests, benchmarks)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
@@ -0,0 +1,261 @@
+"""Durable outbox + background indexer for the search index.
+
+Event CRUD never embeds inline: the route stages an `index_outbox` row in the
+same transaction as the write (`enqueue`) and returns. The indexer drains the
+outbox in batches — one model call and one commit per batch — so a request
+thread never waits on ONNX inference. Until an entry is drained, search matches
+it lexically against its live text (see search_index.search).
+
+Where the indexer runs is set by the `SEARCH_INDEX_WORKER` app config:
+  * thread   — a daemon thread in this process, woken after each write (default)
+  * external — a separate `flask index-worker` process drains the outbox
+  * inline   — drained synchronously after each write (tests)
+
+However many processes run an indexer (every gunicorn worker does in `thread`
+mode), only one drains at a time: draining takes an exclusive lock on
+`indexer.lock` beside the SQLite file, and a process that finds it taken skips
+its turn, since the holder drains until the outbox is empty (anything queued
+just as it finishes is picked up on the next poll).
+
+A batch that fails is retried one entry at a time, so a single entry the
+indexer can't handle doesn't hold back the rest. Each failure is counted on its
+row; after `SEARCH_INDEX_MAX_ATTEMPTS` the row is parked — skipped, and listed
+by `/search/status` — until the entry is edited again.
+"""
+
+import fcntl
+import os
+import pathlib
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
+
+import search_index
+from models import Event, IndexOutbox, db
+
+OUTBOX_BATCH_SIZE = 64  # entries per embedding call / commit
+POLL_SECONDS = 5.0  # how often an idle worker checks for other processes' writes
+# Failed indexing passes after which an entry is parked rather than retried.
+MAX_ATTEMPTS = int(os.environ.get("SEARCH_INDEX_MAX_ATTEMPTS", "5"))
+
+
+def enqueue(event_id, user_id):
+    """Stage an event for (re)indexing in the current transaction (caller commits).
+
+    Re-queueing an already-pending event bumps its version rather than adding a
+    row, so a burst of edits to one entry is indexed once. It also clears the
+    row's failures: an edit gives a parked entry a fresh set of attempts.
+    """
+    db.session.execute(
+        db.text(
+            "INSERT INTO index_outbox (event_id, user_id, version, enqueued_at, attempts) "
+            "VALUES (:eid, :uid, 1, CURRENT_TIMESTAMP, 0) "
+            "ON CONFLICT(event_id) DO UPDATE SET version = version + 1, "
+            "user_id = excluded.user_id, attempts = 0, last_error = NULL"
+        ),
+        {"eid": event_id, "uid": user_id},
+    )
+
+
+def queue_depth(user_id=None):
+    """Entries waiting to be indexed (for one user, or everyone); parked ones
+    aren't waiting and don't count."""
+    query = db.session.query(func.count(IndexOutbox.event_id)).filter(
+        IndexOutbox.attempts < MAX_ATTEMPTS
+    )
+    if user_id is not None:
+        query = query.filter(IndexOutbox.user_id == user_id)
+    return query.scalar()
+
+
+def parked(user_id):
+    """The user's parked entries, as {event_id, attempts, error} dicts."""
+    rows = (
+        db.session.query(IndexOutbox.event_id, IndexOutbox.attempts, IndexOutbox.last_error)
+        .filter(IndexOutbox.user_id == user_id, IndexOutbox.attempts >= MAX_ATTEMPTS)
+        .order_by(IndexOutbox.event_id)
+        .all()
+    )
+    return [{"event_id": r.event_id, "attempts": r.attempts, "error": r.last_error} for r in rows]
+
+
+def _index_rows(rows):
+    """Index (or unindex) the entries behind outbox `rows`, then clear the rows.
+
+    Not one transaction: `index_events` and `remove_events` commit on their
+    own, and the rows are cleared in a commit after that. A crash in between
+    leaves indexed entries queued, which is harmless: draining them again finds
+    nothing changed (chunks are diffed by source hash, removals are no-ops).
+    A row is only cleared if its version is unchanged, so an edit that lands
+    while its batch is being embedded stays queued for the next pass.
+    """
+    events = (
+        Event.query.options(selectinload(Event.subevents))
+        .filter(Event.id.in_([r.event_id for r in rows]))
+        .all()
+    )
+    live = {event.id for event in events}
+    search_index.index_events(events)
+    search_index.remove_events({r.event_id: r.user_id for r in rows if r.event_id not in live})
+
+    for r in rows:
+        db.session.execute(
+            db.text("DELETE FROM index_outbox WHERE event_id = :eid AND version = :v"),
+            {"eid": r.event_id, "v": r.version},
+        )
+    db.session.commit()
+
+
+def _record_failure(row, error):
+    """Count a failed pass on the row (unless the entry was edited meanwhile);
+    returns its event id."""
+    current_app.logger.error("Search indexer failed on event %s: %r", row.event_id, error)
+    db.session.execute(
+        db.text(
+            "UPDATE index_outbox SET attempts = attempts + 1, last_error = :error "
+            "WHERE event_id = :eid AND version = :v"
+        ),
+        {"eid": row.event_id, "v": row.version, "error": f"{type(error).__name__}: {error}"[:500]},
+    )
+    db.session.commit()
+    return row.event_id
+
+
+def drain_outbox(batch_size=OUTBOX_BATCH_SIZE, skip=()):
+    """Index one batch of queued entries, leaving out event ids in `skip`.
+
+    Returns (processed outbox rows, failed event ids). If the batch fails as a whole, its
+    entries are retried one by one and each one that still fails has the
+    failure recorded on its row.
+    """
+    query = db.session.query(
+        IndexOutbox.event_id, IndexOutbox.user_id, IndexOutbox.version
+    ).filter(IndexOutbox.attempts < MAX_ATTEMPTS)
+    if skip:
+        query = query.filter(IndexOutbox.event_id.notin_(skip))
+    rows = query.order_by(IndexOutbox.enqueued_at, IndexOutbox.event_id).limit(batch_size).all()
+    if not rows:
+        return [], []
+    try:
+        _index_rows(rows)
+        return rows, []
+    except Exception as error:
+        db.session.rollback()
+        if len(rows) == 1:
+            return rows, [_record_failure(rows[0], error)]
+        current_app.logger.exception("Search indexer batch failed; retrying entries one by one")
+
+    failed = []
+    for row in rows:
+        try:
+            _index_rows([row])
+        except Exception as error:
+            db.session.rollback()
+            failed.append(_record_failure(row, error))
+    return rows, failed
+
+
+def drain_all(batch_size=OUTBOX_BATCH_SIZE):
+    """Drain until the outbox is empty or only holds entries that failed in this
+    pass (retried next time, up to MAX_ATTEMPTS), then retrain the IVF
+    centroids of any user who has outgrown theirs, so searches never have to.
+    Returns the total processed."""
+    total, failed, users = 0, [], set()
+    while True:
+        rows, just_failed = drain_outbox(batch_size, skip=failed)
+        if not rows:
+            break
+        total += len(rows)
+        failed += just_failed
+        users.update(r.user_id for r in rows)
+    if users:
+        search_index.refresh_centroids(sorted(users - {None}))
+    return total
+
+
+@contextmanager
+def _drain_turn():
+    """Yields whether this process may drain now (no other indexer is draining)."""
+    database = db.engine.url.database
+    if not database or database == ":memory:":
+        # In-memory DB: private to this process; its threads still take turns.
+        if not _memory_lock.acquire(blocking=False):
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            _memory_lock.release()
+        return
+    with open(pathlib.Path(database).resolve().parent / "indexer.lock", "a") as fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+_memory_lock = threading.Lock()
+
+
+def _drain_safe():
+    try:
+        with _drain_turn() as mine:
+            return drain_all() if mine else 0
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Search indexer failed; entries stay queued")
+        return 0
+
+
+class _IndexerThread(threading.Thread):
+    def __init__(self, app):
+        super().__init__(name="search-indexer", daemon=True)
+        self.app = app
+        self.wakeup = threading.Event()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(POLL_SECONDS)
+            self.wakeup.clear()
+            with self.app.app_context():
+                _drain_safe()
+                db.session.remove()
+
+
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def notify():
+    """Tell the indexer new entries are queued. Call after the write commits."""
+    mode = current_app.config.get("SEARCH_INDEX_WORKER", "thread")
+    if mode == "inline":
+        _drain_safe()
+    elif mode == "thread":
+        global _thread
+        with _thread_lock:
+            if _thread is None or not _thread.is_alive():
+                _thread = _IndexerThread(current_app._get_current_object())
+                _thread.start()
+        _thread.wakeup.set()
+
+
+def run_worker(*, once=False, poll_seconds=POLL_SECONDS, log=print):
+    """Blocking drain loop for `flask index-worker` (one per host)."""
+    while True:
+        processed = _drain_safe()
+        if processed:
+            log(f"Indexed {processed} queued entries ({queue_depth()} pending).")
+        db.session.remove()
+        if once:
+            return
+        time.sleep(poll_seconds)
@@ -0,0 +1,66 @@
+"""add vocabulary tables
+
+Per-user people/places with use counts for query routing, plus the per-user
+generation that tells workers their cached copy is stale. Backfilled from the
+existing events.
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from collections import Counter
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7b8c9d0e1f2'
+down_revision = 'f6a7b8c9d0e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    vocabulary_term = op.create_table('vocabulary_term',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('term', sa.String(), nullable=False),
+    sa.Column('uses', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'kind', 'term')
+    )
+    vocabulary_generation = op.create_table('vocabulary_generation',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('generation', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Same counting as vocabulary._terms: each name in a comma-separated
+    # with_who, and the whole `where`, once per event.
+    counts, users = Counter(), set()
+    rows = op.get_bind().execute(
+        sa.text('SELECT user_id, with_who, "where" FROM events WHERE user_id IS NOT NULL')
+    )
+    for user_id, with_who, where in rows:
+        users.add(user_id)
+        names = {part.strip() for part in (with_who or "").split(",") if part.strip()}
+        counts.update((user_id, 'who', name) for name in names)
+        if where:
+            counts[user_id, 'where', where] += 1
+    if counts:
+        op.bulk_insert(vocabulary_term, [
+            {'user_id': user_id, 'kind': kind, 'term': term, 'uses': uses}
+            for (user_id, kind, term), uses in counts.items()
+        ])
+    if users:
+        op.bulk_insert(vocabulary_generation, [
+            {'user_id': user_id, 'generation': 1} for user_id in sorted(users)
+        ])
+
+
+def downgrade():
+    op.drop_table('vocabulary_generation')
+    op.drop_table('vocabulary_term')
@@ -0,0 +1,95 @@
+"""add people index
+
+Parses every comma-separated with_who (of events and their subevents) into
+`person` and the `event_person` links that who-filters join on, and moves the
+people half of the routing vocabulary there from `vocabulary_term`.
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from collections import Counter
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8c9d0e1f2a3'
+down_revision = 'a7b8c9d0e1f2'
+branch_labels = None
+depends_on = None
+
+
+def _names(with_who):
+    # Same parsing as vocabulary.names_in / person_key.
+    return [part.strip() for part in (with_who or "").split(",") if part.strip()]
+
+
+def upgrade():
+    person = op.create_table('person',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('key', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'key', name='unique_user_person')
+    )
+    event_person = op.create_table('event_person',
+    sa.Column('person_id', sa.Integer(), nullable=False),
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['person_id'], ['person.id'], ),
+    sa.PrimaryKeyConstraint('person_id', 'event_id')
+    )
+    op.create_index('ix_event_person_event', 'event_person', ['event_id'], unique=False)
+
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        'SELECT id, user_id, with_who FROM events WHERE user_id IS NOT NULL '
+        'UNION ALL '
+        'SELECT s.event_id, e.user_id, s.with_who FROM subevents s '
+        'JOIN events e ON e.id = s.event_id WHERE e.user_id IS NOT NULL'
+    ))
+    spellings, links = {}, set()
+    for event_id, user_id, with_who in rows:
+        for name in _names(with_who):
+            key = (user_id, name.casefold())
+            spellings.setdefault(key, name)
+            links.add((key, event_id))
+    ids = {key: i for i, key in enumerate(spellings, start=1)}
+    if spellings:
+        op.bulk_insert(person, [
+            {'id': ids[key], 'user_id': key[0], 'name': name, 'key': key[1]}
+            for key, name in spellings.items()
+        ])
+        op.bulk_insert(event_person, [
+            {'person_id': ids[key], 'event_id': event_id} for key, event_id in sorted(links)
+        ])
+    bind.execute(sa.text("DELETE FROM vocabulary_term WHERE kind = 'who'"))
+    bind.execute(sa.text('UPDATE vocabulary_generation SET generation = generation + 1'))
+
+
+def downgrade():
+    # Put the people back into vocabulary_term, counted as before: the names in
+    # each event's own with_who.
+    bind = op.get_bind()
+    counts = Counter()
+    rows = bind.execute(
+        sa.text('SELECT user_id, with_who FROM events WHERE user_id IS NOT NULL')
+    )
+    for user_id, with_who in rows:
+        counts.update((user_id, name) for name in set(_names(with_who)))
+    if counts:
+        bind.execute(
+            sa.text("INSERT INTO vocabulary_term (user_id, kind, term, uses) "
+                    "VALUES (:user_id, 'who', :term, :uses)"),
+            [{'user_id': user_id, 'term': term, 'uses': uses}
+             for (user_id, term), uses in counts.items()],
+        )
+    bind.execute(sa.text('UPDATE vocabulary_generation SET generation = generation + 1'))
+    op.drop_index('ix_event_person_event', table_name='event_person')
+    op.drop_table('event_person')
+    op.drop_table('person')
@@ -0,0 +1,43 @@
+"""scope event_fts by user and day
+
+Rebuilds the lexical index so its rowid is the event id and each row carries an
+indexed per-user token (`user_key`, "u<id>") and the event's start date (`day`).
+Sparse ranking can then restrict a MATCH to one user and date range inside
+SQLite instead of filtering every household match in Python. The stored text is
+copied across, so no reindex is required.
+
+Revision ID: c3d4e5f6a7b8
+Revises: b2c3d4e5f6a7
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+
+revision = 'c3d4e5f6a7b8'
+down_revision = 'b2c3d4e5f6a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "CREATE VIRTUAL TABLE event_fts_new USING fts5("
+        "text, user_key, day UNINDEXED, tokenize = 'porter unicode61')"
+    )
+    op.execute(
+        "INSERT INTO event_fts_new(rowid, text, user_key, day) "
+        "SELECT f.event_id, f.text, 'u' || e.user_id, date(e.start_time) "
+        "FROM event_fts f JOIN events e ON e.id = f.event_id"
+    )
+    op.execute("DROP TABLE event_fts")
+    op.execute("ALTER TABLE event_fts_new RENAME TO event_fts")
+
+
+def downgrade():
+    op.execute(
+        "CREATE VIRTUAL TABLE event_fts_new USING fts5("
+        "event_id UNINDEXED, text, tokenize = 'porter unicode61')"
+    )
+    op.execute("INSERT INTO event_fts_new(event_id, text) SELECT rowid, text FROM event_fts")
+    op.execute("DROP TABLE event_fts")
+    op.execute("ALTER TABLE event_fts_new RENAME TO event_fts")
@@ -0,0 +1,57 @@
+"""add event_meta_fts trigram index
+
+A second FTS5 table over each entry's names, people and places (its
+subevents' folded in) under the `trigram` tokenizer, so where-filters are
+substring lookups instead of LIKE scans. Backfilled here, so no reindex is
+required; the indexer keeps it current from then on.
+
+Revision ID: c9d0e1f2a3b4
+Revises: b8c9d0e1f2a3
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from collections import defaultdict
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9d0e1f2a3b4'
+down_revision = 'b8c9d0e1f2a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "CREATE VIRTUAL TABLE event_meta_fts "
+        "USING fts5(name, people, place, user_key, tokenize = 'trigram')"
+    )
+    # Same row shape as search_index._meta_row.
+    bind = op.get_bind()
+    subevents = defaultdict(list)
+    for event_id, *fields in bind.execute(sa.text(
+        'SELECT event_id, name, with_who, "where" FROM subevents ORDER BY id'
+    )):
+        subevents[event_id].append(fields)
+    rows = []
+    for event_id, user_id, *fields in bind.execute(sa.text(
+        'SELECT id, user_id, name, with_who, "where" FROM events'
+    )):
+        parts = [fields, *subevents.get(event_id, ())]
+        name, people, place = (
+            "\n".join(part[i] for part in parts if part[i]) for i in range(3)
+        )
+        rows.append({'id': event_id, 'name': name, 'people': people, 'place': place,
+                     'user_key': f"<{user_id}>"})
+    if rows:
+        bind.execute(
+            sa.text("INSERT INTO event_meta_fts (rowid, name, people, place, user_key) "
+                    "VALUES (:id, :name, :people, :place, :user_key)"),
+            rows,
+        )
+
+
+def downgrade():
+    op.execute("DROP TABLE event_meta_fts")
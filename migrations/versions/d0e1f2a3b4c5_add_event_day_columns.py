@@ -0,0 +1,43 @@
+"""add event day columns
+
+`events.start_day` / `end_day`: the local dates of start_time and of
+coalesce(end_time, start_time), as SQLite generated columns, indexed per user
+(and separately for multi-day events) so the mood join and the day view look
+days up instead of evaluating date(start_time) row by row. SQLite cannot add a
+STORED column to an existing table, so they are VIRTUAL: building the indexes
+below is the backfill, and SQLite keeps both current on every write.
+
+Revision ID: d0e1f2a3b4c5
+Revises: c9d0e1f2a3b4
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd0e1f2a3b4c5'
+down_revision = 'c9d0e1f2a3b4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('events', sa.Column('start_day', sa.Date(), sa.Computed('date(start_time)')))
+    op.add_column('events', sa.Column(
+        'end_day', sa.Date(), sa.Computed('date(coalesce(end_time, start_time))')
+    ))
+    op.create_index('ix_events_user_day', 'events', ['user_id', 'start_day'], unique=False)
+    op.create_index(
+        'ix_events_user_multiday', 'events', ['user_id', 'start_day', 'end_day'],
+        unique=False, sqlite_where=sa.text('end_day > start_day'),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_events_user_multiday', table_name='events')
+    op.drop_index('ix_events_user_day', table_name='events')
+    # SQLite (3.35+) drops a generated column in place once nothing indexes it.
+    op.drop_column('events', 'end_day')
+    op.drop_column('events', 'start_day')
@@ -0,0 +1,63 @@
+"""add event_span R*Tree
+
+An `rtree_i32` over each event's (user, first day, last day), days as
+proleptic ordinals, so calendar windows look up overlapping events instead
+of walking every event that started before the window ends. Triggers on
+`events` keep it current; backfilled here from the day columns. An event saved
+with its end before its start is stored as the days between the two, since
+rtree_i32 requires first_day <= last_day.
+
+Revision ID: e1f2a3b4c5d6
+Revises: d0e1f2a3b4c5
+Create Date: 2026-10-18 23:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1f2a3b4c5d6'
+down_revision = 'd0e1f2a3b4c5'
+branch_labels = None
+depends_on = None
+
+# Same statements as models.EVENT_SPAN_DDL.
+SPAN_ROW = (
+    "NEW.id, NEW.user_id, NEW.user_id, "
+    "CAST(julianday(min(NEW.start_day, NEW.end_day)) - 1721424.5 AS INTEGER), "
+    "CAST(julianday(max(NEW.start_day, NEW.end_day)) - 1721424.5 AS INTEGER)"
+)
+
+
+def upgrade():
+    op.execute(
+        "CREATE VIRTUAL TABLE event_span "
+        "USING rtree_i32(id, user_min, user_max, first_day, last_day)"
+    )
+    op.execute(
+        "INSERT INTO event_span SELECT id, user_id, user_id, "
+        "CAST(julianday(min(start_day, end_day)) - 1721424.5 AS INTEGER), "
+        "CAST(julianday(max(start_day, end_day)) - 1721424.5 AS INTEGER) "
+        "FROM events WHERE user_id IS NOT NULL"
+    )
+    op.execute(
+        "CREATE TRIGGER event_span_insert AFTER INSERT ON events "
+        f"WHEN NEW.user_id IS NOT NULL BEGIN INSERT INTO event_span VALUES ({SPAN_ROW}); END"
+    )
+    op.execute(
+        "CREATE TRIGGER event_span_update "
+        "AFTER UPDATE OF user_id, start_time, end_time ON events BEGIN "
+        "DELETE FROM event_span WHERE id = OLD.id; "
+        f"INSERT INTO event_span SELECT {SPAN_ROW} WHERE NEW.user_id IS NOT NULL; END"
+    )
+    op.execute(
+        "CREATE TRIGGER event_span_delete AFTER DELETE ON events BEGIN "
+        "DELETE FROM event_span WHERE id = OLD.id; END"
+    )
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS event_span_delete")
+    op.execute("DROP TRIGGER IF EXISTS event_span_update")
+    op.execute("DROP TRIGGER IF EXISTS event_span_insert")
+    op.execute("DROP TABLE IF EXISTS event_span")
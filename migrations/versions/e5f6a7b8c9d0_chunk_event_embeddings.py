@@ -0,0 +1,67 @@
+"""chunk event embeddings
+
+event_embedding gets a `chunk` column in its primary key: chunk 0 is the
+event's own fields, every subevent is its own chunk (keyed by subevent id).
+Existing whole-document vectors are kept as chunk 0; for events without
+subevents they're already correct, and `flask reindex --changed-only` re-embeds
+the rest.
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5f6a7b8c9d0'
+down_revision = 'd4e5f6a7b8c9'
+branch_labels = None
+depends_on = None
+
+_COLUMNS = "event_id, embedding, model, encoding, scale, exact, source_hash, updated_at"
+
+
+def _create(name, chunked):
+    columns = [
+        sa.Column('event_id', sa.Integer(), nullable=False),
+        sa.Column('embedding', sa.LargeBinary(), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('encoding', sa.String(), server_default='float32', nullable=False),
+        sa.Column('scale', sa.Float(), nullable=True),
+        sa.Column('exact', sa.LargeBinary(), nullable=True),
+        sa.Column('source_hash', sa.String(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+    ]
+    if chunked:
+        columns.insert(1, sa.Column('chunk', sa.Integer(), server_default='0', nullable=False))
+        columns.append(sa.PrimaryKeyConstraint('event_id', 'chunk'))
+    else:
+        columns.append(sa.PrimaryKeyConstraint('event_id'))
+    op.create_table(name, *columns)
+
+
+def upgrade():
+    # SQLite can't alter a primary key in place: copy into a new table.
+    _create('event_embedding_new', chunked=True)
+    op.execute(
+        f"INSERT INTO event_embedding_new (chunk, {_COLUMNS}) "
+        f"SELECT 0, {_COLUMNS} FROM event_embedding"
+    )
+    op.drop_table('event_embedding')
+    op.rename_table('event_embedding_new', 'event_embedding')
+
+
+def downgrade():
+    _create('event_embedding_old', chunked=False)
+    # Only the core chunk fits the old shape; its hash won't match the folded
+    # document, so `reindex --changed-only` re-embeds events with subevents.
+    op.execute(
+        f"INSERT INTO event_embedding_old ({_COLUMNS}) "
+        f"SELECT {_COLUMNS} FROM event_embedding WHERE chunk = 0"
+    )
+    op.drop_table('event_embedding')
+    op.rename_table('event_embedding_old', 'event_embedding')
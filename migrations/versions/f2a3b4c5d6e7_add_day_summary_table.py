@@ -0,0 +1,70 @@
+"""add day_summary table
+
+One row per user and day with anything on it: how many events cover the day,
+its mood, marker and attachment count. The month and year grids read it
+instead of expanding events; the write paths keep it current. Backfilled here
+(same rows as day_summary.rebuild), so no rebuild is required.
+
+Revision ID: f2a3b4c5d6e7
+Revises: e1f2a3b4c5d6
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from collections import Counter
+from datetime import date, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a3b4c5d6e7'
+down_revision = 'e1f2a3b4c5d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    day_summary = op.create_table(
+        'day_summary',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('event_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('has_event', sa.Boolean(), sa.Computed('event_count > 0'), nullable=True),
+        sa.Column('mood_key', sa.String(), nullable=True),
+        sa.Column('has_marker', sa.Boolean(), server_default='0', nullable=False),
+        sa.Column('attachment_count', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id', 'date'),
+    )
+
+    bind = op.get_bind()
+    counts = Counter()
+    for user_id, first, last in bind.execute(sa.text(
+        'SELECT user_id, start_day, end_day FROM events WHERE user_id IS NOT NULL'
+    )):
+        day, last = date.fromisoformat(first), date.fromisoformat(last)
+        while day <= last:
+            counts[user_id, day] += 1
+            day += timedelta(days=1)
+    rows = {key: (count, None, False, 0) for key, count in counts.items()}
+    for user_id, day, mood_key, has_marker, attachments in bind.execute(sa.text(
+        'SELECT l.user_id, l.date, l.mood_key, l.has_marker, count(a.id) '
+        'FROM daily_logs l LEFT JOIN attachments a ON a.daily_log_id = l.id GROUP BY l.id'
+    )):
+        day = date.fromisoformat(day)
+        row = (counts.get((user_id, day), 0), mood_key, bool(has_marker), attachments)
+        if row != (0, None, False, 0):
+            rows[user_id, day] = row
+    if rows:
+        op.bulk_insert(day_summary, [
+            {
+                'user_id': user_id, 'date': day, 'event_count': count, 'mood_key': mood_key,
+                'has_marker': has_marker, 'attachment_count': attachments,
+            }
+            for (user_id, day), (count, mood_key, has_marker, attachments) in rows.items()
+        ])
+
+
+def downgrade():
+    op.drop_table('day_summary')
@@ -0,0 +1,85 @@
+"""add embedding_vector table
+
+Vectors move out of event_embedding into a content-addressed embedding_vector
+table keyed by source_hash; event_embedding rows now just point at one.
+Duplicate texts already stored collapse to a single vector.
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-18 18:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6a7b8c9d0e1'
+down_revision = 'e5f6a7b8c9d0'
+branch_labels = None
+depends_on = None
+
+_VECTOR_COLUMNS = "embedding, model, encoding, scale, exact"
+
+
+def _vector_columns():
+    return [
+        sa.Column('embedding', sa.LargeBinary(), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('encoding', sa.String(), server_default='float32', nullable=False),
+        sa.Column('scale', sa.Float(), nullable=True),
+        sa.Column('exact', sa.LargeBinary(), nullable=True),
+    ]
+
+
+def upgrade():
+    op.create_table('embedding_vector',
+    sa.Column('source_hash', sa.String(), nullable=False),
+    *_vector_columns(),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('source_hash')
+    )
+    op.execute(
+        f"INSERT INTO embedding_vector (source_hash, {_VECTOR_COLUMNS}) "
+        f"SELECT source_hash, {_VECTOR_COLUMNS} FROM event_embedding "
+        "WHERE rowid IN (SELECT MIN(rowid) FROM event_embedding GROUP BY source_hash)"
+    )
+
+    op.create_table('event_embedding_new',
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('chunk', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('source_hash', sa.String(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['source_hash'], ['embedding_vector.source_hash'], ),
+    sa.PrimaryKeyConstraint('event_id', 'chunk')
+    )
+    op.execute(
+        "INSERT INTO event_embedding_new (event_id, chunk, source_hash, updated_at) "
+        "SELECT event_id, chunk, source_hash, updated_at FROM event_embedding"
+    )
+    op.drop_table('event_embedding')
+    op.rename_table('event_embedding_new', 'event_embedding')
+    op.create_index('ix_event_embedding_source_hash', 'event_embedding', ['source_hash'])
+
+
+def downgrade():
+    op.create_table('event_embedding_old',
+    sa.Column('event_id', sa.Integer(), nullable=False),
+    sa.Column('chunk', sa.Integer(), server_default='0', nullable=False),
+    *_vector_columns(),
+    sa.Column('source_hash', sa.String(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['event_id'], ['events.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('event_id', 'chunk')
+    )
+    op.execute(
+        f"INSERT INTO event_embedding_old (event_id, chunk, source_hash, updated_at, "
+        f"{_VECTOR_COLUMNS}) SELECT e.event_id, e.chunk, e.source_hash, e.updated_at, "
+        + ", ".join(f"v.{c.strip()}" for c in _VECTOR_COLUMNS.split(","))
+        + " FROM event_embedding e JOIN embedding_vector v ON v.source_hash = e.source_hash"
+    )
+    op.drop_index('ix_event_embedding_source_hash', table_name='event_embedding')
+    op.drop_table('event_embedding')
+    op.rename_table('event_embedding_old', 'event_embedding')
+    op.drop_table('embedding_vector')
@@ -48,6 +48,26 @@ class DailyLog(db.Model):
     )
 
 
+class DaySummary(db.Model):
+    """What the calendar grids show for one of a user's days.
+
+    Derived from `events` (every day an event covers counts it) and
+    `daily_logs`/`attachments`, and kept up to date by their write paths
+    (day_summary.py) in the same transaction, so a month or year grid reads
+    31 or 366 rows by primary key. Days with nothing on them have no row.
+    """
+
+    __tablename__ = "day_summary"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    event_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    has_event = db.Column(db.Boolean, db.Computed("event_count > 0"))
+    mood_key = db.Column(db.String)
+    has_marker = db.Column(db.Boolean, nullable=False, default=False, server_default="0")
+    attachment_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+
 class Attachment(db.Model):
     __tablename__ = "attachments"
 
@@ -76,11 +96,27 @@ class Event(db.Model):
 
     start_time = db.Column(db.DateTime, nullable=False)
     end_time = db.Column(db.DateTime)
+    # Local calendar days the event starts and ends on (an open-ended event
+    # ends the day it starts). Generated by SQLite from the times, so every
+    # write keeps them in step; per-day lookups and the mood join use these.
+    start_day = db.Column(db.Date, db.Computed("date(start_time)"))
+    end_day = db.Column(db.Date, db.Computed("date(coalesce(end_time, start_time))"))
 
     created_at = db.Column(db.DateTime, server_default=func.now())
     last_modified = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
 
-    __table_args__ = (db.Index("ix_events_user_start", "user_id", "start_time"),)
+    __table_args__ = (
+        db.Index("ix_events_user_start", "user_id", "start_time"),
+        db.Index("ix_events_user_day", "user_id", "start_day"),
+        # Multi-day events only: few enough to check each against the days asked for.
+        db.Index(
+            "ix_events_user_multiday",
+            "user_id",
+            "start_day",
+            "end_day",
+            sqlite_where=db.text("end_day > start_day"),
+        ),
+    )
 
     user = db.relationship("User", back_populates="events")
     subevents = db.relationship(
@@ -88,13 +124,74 @@ class Event(db.Model):
     )
 
 
+# An R*Tree over each event's (user, days it covers), so a calendar window finds
+# the events overlapping it without walking everything that started earlier.
+# Days are proleptic ordinals (`date.toordinal()`); the triggers keep it in step
+# with every write to `events`, whoever makes it. Created with `events` (below)
+# and by migration; queried through `utils.events_overlapping`.
+event_span = db.table(
+    "event_span",
+    db.column("id"),
+    db.column("user_min"),
+    db.column("user_max"),
+    db.column("first_day"),
+    db.column("last_day"),
+)
+
+# rtree_i32 requires first_day <= last_day; an event saved with its end before
+# its start (which the routes accept) is stored as the days between the two.
+_SPAN_ROW = (
+    "NEW.id, NEW.user_id, NEW.user_id, "
+    "CAST(julianday(min(NEW.start_day, NEW.end_day)) - 1721424.5 AS INTEGER), "
+    "CAST(julianday(max(NEW.start_day, NEW.end_day)) - 1721424.5 AS INTEGER)"
+)
+
+EVENT_SPAN_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS event_span "
+    "USING rtree_i32(id, user_min, user_max, first_day, last_day)",
+    "CREATE TRIGGER IF NOT EXISTS event_span_insert AFTER INSERT ON events "
+    f"WHEN NEW.user_id IS NOT NULL BEGIN INSERT INTO event_span VALUES ({_SPAN_ROW}); END",
+    "CREATE TRIGGER IF NOT EXISTS event_span_update "
+    "AFTER UPDATE OF user_id, start_time, end_time ON events BEGIN "
+    "DELETE FROM event_span WHERE id = OLD.id; "
+    f"INSERT INTO event_span SELECT {_SPAN_ROW} WHERE NEW.user_id IS NOT NULL; END",
+    "CREATE TRIGGER IF NOT EXISTS event_span_delete AFTER DELETE ON events BEGIN "
+    "DELETE FROM event_span WHERE id = OLD.id; END",
+)
+
+for _statement in EVENT_SPAN_DDL:
+    db.event.listen(Event.__table__, "after_create", db.DDL(_statement))
+
+
+class EmbeddingVector(db.Model):
+    """One embedding per distinct chunk text, shared by every chunk with that text.
+
+    Content-addressed by `source_hash` (model + text), so recurring entries
+    ("Gym") and imported duplicates are embedded once and reused.
+    """
+
+    __tablename__ = "embedding_vector"
+
+    source_hash = db.Column(db.String, primary_key=True)
+    embedding = db.Column(db.LargeBinary, nullable=False)  # L2-normalized, see `encoding`
+    model = db.Column(db.String, nullable=False)  # producing model id
+    # float32 | float16 | int8 (vector_codec); int8 rows carry a per-vector scale.
+    encoding = db.Column(db.String, nullable=False, default="float32", server_default="float32")
+    scale = db.Column(db.Float)
+    exact = db.Column(db.LargeBinary)  # float32 copy of a compact row, kept for rescoring
+    created_at = db.Column(db.DateTime, server_default=func.now())
+
+
 class EventEmbedding(db.Model):
-    """Vector + staleness markers for an event's searchable document.
+    """Which shared vector one chunk of an event's searchable text points at.
+
+    Chunk 0 is the event's own fields; every subevent is its own chunk, keyed
+    by the subevent id, so editing one subevent re-embeds only that chunk.
 
-    Holds only the embedding; all filterable metadata (date, mood, who, where)
-    is read live from `events`/`daily_logs` at query time so filters never go
-    stale. The companion lexical index is the `event_fts` FTS5 virtual table,
-    created in the migration (and idempotently in search_index for tests).
+    Holds no metadata; all filterable fields (date, mood, who, where) are read
+    live from `events`/`daily_logs` at query time so filters never go stale.
+    The companion lexical index is the `event_fts` FTS5 virtual table, created
+    in the migration (and idempotently in search_index for tests).
     """
 
     __tablename__ = "event_embedding"
@@ -104,11 +201,114 @@ class EventEmbedding(db.Model):
         db.ForeignKey("events.id", ondelete="CASCADE"),
         primary_key=True,
     )
-    embedding = db.Column(db.LargeBinary, nullable=False)  # float32, L2-normalized
-    model = db.Column(db.String, nullable=False)  # producing model id
-    source_hash = db.Column(db.String, nullable=False)  # skip re-embedding unchanged text
+    chunk = db.Column(db.Integer, primary_key=True, default=0, server_default="0")
+    # Also the staleness marker: a chunk whose text hashes differently is re-pointed.
+    source_hash = db.Column(
+        db.String, db.ForeignKey("embedding_vector.source_hash"), nullable=False, index=True
+    )
     updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
 
+    vector = db.relationship("EmbeddingVector")
+
+
+class SearchGeneration(db.Model):
+    """Per-user write counter for the search index.
+
+    Bumped in the same transaction as every index write, so each worker's
+    in-memory vector matrix (see search_index) can tell when another process
+    has changed that user's embeddings and rebuild it.
+    """
+
+    __tablename__ = "search_generation"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+
+
+class VocabularyTerm(db.Model):
+    """A place a user has logged, with how many events carry it.
+
+    Read by query routing so where matching never scans `events` (people come
+    from `person`); kept up to date by the event write paths (vocabulary.py),
+    in the same transaction.
+    """
+
+    __tablename__ = "vocabulary_term"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    kind = db.Column(db.String, primary_key=True)  # "where" (people moved to `person`)
+    term = db.Column(db.String, primary_key=True)
+    uses = db.Column(db.Integer, nullable=False, default=0)  # events mentioning it
+
+
+class Person(db.Model):
+    """Someone a user has logged in a `with_who`, once per user whatever the casing.
+
+    `with_who` stays the comma-separated text the user typed; this table and
+    `event_person` are its parsed, indexed form, kept in step by the event
+    write paths (vocabulary.py). Who-filters join through them, and query
+    routing reads its people vocabulary from them.
+    """
+
+    __tablename__ = "person"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    name = db.Column(db.String, nullable=False)  # the spelling first logged
+    key = db.Column(db.String, nullable=False)  # casefolded name, what filters match on
+
+    __table_args__ = (db.UniqueConstraint("user_id", "key", name="unique_user_person"),)
+
+
+class EventPerson(db.Model):
+    """A person named on an event or on one of its subevents."""
+
+    __tablename__ = "event_person"
+
+    # Person first: who-filters look events up by person.
+    person_id = db.Column(db.Integer, db.ForeignKey("person.id"), primary_key=True)
+    event_id = db.Column(
+        db.Integer, db.ForeignKey("events.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    __table_args__ = (db.Index("ix_event_person_event", "event_id"),)
+
+
+class VocabularyGeneration(db.Model):
+    """Per-user write counter for `vocabulary_term` and the user's people links.
+
+    Bumped with every vocabulary change so each worker's cached copy can tell
+    another process has changed it. No row yet means the user's terms have never
+    been built, and are read straight from `events`.
+    """
+
+    __tablename__ = "vocabulary_generation"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+
+
+class IndexOutbox(db.Model):
+    """Diary entries waiting to be (re)indexed or removed from the search index.
+
+    Written in the same transaction as the event/subevent change, so no write is
+    ever lost; the background indexer (index_queue.py) drains it. One row per
+    event: repeated edits bump `version` instead of queueing duplicates.
+    `attempts` and `last_error` record failed indexing passes; a row that keeps
+    failing is parked (left in place, skipped) until the entry is edited again.
+    """
+
+    __tablename__ = "index_outbox"
+
+    event_id = db.Column(db.Integer, primary_key=True)  # no FK: deletions are queued too
+    user_id = db.Column(db.Integer, nullable=True)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    enqueued_at = db.Column(db.DateTime, server_default=func.now())
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    last_error = db.Column(db.String, nullable=True)
+
+    __table_args__ = (db.Index("ix_index_outbox_user", "user_id"),)
+
 
 class SubEvent(db.Model):
     __tablename__ = "subevents"
@@ -0,0 +1,100 @@
+"""Two-tier cache for query embeddings, so repeated searches skip the model.
+
+Search-as-you-type, refreshes, pagination and filter toggles re-run the same
+query text constantly. Tier one is a bounded in-process LRU; tier two is an
+optional SQLite file beside the app DB, shared by every worker and surviving
+restarts. Keys are (model, normalized text); bge's tokenizer is uncased, so
+case-folding and whitespace-collapsing never changes the embedding.
+"""
+
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+_DISK_MAX_ROWS = 50_000  # oldest rows trimmed beyond this
+_TRIM_EVERY = 1_000  # inserts between trims
+
+
+def normalize_query(text):
+    return " ".join(text.casefold().split())
+
+
+class QueryEmbeddingCache:
+    def __init__(self, capacity=1024, path=None):
+        self.capacity = capacity
+        self.path = path
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._inserts = 0
+        self.stats = {"memory_hits": 0, "memory_misses": 0, "disk_hits": 0, "disk_misses": 0}
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_embedding ("
+                "model TEXT NOT NULL, query TEXT NOT NULL, embedding BLOB NOT NULL, "
+                "PRIMARY KEY (model, query))"
+            )
+            self._local.conn = conn
+        return conn
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def get(self, model, text):
+        key = (model, normalize_query(text))
+        with self._lock:
+            vector = self._lru.get(key)
+            if vector is not None:
+                self._lru.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return vector
+            self.stats["memory_misses"] += 1
+        if self.path is None:
+            return None
+        row = self._conn().execute(
+            "SELECT embedding FROM query_embedding WHERE model = ? AND query = ?", key
+        ).fetchone()
+        if row is None:
+            self._count("disk_misses")
+            return None
+        self._count("disk_hits")
+        vector = np.frombuffer(row[0], dtype=np.float32)
+        self._remember(key, vector)
+        return vector
+
+    def put(self, model, text, vector):
+        key = (model, normalize_query(text))
+        self._remember(key, vector)
+        if self.path is None:
+            return
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO query_embedding (model, query, embedding) "
+                "VALUES (?, ?, ?)",
+                (*key, np.asarray(vector, dtype=np.float32).tobytes()),
+            )
+            with self._lock:
+                self._inserts += 1
+                trim = self._inserts % _TRIM_EVERY == 0
+            if trim:
+                conn.execute(
+                    "DELETE FROM query_embedding WHERE rowid <= "
+                    "(SELECT MAX(rowid) FROM query_embedding) - ?",
+                    (_DISK_MAX_ROWS,),
+                )
+
+    def _remember(self, key, vector):
+        with self._lock:
+            self._lru[key] = vector
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.capacity:
+                self._lru.popitem(last=False)
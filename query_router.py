@@ -4,28 +4,34 @@ Classifies a typed query and pulls structured metadata out of it before retrieva
 runs, so "dinner with Mom on 16 Jun" becomes date + who *filters* plus the content
 query "dinner". Pure and dependency-free: no DB, no model, `today` injected for
 deterministic tests. The caller passes the user's known `people`/`places` (a closed
-set) so who/where matching needs no NER. It only pre-fills the params `search()`
-already accepts — retrieval internals are untouched.
+set) so who/where matching needs no NER — or, better, a `VocabularyMatcher` compiled
+from them once, whose token tries match in one pass whatever the vocabulary size.
+It only pre-fills the params `search()` already accepts — retrieval internals are
+untouched.
 """
 
 import calendar
+import os
 import re
-from dataclasses import dataclass, field
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
 from datetime import date, datetime, timedelta
 
 from moods import MOOD_BY_KEY
 
+# Routed queries each VocabularyMatcher remembers, keyed by (query, today); the
+# matcher is rebuilt whenever the vocabulary changes, so its memo never goes stale.
+ROUTE_MEMO_SIZE = int(os.environ.get("SEARCH_ROUTE_MEMO", "512"))
+
 _MONTHS = {
     "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
     "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+    "january": 1, "february": 2, "march": 3, "april": 4, "june": 6, "july": 7,
+    "august": 8, "sept": 9, "september": 9, "october": 10, "november": 11, "december": 12,
 }
 _MONTH_ABBR = ["", "Jan", "Feb", "Mar", "Apr", "May", "Jun",
                "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-_MONTH_ALT = (
-    r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|jun(?:e)?|jul(?:y)?"
-    r"|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
-)
-_DAY = r"(\d{1,2})(?:st|nd|rd|th)?"
 _NUMWORDS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
              "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10}
 
@@ -69,10 +75,6 @@ def _month_bounds(year, month):
     return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
 
 
-def _month_num(name):
-    return _MONTHS[name[:3].lower()]
-
-
 def _day_label(d):
     return f"{d.day} {_MONTH_ABBR[d.month]} {d.year}"
 
@@ -109,263 +111,430 @@ def _strip(text, match):
     return text[: match.start()] + " " + text[match.end():]
 
 
-def _result(first, last, label, text):
-    start, end = _span(first, last)
-    return start, end, label, text
+def _relative_unit(which, unit, today):
+    if unit == "week":
+        monday = today - timedelta(days=today.weekday())
+        if which == "last":
+            monday -= timedelta(days=7)
+        return monday, monday + timedelta(days=6)
+    if unit == "month":
+        if which == "this":
+            first = today.replace(day=1)
+        else:
+            first = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
+        return _month_bounds(first.year, first.month)
+    year = today.year if which == "this" else today.year - 1
+    return date(year, 1, 1), date(year, 12, 31)
+
+
+# --- tokens (shared by the date grammar and who / where) -------------------
 
+# An ISO date stays one token, so "2024-06-16 - 2024-06-20" reads as a range and
+# its year is never taken for a preceding month's ("June 2024-06-20" is 20 Jun).
+_WORD = re.compile(r"\d{4}-\d{2}-\d{2}\b|\w+|[^\w\s]")
 
-# --- date expression scanner ---------------------------------------------
 
+def _words(text):
+    """Case-folded tokens with their spans: [(token, start, end)]."""
+    return [(m[0].casefold(), m.start(), m.end()) for m in _WORD.finditer(text)]
 
-def _scan_date(text, today, *, allow_bare_month):
-    """Find the leftmost single date expression → (start, end, first, last, label).
 
-    A day expression has first == last; a month expression spans the whole month.
-    `allow_bare_month` enables uncued bare months ("May") — only safe inside a date
-    context (ranges / before-after / cues), never standalone (collides with names).
-    """
-    cands = []
-
-    m = re.search(r"\b(\d{4})-(\d{2})-(\d{2})\b", text)
-    if m:
-        d = _make_date(int(m[1]), int(m[2]), int(m[3]))
-        if d:
-            cands.append((m.start(), m.end(), d, d, _day_label(d)))
-
-    m = re.search(rf"\b{_DAY}\s+{_MONTH_ALT}(?:,?\s+(\d{{4}}))?\b", text, re.I)
-    if m:
-        d = _resolve_day_month(m[1], m[2], m[3], today)
-        if d:
-            cands.append((m.start(), m.end(), d, d, _day_label(d)))
-
-    m = re.search(rf"\b{_MONTH_ALT}\s+{_DAY}(?:,?\s+(\d{{4}}))?\b", text, re.I)
-    if m:
-        d = _resolve_day_month(m[2], m[1], m[3], today)
-        if d:
-            cands.append((m.start(), m.end(), d, d, _day_label(d)))
-
-    m = re.search(rf"\b{_MONTH_ALT}\s+(\d{{4}})\b", text, re.I)
-    if m:
-        mo, yr = _month_num(m[1]), int(m[2])
-        first, last = _month_bounds(yr, mo)
-        cands.append((m.start(), m.end(), first, last, _month_label(yr, mo)))
-
-    if allow_bare_month:
-        m = re.search(rf"\b{_MONTH_ALT}\b", text, re.I)
-        if m:
-            mo = _month_num(m[1])
-            yr = _infer_month_year(mo, today)
-            first, last = _month_bounds(yr, mo)
-            cands.append((m.start(), m.end(), first, last, _month_label(yr, mo)))
+# --- date grammar (one pass over the tokens) -----------------------------
+
+_RANGE_OPENERS = {"between", "from"}
+_RANGE_JOINS = {"and", "to", "through", "until", "-", "–"}
+_OPEN_ENDED = {"before", "until", "after", "since", "from"}
+_MONTH_CUES = {"in", "during", "for"}
+_UNITS = {"day": "day", "days": "day", "week": "week", "weeks": "week",
+          "month": "month", "months": "month", "year": "year", "years": "year"}
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_DAY = re.compile(r"(\d{1,2})(?:st|nd|rd|th)?")
+
+
+@dataclass(frozen=True)
+class _Atom:
+    """One date expression: tokens [.., end), a day (first == last) or a month."""
+
+    end: int
+    first: date
+    last: date
+    label: str
+    bare: bool = False  # a lone month name: a date only in a date context
 
-    return min(cands, key=lambda c: c[0]) if cands else None
 
+def _token(words, i):
+    return words[i][0] if i < len(words) else ""
 
-def _resolve_day_month(day, month_name, year, today):
-    mo = _month_num(month_name)
+
+def _day_of(token):
+    m = _DAY.fullmatch(token)
+    return int(m[1]) if m else None
+
+
+def _is_year(token):
+    return len(token) == 4 and token.isdigit()
+
+
+def _year_after(words, i):
+    """An optional ", 2024" / "2024" at words[i] → (year or None, index past it)."""
+    if _token(words, i) == "," and _is_year(_token(words, i + 1)):
+        return int(words[i + 1][0]), i + 2
+    if _is_year(_token(words, i)):
+        return int(words[i][0]), i + 1
+    return None, i
+
+
+def _resolve_day_month(day, month, year, today):
     if year:
-        return _make_date(int(year), mo, int(day))
-    return _infer_day_year(mo, int(day), today)
+        return _make_date(year, month, day)
+    return _infer_day_year(month, day, today)
 
 
-# --- date lanes (tried in order; first match wins) ------------------------
+def _day_atom(end, d):
+    return _Atom(end, d, d, _day_label(d)) if d else None
 
 
-def _extract_range(text, today):
-    """A–B ranges: 'between A and B', 'from A to B', 'A to B', 'A - B'."""
-    tok1 = _scan_date(text, today, allow_bare_month=True)
-    if not tok1:
+def _month_atom(end, year, month, bare=False):
+    first, last = _month_bounds(year, month)
+    return _Atom(end, first, last, _month_label(year, month), bare)
+
+
+def _atom(words, i, today):
+    """The date expression starting at words[i], or None.
+
+    ISO days, "16 Jun [2024]", "Jun 16th[, 2024]", "May 2026", and a bare month
+    ("May") flagged `bare` — only safe inside a date context (ranges /
+    before-after / cues), never standalone (collides with names).
+    """
+    token = _token(words, i)
+    if _ISO_DATE.fullmatch(token):
+        return _day_atom(i + 1, _make_date(int(token[:4]), int(token[5:7]), int(token[8:])))
+    day = _day_of(token)
+    if day is not None and (month := _MONTHS.get(_token(words, i + 1))):
+        year, end = _year_after(words, i + 2)
+        return _day_atom(end, _resolve_day_month(day, month, year, today))
+    month = _MONTHS.get(token)
+    if month is None:
         return None
-    s1, e1, f1, _l1, lab1 = tok1
-    rest = text[e1:]
-    conn = re.match(r"\s*(?:and|to|through|until|[-–])\s+", rest, re.I)
-    if not conn:
+    day = _day_of(_token(words, i + 1))
+    if day is not None:
+        year, end = _year_after(words, i + 2)
+        return _day_atom(end, _resolve_day_month(day, month, year, today))
+    if _is_year(_token(words, i + 1)):
+        return _month_atom(i + 2, int(words[i + 1][0]), month)
+    return _month_atom(i + 1, _infer_month_year(month, today), month, bare=True)
+
+
+# Each form parses the date expression starting at words[i] →
+# (date_from, date_to, label, first token, end token), or None.
+
+
+def _range_form(words, i, today):
+    """A–B ranges: 'between A and B', 'from A to B', 'A to B', 'A - B'."""
+    first = _atom(words, i, today)
+    if first is None or _token(words, first.end) not in _RANGE_JOINS:
         return None
-    tok2 = _scan_date(rest[conn.end():], today, allow_bare_month=True)
-    if not tok2 or rest[conn.end():][: tok2[0]].strip():
+    second = _atom(words, first.end + 1, today)
+    if second is None:
         return None
-    _s2, e2, _f2, l2, lab2 = tok2
-
-    strip_start = s1
-    pre = re.search(r"\b(?:between|from)\s+$", text[:s1], re.I)
-    if pre:
-        strip_start = pre.start()
-    strip_end = e1 + conn.end() + e2
-    newtext = text[:strip_start] + " " + text[strip_end:]
-    start, end = _span(f1, l2)
-    return start, end, f"{lab1} – {lab2}", newtext
+    start = i - 1 if i and words[i - 1][0] in _RANGE_OPENERS else i
+    return (*_span(first.first, second.last), f"{first.label} – {second.label}",
+            start, second.end)
 
 
-def _extract_open_ended(text, today):
+def _open_ended_form(words, i, today):
     """Open-ended: before / until / after / since / from <date>."""
-    m = re.search(r"\b(before|until|after|since|from)\s+", text, re.I)
-    if not m:
-        return None
-    kw = m[1].lower()
-    rest = text[m.end():]
-    tok = _scan_date(rest, today, allow_bare_month=True)
-    if not tok or rest[: tok[0]].strip():
+    keyword = words[i][0]
+    if keyword not in _OPEN_ENDED or (bound := _atom(words, i + 1, today)) is None:
         return None
-    _s, e, first, last, label = tok
-    newtext = text[: m.start()] + " " + text[m.end() + e:]
-    if kw == "before":
-        return None, _at(first), f"before {label}", newtext
-    if kw == "until":
-        return None, _at(last) + timedelta(days=1), f"until {label}", newtext
-    if kw == "after":
-        return _at(last) + timedelta(days=1), None, f"after {label}", newtext
+    if keyword == "before":
+        return None, _at(bound.first), f"before {bound.label}", i, bound.end
+    if keyword == "until":
+        return None, _at(bound.last) + timedelta(days=1), f"until {bound.label}", i, bound.end
+    if keyword == "after":
+        return _at(bound.last) + timedelta(days=1), None, f"after {bound.label}", i, bound.end
     # since / from
-    return _at(first), None, f"since {label}", newtext
+    return _at(bound.first), None, f"since {bound.label}", i, bound.end
 
 
-def _extract_relative_ago(text, today):
-    m = re.search(
-        r"\b(\d+|a|an|one|two|three|four|five|six|seven|eight|nine|ten)\s+"
-        r"(day|week|month|year)s?\s+ago\b",
-        text, re.I,
-    )
-    if not m:
+def _ago_form(words, i, today):
+    """'3 days ago', 'a week ago', 'two months ago', 'one year ago'."""
+    count = words[i][0]
+    unit = _UNITS.get(_token(words, i + 1))
+    if unit is None or _token(words, i + 2) != "ago":
+        return None
+    if count.isdigit():
+        n = int(count)
+    elif count in _NUMWORDS:
+        n = _NUMWORDS[count]
+    else:
         return None
-    w = m[1].lower()
-    n = int(w) if w.isdigit() else _NUMWORDS[w]
-    unit = m[2].lower()
     plural = "s" if n > 1 else ""
     if unit == "day":
         d = today - timedelta(days=n)
-        return _result(d, d, f"{n} day{plural} ago", _strip(text, m))
-    if unit == "week":
+        first, last, label = d, d, f"{n} day{plural} ago"
+    elif unit == "week":
         monday = today - timedelta(days=today.weekday()) - timedelta(weeks=n)
-        return _result(monday, monday + timedelta(days=6), f"{n} week{plural} ago", _strip(text, m))
-    if unit == "month":
-        y, mo = today.year, today.month - n
-        while mo <= 0:
-            mo += 12
-            y -= 1
-        first, last = _month_bounds(y, mo)
-        return _result(first, last, _month_label(y, mo), _strip(text, m))
-    y = today.year - n
-    return _result(date(y, 1, 1), date(y, 12, 31), str(y), _strip(text, m))
-
-
-def _extract_weekend(text, today):
-    m = re.search(r"\b(this|last|next)?\s*weekend\b", text, re.I)
-    if not m:
+        first, last, label = monday, monday + timedelta(days=6), f"{n} week{plural} ago"
+    elif unit == "month":
+        y, mo = divmod(today.year * 12 + today.month - 1 - n, 12)
+        first, last = _month_bounds(y, mo + 1)
+        label = _month_label(y, mo + 1)
+    else:
+        y = today.year - n
+        first, last, label = date(y, 1, 1), date(y, 12, 31), str(y)
+    return *_span(first, last), label, i, i + 3
+
+
+def _weekend_form(words, i, today):
+    """'weekend', 'this / last / next weekend'."""
+    if words[i][0] != "weekend":
         return None
-    which = (m[1] or "this").lower()
+    which = _token(words, i - 1) if i else ""
+    start = i - 1 if which in ("this", "last", "next") else i
+    which = which if start < i else "this"
     monday = today - timedelta(days=today.weekday())
     if which == "last":
         monday -= timedelta(days=7)
     elif which == "next":
         monday += timedelta(days=7)
     sat = monday + timedelta(days=5)
-    return _result(sat, sat + timedelta(days=1), f"{which} weekend", _strip(text, m))
-
-
-def _extract_single(text, today):
-    # cued month: "in/during/for May [2026]"
-    m = re.search(rf"\b(?:in|during|for)\s+{_MONTH_ALT}(?:\s+(\d{{4}}))?\b", text, re.I)
-    if m:
-        mo = _month_num(m[1])
-        yr = int(m[2]) if m[2] else _infer_month_year(mo, today)
-        first, last = _month_bounds(yr, mo)
-        return _result(first, last, _month_label(yr, mo), _strip(text, m))
-    tok = _scan_date(text, today, allow_bare_month=False)
-    if tok:
-        s, e, first, last, label = tok
-        return _result(first, last, label, text[:s] + " " + text[e:])
-    return None
-
-
-def _extract_relative(text, today):
-    m = re.search(r"\b(?:last|past)\s+(\d{1,3})\s+(day|week)s?\b", text, re.I)
-    if m:
-        n = int(m[1]) * (7 if m[2].lower() == "week" else 1)
-        first = today - timedelta(days=n - 1)
-        unit = "weeks" if m[2].lower() == "week" else "days"
-        return _result(first, today, f"last {m[1]} {unit}", _strip(text, m))
-
-    m = re.search(r"\b(today)\b", text, re.I)
-    if m:
-        return _result(today, today, "today", _strip(text, m))
-
-    m = re.search(r"\b(yesterday)\b", text, re.I)
-    if m:
-        y = today - timedelta(days=1)
-        return _result(y, y, "yesterday", _strip(text, m))
-
-    m = re.search(r"\b(this|last)\s+(week|month|year)\b", text, re.I)
-    if m:
-        which, unit = m[1].lower(), m[2].lower()
-        first, last = _relative_unit(which, unit, today)
-        return _result(first, last, f"{which} {unit}", _strip(text, m))
-
-    return None
+    return *_span(sat, sat + timedelta(days=1)), f"{which} weekend", start, i + 1
 
 
-def _relative_unit(which, unit, today):
-    if unit == "week":
-        monday = today - timedelta(days=today.weekday())
-        if which == "last":
-            monday -= timedelta(days=7)
-        return monday, monday + timedelta(days=6)
-    if unit == "month":
-        if which == "this":
-            first = today.replace(day=1)
-        else:
-            first = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
-        return _month_bounds(first.year, first.month)
-    year = today.year if which == "this" else today.year - 1
-    return date(year, 1, 1), date(year, 12, 31)
+def _cued_month_form(words, i, today):
+    """'in / during / for May [2026]'."""
+    month = _MONTHS.get(_token(words, i + 1))
+    if words[i][0] not in _MONTH_CUES or month is None:
+        return None
+    if _is_year(_token(words, i + 2)):
+        atom = _month_atom(i + 3, int(words[i + 2][0]), month)
+    else:
+        atom = _month_atom(i + 2, _infer_month_year(month, today), month)
+    return *_span(atom.first, atom.last), atom.label, i, atom.end
+
+
+def _single_form(words, i, today):
+    """A lone day or month-with-year; a bare month is not enough on its own."""
+    atom = _atom(words, i, today)
+    if atom is None or atom.bare:
+        return None
+    return *_span(atom.first, atom.last), atom.label, i, atom.end
+
+
+def _trailing_form(words, i, today):
+    """'last / past N days / weeks' — a window ending today."""
+    n, unit = _token(words, i + 1), _UNITS.get(_token(words, i + 2))
+    if words[i][0] not in ("last", "past") or not (n.isdigit() and len(n) <= 3):
+        return None
+    if unit not in ("day", "week"):
+        return None
+    days = int(n) * (7 if unit == "week" else 1)
+    label = f"last {n} {unit}s"
+    return *_span(today - timedelta(days=days - 1), today), label, i, i + 3
+
+
+def _today_form(words, i, today):
+    if words[i][0] != "today":
+        return None
+    return *_span(today, today), "today", i, i + 1
+
+
+def _yesterday_form(words, i, today):
+    if words[i][0] != "yesterday":
+        return None
+    y = today - timedelta(days=1)
+    return *_span(y, y), "yesterday", i, i + 1
+
+
+def _relative_unit_form(words, i, today):
+    """'this / last week / month / year'."""
+    which, unit = words[i][0], _token(words, i + 1)
+    if which not in ("this", "last") or unit not in ("week", "month", "year"):
+        return None
+    return *_span(*_relative_unit(which, unit, today)), f"{which} {unit}", i, i + 2
+
+
+# Highest priority first: when several forms appear, the earliest listed wins.
+_DATE_FORMS = (
+    _range_form,
+    _open_ended_form,
+    _ago_form,
+    _weekend_form,
+    _cued_month_form,
+    _single_form,
+    _trailing_form,
+    _today_form,
+    _yesterday_form,
+    _relative_unit_form,
+)
+# Tokens any form can start on; the rest (most of a query) are skipped outright.
+_DATE_STARTS = (set(_MONTHS) | _OPEN_ENDED | _MONTH_CUES | set(_NUMWORDS)
+                | {"weekend", "last", "past", "this", "today", "yesterday"})
+
+
+# Forms that only get one try, where they could first start: a range only at
+# the leftmost date expression ("dec july to june" has none) and an open-ended
+# bound only at the first before / until / after / since / from.
+_FIRST_TRY_ONLY = {
+    _DATE_FORMS.index(_range_form): lambda words, i, today: _atom(words, i, today),
+    _DATE_FORMS.index(_open_ended_form): lambda words, i, today: words[i][0] in _OPEN_ENDED,
+}
 
 
 def _extract_date(text, today):
-    for lane in (
-        _extract_range,
-        _extract_open_ended,
-        _extract_relative_ago,
-        _extract_weekend,
-        _extract_single,
-        _extract_relative,
-    ):
-        result = lane(text, today)
-        if result:
-            return result
-    return None, None, None, text
+    """One pass over the tokens, trying every form at each; the leftmost hit of
+    the highest-priority form wins and its tokens are cut from the text."""
+    words, found = _words(text), {}
+    for i, (token, _, _) in enumerate(words):
+        if token not in _DATE_STARTS and not token[0].isdigit():
+            continue
+        for rank, form in enumerate(_DATE_FORMS):
+            if rank in found:
+                continue
+            if hit := form(words, i, today):
+                found[rank] = hit
+            elif rank in _FIRST_TRY_ONLY and _FIRST_TRY_ONLY[rank](words, i, today):
+                found[rank] = None  # its one try missed
+        if found.get(0):  # nothing outranks a range
+            break
+    hits = [rank for rank, hit in found.items() if hit]
+    if not hits:
+        return None, None, None, text
+    date_from, date_to, label, start, end = found[min(hits)]
+    return date_from, date_to, label, text[: words[start][1]] + " " + text[words[end - 1][2]:]
 
 
 # --- who / where (matched against the user's known values) ----------------
 
 
-def _extract_who_where(text, people, places):
+_PLACE_CUES = {"at", "in", "@"}
+_PEOPLE_JOINS = {",", "&", "and", "or"}
+
+
+class _TokenTrie:
+    """Terms keyed by their token sequence; `None` marks where a term ends."""
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, tokens, value):
+        node = self.root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node[None] = value
+
+    def longest(self, words, i):
+        """Longest term starting at words[i] → (value, index past its last token)."""
+        node, found = self.root, None
+        while i < len(words) and (node := node.get(words[i][0])) is not None:
+            i += 1
+            if None in node:
+                found = (node[None], i)
+        return found
+
+
+class VocabularyMatcher:
+    """A user's people and places compiled into token tries, once per vocabulary.
+
+    Matching walks the query's tokens once, trying the tries at each token, so
+    its cost depends on the query and the longest name, not on how many names
+    and places the user has logged. It also memoizes the last `memo_size`
+    routed queries, so a repeated query (the same search paged or re-run)
+    skips parsing entirely.
+    """
+
+    def __init__(self, people=(), places=(), memo_size=ROUTE_MEMO_SIZE):
+        self.memo_size = memo_size
+        self._memo = OrderedDict()  # (q, today) -> RoutedQuery, LRU order
+        self._memo_lock = threading.Lock()
+        self.people = _TokenTrie()
+        for person in people:  # a later spelling of the same name wins
+            if tokens := [t for t, _, _ in _words(person)]:
+                self.people.add(tokens, person)
+        # "The park" is found as "at the park" and "at park"; of two places with
+        # the same core, the longer name wins.
+        self.places = _TokenTrie()
+        for place in sorted(places, key=len):
+            core = re.sub(r"^the\s+", "", place, flags=re.I)
+            if tokens := [t for t, _, _ in _words(core)]:
+                self.places.add(tokens, place)
+
+    def match_place(self, text):
+        """The longest cued place → (place, start, end) of its span, or None.
+
+        Cues are whole tokens, so "@" works wherever it stands ("@ the park",
+        "lunch, @ park"); the regex this replaced only saw an "@" right after a
+        word character.
+        """
+        words, best = _words(text), None
+        for i, (token, start, _) in enumerate(words):
+            if token not in _PLACE_CUES:
+                continue
+            found = None
+            if i + 1 < len(words) and words[i + 1][0] == "the":
+                found = self.places.longest(words, i + 2)
+            found = found or self.places.longest(words, i + 1)
+            if found and (best is None or len(found[0]) > len(best[0])):
+                best = (found[0], start, words[found[1] - 1][2])
+        return best
+
+    def recall(self, key):
+        with self._memo_lock:
+            routed = self._memo.get(key)
+            if routed is not None:
+                self._memo.move_to_end(key)
+            return routed
+
+    def remember(self, key, routed):
+        if self.memo_size <= 0:
+            return
+        with self._memo_lock:
+            self._memo[key] = routed
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+    def match_people(self, text):
+        """The first run of known names → (names, "and"|"or", start, end), or None."""
+        words = _words(text)
+        for i, (token, start, _) in enumerate(words):
+            found = self.people.longest(words, i + 1) if token == "with" else None
+            found = found or self.people.longest(words, i)
+            if found is None:
+                continue
+            names, end, op = [found[0]], found[1], "and"
+            while end < len(words) and words[end][0] in _PEOPLE_JOINS:
+                following = self.people.longest(words, end + 1)
+                if following is None:
+                    break
+                op = "or" if words[end][0] == "or" else op
+                names.append(following[0])
+                end = following[1]
+            return list(dict.fromkeys(names)), op, start, words[end - 1][2]
+        return None
+
+
+def _extract_who_where(text, matcher):
     who, who_op, who_label = [], "and", None
     where = where_label = None
 
     # Places require a cue (at/in/@) — bare "home"/"office" collide with content.
-    # Longest first so multi-word places win; "The park" matches "at the park".
-    for place in sorted(places, key=len, reverse=True):
-        core = re.sub(r"^the\s+", "", place, flags=re.I)
-        m = re.search(rf"\b(?:at|in|@)\s+(?:the\s+)?{re.escape(core)}\b", text, re.I)
-        if m:
-            where, where_label = place, f"at: {place}"
-            text = _strip(text, m)
-            break
+    # The longest place wins, so multi-word places beat their prefixes.
+    place = matcher.match_place(text)
+    if place:
+        where, start, end = place
+        where_label = f"at: {where}"
+        text = text[:start] + " " + text[end:]
 
     # People: "with <name>" or a bare known name, one or more joined by and / or /
     # comma. The conjunction is respected downstream — "Mom and Dad" → both present
     # (their comma-separated with_who contains each), "Mom or Dad" → either.
+    people = matcher.match_people(text)
     if people:
-        names = "(" + "|".join(re.escape(p) for p in sorted(people, key=len, reverse=True)) + ")"
-        m = re.search(rf"\b(?:with\s+)?{names}(?:\s*(?:,|&|and|or)\s*{names})*\b", text, re.I)
-        if m:
-            phrase = m.group(0)
-            lookup = {p.lower(): p for p in people}
-            for tok in re.findall(names, phrase, re.I):
-                canon = lookup.get(tok.lower())
-                if canon and canon not in who:
-                    who.append(canon)
-            who_op = "or" if re.search(r"\bor\b", phrase, re.I) else "and"
-            who_label = "with: " + (" or " if who_op == "or" else ", ").join(who)
-            text = _strip(text, m)
+        who, who_op, start, end = people
+        who_label = "with: " + (" or " if who_op == "or" else ", ").join(who)
+        text = text[:start] + " " + text[end:]
 
     return who, who_op, where, who_label, where_label, text
 
@@ -401,12 +570,25 @@ def _cleanup(text):
     return " ".join(tokens)
 
 
-def route_query(q, *, today=None, people=(), places=()):
+def route_query(q, *, today=None, people=(), places=(), matcher=None):
+    """Route a typed query. Pass a prebuilt `matcher` (VocabularyMatcher) to skip
+    compiling `people`/`places` on every call — and to reuse its memo of queries
+    already routed against that vocabulary."""
     today = today or date.today()
-    text = q or ""
-
+    if matcher is None:
+        return _route(q or "", today, VocabularyMatcher(people, places, memo_size=0))
+    key = (q or "", today)
+    routed = matcher.recall(key)
+    if routed is None:
+        routed = _route(key[0], today, matcher)
+        matcher.remember(key, routed)
+    # A copy, so a caller mutating its lists never corrupts the memo.
+    return replace(routed, who=list(routed.who), labels=list(routed.labels))
+
+
+def _route(text, today, matcher):
     date_from, date_to, date_label, text = _extract_date(text, today)
-    who, who_op, where, who_label, where_label, text = _extract_who_where(text, people, places)
+    who, who_op, where, who_label, where_label, text = _extract_who_where(text, matcher)
     mood, mood_label, text = _extract_mood(text)
 
     residual = _cleanup(text)
@@ -7,6 +7,7 @@ from flask_login import current_user
 from sqlalchemy.orm import joinedload
 from werkzeug.utils import secure_filename
 
+import day_summary
 from models import Attachment, DailyLog, db
 
 from ._helpers import json_login_required
@@ -87,6 +88,7 @@ def upload_attachment():
         size_bytes=size_bytes,
     )
     db.session.add(attachment)
+    day_summary.record_day(current_user.id, date)
     db.session.commit()
     return jsonify({"status": "success", "attachment": _attachment_payload(attachment)})
 
@@ -128,5 +130,6 @@ def delete_attachment(attachment_id):
     if not daily_log.has_marker and daily_log.mood_key is None and len(daily_log.attachments) <= 1:
         db.session.delete(daily_log)
 
+    day_summary.record_day(current_user.id, daily_log.date)
     db.session.commit()
     return jsonify({"status": "success"})
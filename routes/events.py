@@ -2,12 +2,13 @@ from datetime import datetime, timedelta
 
 from flask import Blueprint, jsonify, request
 from flask_login import current_user
-from sqlalchemy import func
 from sqlalchemy.orm import selectinload
 
+import day_summary
+import index_queue
+import vocabulary
 from models import Event, SubEvent, db
-from search_index import index_event_safe, remove_event_safe
-from utils import parse_event_datetime
+from utils import events_overlapping, parse_event_datetime
 
 from ._helpers import json_login_required
 
@@ -16,14 +17,9 @@ event_blueprint = Blueprint("events", __name__, url_prefix="/events")
 
 def retrieve_events_within_range(start_date, end_date):
     """Query events for the current user and specified dates (subevents eager-loaded)."""
-    effective_end = func.coalesce(Event.end_time, Event.start_time)
     return (
         Event.query.options(selectinload(Event.subevents))
-        .filter(
-            Event.user_id == current_user.id,
-            Event.start_time < end_date,
-            effective_end >= start_date,
-        )
+        .filter(events_overlapping(start_date, end_date, current_user.id))
         .order_by(Event.start_time)
         .all()
     )
@@ -49,6 +45,19 @@ def is_within_parent_date(parent: Event, start_datetime, end_datetime) -> bool:
     )
 
 
+def enqueue_reindex(event: Event | SubEvent):
+    """Queue the owning diary entry for reindexing in the current transaction.
+
+    Subevents are folded into their parent's document, so a subevent change
+    queues the parent.
+    """
+    if isinstance(event, SubEvent):
+        parent = event.parent_event or db.session.get(Event, event.event_id)
+        index_queue.enqueue(event.event_id, parent.user_id if parent else None)
+    else:
+        index_queue.enqueue(event.id, event.user_id)
+
+
 def edit_event_data(event: Event | SubEvent, data: dict, parent: Event | None = None):
     """Edit the event or subevent details."""
     start_datetime = parse_event_datetime(data["start_date"], data.get("start_time"))
@@ -57,6 +66,8 @@ def edit_event_data(event: Event | SubEvent, data: dict, parent: Event | None =
     if parent and not is_within_parent_date(parent, start_datetime, end_datetime):
         return False
 
+    before = vocabulary.terms_of(event)
+    span = day_summary.span_of(event)
     event.name = data["name"]
     event.start_time = start_datetime
     event.end_time = end_datetime
@@ -64,7 +75,11 @@ def edit_event_data(event: Event | SubEvent, data: dict, parent: Event | None =
     event.with_who = data.get("with_who")
     event.where = data.get("where")
 
+    vocabulary.record(event, before, vocabulary.terms_of(event))
+    day_summary.record_event(span, day_summary.span_of(event))
+    enqueue_reindex(event)
     db.session.commit()
+    index_queue.notify()
     return True
 
 
@@ -87,14 +102,25 @@ def create_event(event_class, data: dict, parent: Event | None = None, **kwargs)
     }
     event = event_class(**event_attrs)
     db.session.add(event)
+    db.session.flush()  # assigns the id the outbox row needs
+    vocabulary.record(event, after=vocabulary.terms_of(event))
+    day_summary.record_event(after=day_summary.span_of(event))
+    enqueue_reindex(event)
     db.session.commit()
+    index_queue.notify()
     return event
 
 
 def delete_event(event: Event | SubEvent):
     """Delete an event or subevent."""
+    enqueue_reindex(event)
+    before = vocabulary.terms_of(event)
+    span = day_summary.span_of(event)
     db.session.delete(event)
+    vocabulary.record(event, before=before)
+    day_summary.record_event(before=span)
     db.session.commit()
+    index_queue.notify()
 
 
 @event_blueprint.route("/", methods=["GET", "POST"])
@@ -122,8 +148,7 @@ def events():
 
         return jsonify({"status": "success", "events": events_data})
 
-    event = create_event(Event, request.json, user_id=current_user.id)
-    index_event_safe(event)
+    create_event(Event, request.json, user_id=current_user.id)
     return jsonify({"status": "success", "message": "Event created successfully"})
 
 
@@ -136,12 +161,10 @@ def manage_event(event_id):
         return jsonify({"status": "error", "message": "Event not found"}), 404
 
     if request.method == "DELETE":
-        remove_event_safe(event.id)
         delete_event(event)
         return jsonify({"status": "success", "message": "Event deleted"})
 
     edit_event_data(event, request.json)
-    index_event_safe(event)
     return jsonify({"status": "success", "message": "Event updated"})
 
 
@@ -157,7 +180,6 @@ def subevents(event_id):
             "status": "error",
             "message": "Subevent must occur within the parent event's timeframe",
         }), 400
-    index_event_safe(parent_event)  # reindex parent with the new subevent folded in
     return jsonify({"status": "success", "message": "Subevent created successfully"})
 
 
@@ -174,11 +196,7 @@ def manage_subevent(subevent_id):
         return jsonify({"status": "error", "message": "Subevent not found"}), 404
 
     if request.method == "DELETE":
-        parent_id = subevent.event_id
         delete_event(subevent)
-        parent_event = db.session.get(Event, parent_id)
-        if parent_event is not None:
-            index_event_safe(parent_event)
         return jsonify({"status": "success", "message": "Subevent deleted"})
 
     if request.method == "GET":
@@ -190,7 +208,6 @@ def manage_subevent(subevent_id):
             "status": "error",
             "message": "Subevent must occur within the parent event's timeframe",
         }), 400
-    index_event_safe(parent_event)  # reindex parent with the edited subevent text
     return jsonify({"status": "success", "message": "Subevent updated"})
 
 
@@ -3,6 +3,7 @@ from datetime import datetime
 from flask import Blueprint, jsonify, request
 from flask_login import current_user
 
+import day_summary
 from models import DailyLog, db
 from moods import MOOD_BY_KEY
 
@@ -33,6 +34,7 @@ def update_mood():
             daily_log = DailyLog(user_id=current_user.id, date=date, mood_key=key)
             db.session.add(daily_log)
 
+    day_summary.record_day(current_user.id, date)
     db.session.commit()
     return jsonify({"status": "success"})
 
@@ -54,5 +56,6 @@ def toggle_marker():
         daily_log = DailyLog(user_id=current_user.id, date=date, has_marker=has_marker)
         db.session.add(daily_log)
 
+    day_summary.record_day(current_user.id, date)
     db.session.commit()
     return jsonify({"status": "success", "has_marker": has_marker})
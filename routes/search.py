@@ -3,9 +3,11 @@ from datetime import date, datetime, timedelta
 from flask import Blueprint, jsonify, redirect, render_template, request, url_for
 from flask_login import current_user
 
-from models import Event, db
+import index_queue
+import search_timing
+import vocabulary
 from query_router import route_query
-from search_index import search
+from search_index import query_cache_stats, search
 
 from ._helpers import json_login_required
 from .events import retrieve_event_data
@@ -22,29 +24,6 @@ def _parse_date(value):
         return None
 
 
-def _distinct(column, user_id):
-    """The user's known values for a column (for who/where query routing)."""
-    rows = (
-        db.session.query(column)
-        .filter(Event.user_id == user_id, column.isnot(None), column != "")
-        .distinct()
-        .all()
-    )
-    return [r[0] for r in rows]
-
-
-def _known_people(user_id):
-    """Individual names the user has logged (with_who is comma-separated, so a
-    joint entry like "Mom, Dad" yields each name for who-routing)."""
-    names = set()
-    for raw in _distinct(Event.with_who, user_id):
-        for part in raw.split(","):
-            part = part.strip()
-            if part:
-                names.add(part)
-    return sorted(names)
-
-
 @search_blueprint.route("")
 def search_page():
     # Deep-link / refresh entry: render the calendar shell with the Search view
@@ -60,15 +39,16 @@ def search_page():
 @json_login_required
 def search_events():
     # Route the typed query first: pull date / mood / who / where out of it (who and
-    # where are matched against the user's own known values), leaving the residual as
-    # the content query (see query_router.route_query).
+    # where are matched against the user's cached vocabulary, see vocabulary.py),
+    # leaving the residual as the content query (see query_router.route_query).
+    # Each stage is timed into a Server-Timing header; `debug=1` also returns the
+    # timings and hit counts.
     uid = current_user.id
-    routed = route_query(
-        request.args.get("q", ""),
-        today=date.today(),
-        people=_known_people(uid),
-        places=_distinct(Event.where, uid),
-    )
+    trace = search_timing.SearchTrace()
+    with trace.stage("vocab"):
+        known = vocabulary.for_user(uid)
+    with trace.stage("route"):
+        routed = route_query(request.args.get("q", ""), today=date.today(), matcher=known.matcher)
 
     explicit_from = _parse_date(request.args.get("from"))
     explicit_to = _parse_date(request.args.get("to"))
@@ -105,6 +85,7 @@ def search_events():
         who_op=who_op,
         where=where,
         limit=limit,
+        trace=trace,
     )
 
     # Chip labels: only what the router actually applied (explicit controls show
@@ -120,5 +101,29 @@ def search_events():
     if not explicit_mood and routed.mood:
         labels.append(f"mood: {routed.mood}")
 
-    results = [retrieve_event_data(event) for event, _ in matches]
-    return jsonify({"status": "success", "results": results, "parsed": {"labels": labels}})
+    with trace.stage("serialize"):
+        results = [retrieve_event_data(event) for event, _ in matches]
+    payload = {"status": "success", "results": results, "parsed": {"labels": labels}}
+    if request.args.get("debug") == "1":
+        payload["debug"] = trace.debug()
+    search_timing.record(trace)
+    response = jsonify(payload)
+    response.headers["Server-Timing"] = trace.server_timing()
+    return response
+
+
+@search_blueprint.route("/status", methods=["GET"])
+@json_login_required
+def index_status():
+    # Entries saved but not yet embedded by the background indexer (still found
+    # by keyword until it catches up), entries it gave up on after repeated
+    # failures (indexed again once edited), this worker's query-cache counters,
+    # and its rolling per-stage search latencies. Household-wide figures (how
+    # many chunks share a vector) stay out of it: `flask reindex` prints them.
+    return jsonify({
+        "status": "success",
+        "pending": index_queue.queue_depth(current_user.id),
+        "parked": index_queue.parked(current_user.id),
+        "query_cache": query_cache_stats(),
+        "timings": search_timing.percentiles(),
+    })
@@ -2,55 +2,109 @@
 
 Retrieval-only, fully on-device — no external services, no API keys:
   * dense    — fastembed/ONNX sentence embeddings, brute-force cosine over the
-               metadata-filtered candidate set (vectors stored in event_embedding)
+               metadata-filtered candidate set (one vector per chunk — the event
+               itself and each subevent — shared via embedding_vector by every
+               chunk with the same text; an event scores as its best chunk)
   * sparse   — SQLite FTS5 / BM25 lexical match (event_fts)
-  * metadata — date range / mood / who / where filters on the live tables
+  * metadata — date range / mood filters on the live tables, who via the
+               parsed people index (person / event_person), where via a
+               trigram FTS5 index of names, people and places (event_meta_fts)
 The dense and sparse rankings are fused with Reciprocal Rank Fusion so exact
-terms (names, places) and paraphrase/concept queries both surface.
+terms (names, places) and paraphrase/concept queries both surface. The two legs
+run side by side: the FTS query on its own connection in a small thread pool
+while the query is embedded and scored (`SEARCH_PARALLEL`).
 
-Brute-force numpy cosine is ample for a personal diary's scale; if the corpus
-ever grows large, sqlite-vec is a drop-in replacement for the dense half.
+Each worker keeps the user's vectors resident as one contiguous matrix (see
+`_user_matrix`), so a query is a masked matrix-vector product, not a BLOB scan.
+With a file-backed DB that matrix is a read-only mapping of the user's vector
+file (vector_store.py), so every worker on the host shares one page-cached copy.
+Brute-force cosine is exact and ample for a single diary; once a user's candidate
+set outgrows `ANN_MIN_ROWS`, an IVF index (vector_index.py) narrows scoring to
+the `ANN_NPROBE` closest k-means cells. Its centroids are trained off the
+request path (`refresh_centroids`, run by the indexer and `flask reindex`);
+until they exist a search stays exact.
+
+Vectors may be stored and held compactly (`SEARCH_EMBED_ENCODING`: float16 or
+int8, see vector_codec.py); `SEARCH_EMBED_RESCORE` then re-ranks the top hits
+against a float32 copy so the compression costs no precision at the top.
 """
 
 import hashlib
+import json
 import os
+import pathlib
 import re
 import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
 
 import numpy as np
-from flask import current_app
-from sqlalchemy import and_, func, or_
-from sqlalchemy.orm import selectinload
+from flask import has_app_context
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
 
-from models import DailyLog, Event, EventEmbedding, db
+import vector_codec
+import vector_index
+import vector_store
+import vocabulary
+from embedding_backend import get_backend
+from models import (
+    DailyLog,
+    EmbeddingVector,
+    Event,
+    EventEmbedding,
+    IndexOutbox,
+    SearchGeneration,
+    db,
+)
+from query_cache import QueryEmbeddingCache
+from search_timing import SearchTrace
 
-EMBED_MODEL = "BAAI/bge-small-en-v1.5"  # 384-dim, ONNX, ~tens of MB (no torch)
 _RRF_K = 60  # Reciprocal Rank Fusion constant
 # Cosine floor for the dense half: only entries at least this similar to the
 # query count as semantic matches, so an unrelated query returns nothing rather
 # than every entry ranked. Lexical (FTS) matches are always exact and unaffected.
 # Tunable via env for the deployment's corpus/model.
 DENSE_MIN_SCORE = float(os.environ.get("SEARCH_DENSE_MIN_SCORE", "0.6"))
-
-_model = None
-_model_lock = threading.Lock()
-
-
-def _get_model():
-    """Lazily load the embedding model as a process-wide singleton."""
-    global _model
-    if _model is None:
-        with _model_lock:
-            if _model is None:
-                from fastembed import TextEmbedding
-
-                # FASTEMBED_CACHE_PATH points at the model baked into the image
-                # at build time, so runtime needs no network (see Dockerfile).
-                _model = TextEmbedding(
-                    model_name=EMBED_MODEL,
-                    cache_dir=os.environ.get("FASTEMBED_CACHE_PATH") or None,
-                )
-    return _model
+# How many users' vector matrices each worker keeps resident (LRU beyond that).
+MATRIX_CACHE_USERS = int(os.environ.get("SEARCH_MATRIX_CACHE_USERS", "8"))
+# Approximate dense search: candidate sets larger than ANN_MIN_ROWS are scored
+# only within the ANN_NPROBE IVF cells closest to the query (more cells → better
+# recall, slower). Smaller sets always use exact brute force.
+ANN_MIN_ROWS = int(os.environ.get("SEARCH_ANN_MIN_ROWS", "4096"))
+ANN_NPROBE = int(os.environ.get("SEARCH_ANN_NPROBE", "8"))
+# Query embeddings: per-worker LRU size, and whether to back it with a SQLite
+# file beside the DB that all workers share and that survives restarts.
+QUERY_CACHE_SIZE = int(os.environ.get("SEARCH_QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_PERSIST = os.environ.get("SEARCH_QUERY_CACHE_PERSIST", "1") != "0"
+# Lexical hits kept per query: ranking stops inside SQLite after this many.
+SPARSE_DEPTH = int(os.environ.get("SEARCH_SPARSE_DEPTH", "200"))
+# A where-filter with no substring match falls back to places sharing at least
+# this share of its trigrams, so "Blue Botle" still finds "Blue Bottle" (0 = off).
+WHERE_FUZZY = float(os.environ.get("SEARCH_WHERE_FUZZY", "0.7"))
+REINDEX_BATCH_SIZE = 256  # events per embedding call / commit during `flask reindex`
+# Storage/in-memory format of document vectors: float32 (default), float16 (½
+# the bytes) or int8 (¼). Existing rows are converted with `flask reindex
+# --convert`; until then mixed rows are read fine.
+EMBED_ENCODING = os.environ.get("SEARCH_EMBED_ENCODING", "float32")
+if EMBED_ENCODING not in vector_codec.ENCODINGS:
+    raise ValueError(f"SEARCH_EMBED_ENCODING must be one of {vector_codec.ENCODINGS}")
+# With a compact encoding, re-rank this many top dense hits against a float32
+# copy kept per row (0 = off; the copy is then not stored either).
+EMBED_RESCORE = int(os.environ.get("SEARCH_EMBED_RESCORE", "0"))
+# Serve dense search from memory-mapped per-user vector files beside the DB
+# (shared by all workers) instead of a private copy in each worker's heap.
+VECTOR_STORE = os.environ.get("SEARCH_VECTOR_STORE", "1") != "0"
+# `flask compact-vectors` rewrites a user's file once this share of rows is dead.
+VECTOR_COMPACT_RATIO = 0.25
+# Run a search's keyword leg on its own DB connection in a small thread pool
+# while this thread embeds the query and scores vectors, so latency tends to
+# the slower leg instead of the sum. In-memory DBs always run the legs in turn.
+SEARCH_PARALLEL = os.environ.get("SEARCH_PARALLEL", "1") != "0"
+SEARCH_LEG_THREADS = int(os.environ.get("SEARCH_LEG_THREADS", "4"))
 
 
 def _normalize(raw):
@@ -62,17 +116,384 @@ def _normalize(raw):
 
 
 def embed_texts(texts):
-    """Embed documents → list of L2-normalized float32 vectors (cosine == dot)."""
-    return [_normalize(raw) for raw in _get_model().embed(list(texts))]
+    """Embed documents → list of L2-normalized float32 vectors (cosine == dot).
+
+    Runs on the configured backend (embedding_backend): in-process, the host's
+    shared sidecar, or the deterministic fake.
+    """
+    return [_normalize(raw) for raw in get_backend().embed(list(texts))]
 
 
 def embed_query(text):
     """Embed a search query with bge's retrieval instruction → normalized vector.
 
-    query_embed applies the model's query-side prefix, which separates relevant
-    from irrelevant far better than the passage encoder for short queries.
+    The query-side prefix separates relevant from irrelevant far better than the
+    passage encoder for short queries. Repeat queries are served from the
+    query-embedding cache (query_cache.py) without touching the model.
+    """
+    backend = get_backend()
+    cache = _query_cache()
+    vector = cache.get(backend.model, text)
+    if vector is None:
+        vector = _normalize(backend.embed([text], kind="query")[0])
+        cache.put(backend.model, text, vector)
+    return vector
+
+
+_query_caches = {}  # persistent cache path (or None) -> QueryEmbeddingCache
+_query_caches_lock = threading.Lock()
+
+
+def _query_cache():
+    path = None
+    # Outside an app (scripts, benchmarks) there's no DB folder: memory tier only.
+    if QUERY_CACHE_PERSIST and has_app_context() and (index_dir := _index_dir()) is not None:
+        path = str(index_dir / "query_cache.db")
+    with _query_caches_lock:
+        cache = _query_caches.get(path)
+        if cache is None:
+            cache = _query_caches[path] = QueryEmbeddingCache(QUERY_CACHE_SIZE, path)
+    return cache
+
+
+def query_cache_stats():
+    """Hit/miss counters for this worker's query-embedding cache tiers."""
+    totals = dict.fromkeys(("memory_hits", "memory_misses", "disk_hits", "disk_misses"), 0)
+    with _query_caches_lock:
+        for cache in _query_caches.values():
+            for key, value in cache.stats.items():
+                totals[key] += value
+    return totals
+
+
+# --- per-worker vector matrix cache ---------------------------------------
+
+
+@dataclass
+class _UserMatrix:
+    generation: int
+    ids: np.ndarray  # int64 event ids (one row per chunk); row i belongs to ids[i]
+    matrix: np.ndarray  # (n, dim) in EMBED_ENCODING's dtype, C-contiguous
+    scales: np.ndarray | None = None  # per-row float32 scales for int8
+    centroids: np.ndarray | None = None  # IVF cells, once the user has ANN_MIN_ROWS
+    lists: np.ndarray | None = None  # int32 cell of each row, aligned with ids
+    segment: str | None = None  # vector_store segment when `matrix` is its mapping
+    centroids_stamp: int | None = None  # mtime_ns of the centroid file behind `centroids`
+
+
+_matrix_cache = OrderedDict()  # (db url, user_id) -> _UserMatrix, LRU order
+_matrix_lock = threading.Lock()
+
+
+def _cache_key(user_id):
+    # Keyed by database too: one process may talk to several DBs (tests, CLI).
+    return (str(db.engine.url), user_id)
+
+
+def _current_generation(user_id):
+    # A fresh SELECT rather than session.get: the identity map could hand back a
+    # value read earlier in this transaction and hide another worker's write.
+    generation = db.session.execute(
+        db.select(SearchGeneration.generation).where(SearchGeneration.user_id == user_id)
+    ).scalar()
+    return generation or 0
+
+
+def _bump_generation(user_id):
+    """Advance the user's index generation (caller commits). Returns the new value."""
+    db.session.execute(
+        db.text(
+            "INSERT INTO search_generation (user_id, generation) VALUES (:uid, 1) "
+            "ON CONFLICT(user_id) DO UPDATE SET generation = generation + 1"
+        ),
+        {"uid": user_id},
+    )
+    return db.session.execute(
+        db.text("SELECT generation FROM search_generation WHERE user_id = :uid"),
+        {"uid": user_id},
+    ).scalar_one()
+
+
+def _read_rows(user_id):
+    """The user's stored vectors from SQLite → (ids, matrix, scales)."""
+    rows = (
+        db.session.query(
+            EventEmbedding.event_id, EmbeddingVector.embedding,
+            EmbeddingVector.encoding, EmbeddingVector.scale,
+        )
+        .join(EmbeddingVector, EmbeddingVector.source_hash == EventEmbedding.source_hash)
+        .join(Event, Event.id == EventEmbedding.event_id)
+        .filter(Event.user_id == user_id)
+        .order_by(EventEmbedding.event_id, EventEmbedding.chunk)
+        .all()
+    )
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    return (ids, *_stack_rows(rows))
+
+
+def _load_matrix(user_id, generation):
+    store = _vector_store(user_id)
+    if store is None:
+        entry = _UserMatrix(generation, *_read_rows(user_id))
+    else:
+        view = store.open()
+        if (view is None or view.generation < generation
+                or view.encoding != EMBED_ENCODING or view.model != get_backend().model):
+            # Missing or behind SQLite: rebuild once, for every worker.
+            view = store.rebuild(
+                lambda: _read_rows(user_id),
+                encoding=EMBED_ENCODING, model=get_backend().model, generation=generation,
+            )
+        entry = _UserMatrix(generation, view.ids, view.matrix, view.scales, segment=view.segment)
+    return entry
+
+
+def _stack_rows(rows):
+    """(event_id, embedding, encoding, scale) rows → one matrix in EMBED_ENCODING.
+
+    Rows already in the target encoding are stacked as-is; others (mid-
+    conversion) are decoded and re-encoded one at a time, never the whole set.
+    """
+    dtype = vector_codec.dtype(EMBED_ENCODING)
+    if not rows:
+        scales = np.empty(0, np.float32) if EMBED_ENCODING == "int8" else None
+        return np.empty((0, 0), dtype=dtype), scales
+    blobs, scales = [], []
+    for _, blob, encoding, scale in rows:
+        if encoding != EMBED_ENCODING:
+            blob, scale = vector_codec.encode(
+                vector_codec.decode(blob, encoding, scale), EMBED_ENCODING
+            )
+        blobs.append(blob)
+        scales.append(scale)
+    matrix = np.frombuffer(b"".join(blobs), dtype=dtype).reshape(len(rows), -1)
+    if EMBED_ENCODING != "int8":
+        return matrix.copy(), None
+    return matrix.copy(), np.asarray(scales, dtype=np.float32)
+
+
+def _assign_lists(matrix, scales, centroids):
+    """IVF cell of each (possibly compact) row, decoded block by block."""
+    if not len(matrix):
+        return np.empty(0, dtype=np.int32)
+    return np.argmax(vector_codec.score(matrix, scales, centroids.T), axis=1).astype(np.int32)
+
+
+def _index_dir():
+    """The folder holding the SQLite file — home of the on-disk search sidecars."""
+    database = db.engine.url.database
+    if not database or database == ":memory:":
+        return None
+    return pathlib.Path(database).resolve().parent
+
+
+def _vector_store(user_id):
+    """The user's memory-mapped vector file, or None (disabled / in-memory DB)."""
+    index_dir = _index_dir() if VECTOR_STORE else None
+    if index_dir is None:
+        return None
+    return vector_store.VectorStore(index_dir / "vectors" / f"user_{user_id}")
+
+
+def _ann_path(user_id):
+    """Where a user's IVF centroids live: an `ann/` folder beside the SQLite file."""
+    index_dir = _index_dir()
+    return index_dir / "ann" / f"user_{user_id}.npz" if index_dir is not None else None
+
+
+def _with_centroids(user_id, entry):
+    """`entry` with the user's saved IVF centroids and each row's cell attached.
+
+    Never trains (that's `refresh_centroids`): centroids are used as saved,
+    however far the corpus has grown since, and without any the search stays
+    exact. Costs one stat() when they haven't changed.
     """
-    return _normalize(next(iter(_get_model().query_embed([text]))))
+    if np.count_nonzero(entry.ids >= 0) < ANN_MIN_ROWS:
+        return entry
+    path = _ann_path(user_id)
+    try:
+        stamp = path.stat().st_mtime_ns if path is not None else None
+    except FileNotFoundError:
+        stamp = None
+    if stamp == entry.centroids_stamp:
+        return entry
+    saved = None
+    if stamp is not None:
+        saved = vector_index.load_centroids(
+            path, model=get_backend().model, dim=entry.matrix.shape[1]
+        )
+    if saved is None:
+        return replace(entry, centroids=None, lists=None, centroids_stamp=stamp)
+    lists = _assign_lists(entry.matrix, entry.scales, saved[0])
+    return replace(entry, centroids=saved[0], lists=lists, centroids_stamp=stamp)
+
+
+def refresh_centroids(user_ids=None):
+    """Train IVF centroids for users (default: everyone indexed) who have
+    outgrown theirs — none saved yet, or 4× the rows they were trained on.
+
+    Run by the indexer after it drains the outbox and by `flask reindex`, so a
+    search never waits on k-means. Needs a file-backed DB (the centroids are
+    shared with every worker through `instance/ann/`). Returns how many users
+    were retrained.
+    """
+    if user_ids is None:
+        user_ids = db.session.execute(
+            db.select(Event.user_id).distinct()
+            .join(EventEmbedding, EventEmbedding.event_id == Event.id)
+        ).scalars()
+    trained = 0
+    for user_id in user_ids:
+        path = _ann_path(user_id)
+        if user_id is None or path is None:
+            continue
+        entry = _user_matrix(user_id)
+        live = np.flatnonzero(entry.ids >= 0)  # skips vector_store tombstones
+        if len(live) < ANN_MIN_ROWS:
+            continue
+        saved = vector_index.load_centroids(
+            path, model=get_backend().model, dim=entry.matrix.shape[1]
+        )
+        if saved is not None and saved[1] * 4 >= len(live):
+            continue
+        # k-means samples at most 20k rows anyway; decode only that sample.
+        rows = np.sort(np.random.default_rng(0).permutation(live)[:20_000])
+        sample = vector_codec.to_float32(
+            entry.matrix[rows], entry.scales[rows] if entry.scales is not None else None
+        )
+        centroids = vector_index.train_centroids(sample, vector_index.suggested_lists(len(live)))
+        vector_index.save_centroids(
+            path, centroids, trained_rows=len(live), model=get_backend().model
+        )
+        trained += 1
+    return trained
+
+
+def _user_matrix(user_id):
+    """The user's embeddings as one resident matrix, rebuilt only when stale.
+
+    Staleness is a single primary-key read of search_generation, so writes made
+    by any worker are noticed on that worker's next query.
+    """
+    key = _cache_key(user_id)
+    generation = _current_generation(user_id)
+    with _matrix_lock:
+        cached = _matrix_cache.get(key)
+        if cached is not None and cached.generation == generation:
+            _matrix_cache.move_to_end(key)
+        else:
+            cached = None
+    if cached is not None:
+        entry = _with_centroids(user_id, cached)
+        if entry is not cached:  # the indexer saved new centroids
+            with _matrix_lock:
+                if _matrix_cache.get(key) is cached:
+                    _matrix_cache[key] = entry
+        return entry
+    entry = _with_centroids(user_id, _load_matrix(user_id, generation))
+    with _matrix_lock:
+        _matrix_cache[key] = entry
+        _matrix_cache.move_to_end(key)
+        while len(_matrix_cache) > MATRIX_CACHE_USERS:
+            _matrix_cache.popitem(last=False)
+    return entry
+
+
+def _patch_matrix(user_id, generation, upserts=None, removals=()):
+    """Apply this worker's own write to its cached matrix instead of dropping it.
+
+    `upserts` maps event id → its chunk vectors (k, dim), replacing all of the
+    event's rows; `removals` are event ids to drop.
+    Only patched when the cache was current just before the write
+    (`generation - 1`); otherwise another worker wrote in between and the entry
+    is discarded so the next query reloads it.
+    """
+    upserts = upserts or {}
+    new_ids = np.concatenate(
+        [np.full(len(rows), event_id, dtype=np.int64) for event_id, rows in upserts.items()]
+        or [np.empty(0, dtype=np.int64)]
+    )
+    new_rows = new_scales = None
+    if upserts:
+        new_rows, new_scales = vector_codec.encode_matrix(
+            np.vstack(list(upserts.values())), EMBED_ENCODING
+        )
+    # The shared file is patched whether or not this worker has the user cached.
+    store = _vector_store(user_id)
+    view = None
+    if store is not None:
+        view = store.apply(
+            generation, ids=new_ids, matrix=new_rows, scales=new_scales, removals=list(removals),
+            encoding=EMBED_ENCODING, model=get_backend().model,
+        )
+    key = _cache_key(user_id)
+    with _matrix_lock:
+        entry = _matrix_cache.get(key)
+        if entry is None:
+            return
+        if entry.generation != generation - 1:
+            del _matrix_cache[key]
+            return
+        if entry.segment is not None:
+            if view is None or view.segment != entry.segment:
+                del _matrix_cache[key]
+                return
+            # Appended rows follow the ones this entry already maps.
+            lists = entry.lists
+            if lists is not None and upserts:
+                lists = np.concatenate(
+                    [lists, _assign_lists(new_rows, new_scales, entry.centroids)]
+                )
+            _matrix_cache[key] = _UserMatrix(
+                generation, view.ids, view.matrix, view.scales,
+                centroids=entry.centroids, lists=lists, segment=view.segment,
+                centroids_stamp=entry.centroids_stamp,
+            )
+            return
+        changed = np.fromiter([*upserts, *removals], dtype=np.int64)
+        keep = ~np.isin(entry.ids, changed)
+        ids, matrix = entry.ids[keep], entry.matrix[keep]
+        scales = entry.scales[keep] if entry.scales is not None else None
+        lists = entry.lists[keep] if entry.lists is not None else None
+        if upserts:
+            matrix = np.vstack([matrix.reshape(len(ids), new_rows.shape[1]), new_rows])
+            if scales is not None:
+                scales = np.concatenate([scales, new_scales])
+            ids = np.concatenate([ids, new_ids])
+            if lists is not None:
+                lists = np.concatenate(
+                    [lists, _assign_lists(new_rows, new_scales, entry.centroids)]
+                )
+        _matrix_cache[key] = _UserMatrix(
+            generation, ids, np.ascontiguousarray(matrix), scales,
+            centroids=entry.centroids, lists=lists, centroids_stamp=entry.centroids_stamp,
+        )
+
+
+def clear_matrix_cache():
+    with _matrix_lock:
+        _matrix_cache.clear()
+
+
+def compact_vector_stores(min_dead_ratio=VECTOR_COMPACT_RATIO):
+    """Rewrite vector files whose tombstoned share is at least `min_dead_ratio`.
+
+    Returns (files compacted, rows dropped). Workers mapping the old file keep
+    reading it until their next reload.
+    """
+    index_dir = _index_dir()
+    root = index_dir / "vectors" if index_dir is not None else None
+    if root is None or not root.is_dir():
+        return 0, 0
+    compacted = dropped = 0
+    for path in sorted(root.glob("user_*")):
+        store = vector_store.VectorStore(path)
+        view = store.open()
+        if view is None or not view.dead or view.dead < min_dead_ratio * len(view.ids):
+            continue
+        dropped += store.compact()
+        compacted += 1
+    return compacted, dropped
 
 
 # --- indexing -------------------------------------------------------------
@@ -82,145 +503,685 @@ def _clean(*parts):
     return " ".join(p.strip() for p in parts if p and p.strip())
 
 
+CORE_CHUNK = 0  # chunk id of an event's own fields; subevent chunks use the subevent id
+
+
 def build_document(event):
-    """An event's searchable text, with its subevents folded in."""
+    """An event's searchable text, with its subevents folded in (the FTS row)."""
     parts = [event.name, event.notes, event.with_who, event.where]
     for sub in event.subevents:
         parts.extend([sub.name, sub.notes, sub.with_who, sub.where])
     return _clean(*parts)
 
 
+def build_chunks(event):
+    """An event's embedding units → {chunk id: text}, empty ones left out.
+
+    Embedded separately so a subevent edit re-embeds one chunk, and so a long
+    trip's text isn't cut off by the model's token window.
+    """
+    chunks = {CORE_CHUNK: _clean(event.name, event.notes, event.with_who, event.where)}
+    for sub in event.subevents:
+        chunks[sub.id] = _clean(sub.name, sub.notes, sub.with_who, sub.where)
+    return {chunk: text for chunk, text in chunks.items() if text}
+
+
 def _source_hash(document):
-    return hashlib.sha256(f"{EMBED_MODEL}\x00{document}".encode()).hexdigest()
+    return hashlib.sha256(f"{get_backend().model}\x00{document}".encode()).hexdigest()
 
 
 def ensure_fts_table():
-    """Create the FTS5 table if absent (the test DB is built via create_all).
+    """Create the FTS5 tables if absent (the test DB is built via create_all).
 
     `porter` stemming means a query token and the indexed text match on their
-    common stem (runs/running → run, meetings → meeting). Existing DBs get the
-    tokenizer via migration; this keeps fresh/test DBs consistent.
+    common stem (runs/running → run, meetings → meeting). The rowid is the event
+    id; `user_key` (an indexed per-user token) and `day` let `_sparse_rank`
+    scope a match to one user and date range inside SQLite.
+
+    `event_meta_fts` holds the same entries' names, people and places under the
+    `trigram` tokenizer, which indexes every three-character run, so a substring
+    ("park" in "Riverside Park") is an index lookup rather than a LIKE scan.
+    Existing DBs get these via migration; this keeps fresh/test DBs consistent.
     """
     db.session.execute(
         db.text(
             "CREATE VIRTUAL TABLE IF NOT EXISTS event_fts "
-            "USING fts5(event_id UNINDEXED, text, tokenize = 'porter unicode61')"
+            "USING fts5(text, user_key, day UNINDEXED, tokenize = 'porter unicode61')"
+        )
+    )
+    db.session.execute(
+        db.text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS event_meta_fts "
+            "USING fts5(name, people, place, user_key, tokenize = 'trigram')"
         )
     )
 
 
-def index_event(event):
-    """(Re)embed and (re)index a single event. Call after the event is committed."""
-    ensure_fts_table()
-    document = build_document(event)
-    if not document:
-        remove_event(event.id)
-        return
+def _user_key(user_id):
+    return f"u{user_id}"
+
+
+def _fts_day(event):
+    return event.start_time.date().isoformat()
+
+
+def _delete_fts(event_id):
+    db.session.execute(db.text("DELETE FROM event_fts WHERE rowid = :id"), {"id": event_id})
+
+
+def _meta_key(user_id):
+    # Matched as a substring like everything under the trigram tokenizer; the
+    # brackets keep "<12>" from matching inside "<123>".
+    return f"<{user_id}>"
+
+
+def _meta_row(event):
+    """An entry's (name, people, place, user_key) row, its subevents' folded in."""
+    parts = [event, *event.subevents]
+    return tuple(
+        "\n".join(value for part in parts if (value := getattr(part, field)))
+        for field in ("name", "with_who", "where")
+    ) + (_meta_key(event.user_id),)
+
+
+def _sync_meta(events):
+    """Stage `event_meta_fts` rows for the events whose fields changed (caller commits)."""
+    stored = {
+        row[0]: tuple(row[1:])
+        for row in db.session.execute(
+            db.text(
+                "SELECT rowid, name, people, place, user_key FROM event_meta_fts "
+                "WHERE rowid IN (SELECT value FROM json_each(:ids))"
+            ),
+            {"ids": json.dumps([event.id for event in events])},
+        )
+    }
+    for event in events:
+        row = _meta_row(event)
+        if stored.get(event.id) == row:
+            continue
+        _delete_meta(event.id)
+        db.session.execute(
+            db.text(
+                "INSERT INTO event_meta_fts (rowid, name, people, place, user_key) "
+                "VALUES (:id, :name, :people, :place, :user_key)"
+            ),
+            dict(zip(("name", "people", "place", "user_key"), row, strict=True), id=event.id),
+        )
 
-    digest = _source_hash(document)
-    row = db.session.get(EventEmbedding, event.id)
-    if row is not None and row.source_hash == digest and row.model == EMBED_MODEL:
-        return  # text unchanged since last index — nothing to do
 
-    vector = embed_texts([document])[0]
+def _delete_meta(event_id):
+    db.session.execute(
+        db.text("DELETE FROM event_meta_fts WHERE rowid = :id"), {"id": event_id}
+    )
+
+
+_INSERT_VECTOR = (
+    "INSERT INTO embedding_vector "
+    "(source_hash, embedding, model, encoding, scale, exact, created_at) "
+    "VALUES (:digest, :embedding, :model, :encoding, :scale, :exact, CURRENT_TIMESTAMP) "
+    "ON CONFLICT(source_hash) DO NOTHING"
+)
+
+
+def _new_vector(digest, vector):
+    """Insert parameters for a freshly embedded vector, encoded as EMBED_ENCODING."""
+    embedding, scale = vector_codec.encode(vector, EMBED_ENCODING)
+    compact = EMBED_ENCODING != "float32"
+    return {
+        "digest": digest,
+        "embedding": embedding,
+        "model": get_backend().model,
+        "encoding": EMBED_ENCODING,
+        "scale": scale,
+        "exact": vector.tobytes() if compact and EMBED_RESCORE else None,
+    }
+
+
+def _vector_of(stored):
+    """A stored EmbeddingVector as float32 (its exact copy when one is kept)."""
+    if stored.exact is not None:
+        return np.frombuffer(stored.exact, dtype=np.float32)
+    return vector_codec.decode(stored.embedding, stored.encoding, stored.scale)
+
+
+def _vectors_for(texts):
+    """{digest: text} → ({digest: float32 vector}, number embedded).
+
+    Content-addressed: a digest with a stored vector is reused, and each
+    distinct text left over is embedded once, in one model call. Reused
+    vectors are written back too (a no-op while they exist), in the caller's
+    transaction: if another worker pruned one since it was read here, the
+    chunks about to point at it don't end up orphaned.
+    """
+    if not texts:
+        return {}, 0
+    stored = EmbeddingVector.query.filter(EmbeddingVector.source_hash.in_(list(texts))).all()
+    vectors = {row.source_hash: _vector_of(row) for row in stored}
+    params = [
+        {
+            "digest": row.source_hash, "embedding": row.embedding, "model": row.model,
+            "encoding": row.encoding, "scale": row.scale, "exact": row.exact,
+        }
+        for row in stored
+    ]
+    missing = [digest for digest in texts if digest not in vectors]
+    embedded = embed_texts([texts[digest] for digest in missing]) if missing else []
+    for digest, vector in zip(missing, embedded, strict=True):
+        params.append(_new_vector(digest, vector))
+        vectors[digest] = vector
+    db.session.execute(db.text(_INSERT_VECTOR), params)
+    return vectors, len(missing)
+
+
+def _write_embedding(event_id, chunk, digest, row=None):
+    """Point one chunk at its shared vector (caller commits)."""
     if row is None:
-        row = EventEmbedding(event_id=event.id)
+        row = EventEmbedding(event_id=event_id, chunk=chunk)
         db.session.add(row)
-    row.embedding = vector.tobytes()
-    row.model = EMBED_MODEL
     row.source_hash = digest
 
-    db.session.execute(db.text("DELETE FROM event_fts WHERE event_id = :id"), {"id": event.id})
+
+def _prune_vectors(digests=None):
+    """Drop shared vectors no chunk points at any more (all of them if `digests`
+    is None). Caller commits."""
+    if digests is not None and not digests:
+        return
+    db.session.flush()
+    unreferenced = (
+        "NOT EXISTS (SELECT 1 FROM event_embedding e "
+        "WHERE e.source_hash = embedding_vector.source_hash)"
+    )
+    if digests is None:
+        db.session.execute(db.text(f"DELETE FROM embedding_vector WHERE {unreferenced}"))
+        return
+    db.session.execute(
+        db.text(
+            "DELETE FROM embedding_vector "
+            f"WHERE source_hash IN (SELECT value FROM json_each(:digests)) AND {unreferenced}"
+        ),
+        {"digests": json.dumps(sorted(digests))},
+    )
+
+
+def dedup_stats():
+    """How much sharing identical texts saves: chunks vs distinct stored vectors."""
+    chunks = db.session.query(func.count()).select_from(EventEmbedding).scalar()
+    vectors = db.session.query(func.count()).select_from(EmbeddingVector).scalar()
+    return {
+        "chunks": chunks,
+        "vectors": vectors,
+        "dedup_ratio": round(1 - vectors / chunks, 4) if chunks else 0.0,
+    }
+
+
+def _write_fts(event, document):
+    """Stage an event's FTS row (caller commits)."""
+    _delete_fts(event.id)
     db.session.execute(
-        db.text("INSERT INTO event_fts (event_id, text) VALUES (:id, :text)"),
-        {"id": event.id, "text": document},
+        db.text(
+            "INSERT INTO event_fts (rowid, text, user_key, day) "
+            "VALUES (:id, :text, :user_key, :day)"
+        ),
+        {
+            "id": event.id,
+            "text": document,
+            "user_key": _user_key(event.user_id),
+            "day": _fts_day(event),
+        },
     )
+
+
+def _refresh_fts_day(events):
+    """Re-stamp `day` on FTS rows whose text is unchanged but whose event moved."""
+    for event in events:
+        day = _fts_day(event)
+        db.session.execute(
+            db.text("UPDATE event_fts SET day = :day WHERE rowid = :id AND day IS NOT :day"),
+            {"id": event.id, "day": day},
+        )
+
+
+def _commit_and_patch(upserts, removals):
+    """Bump the touched users' generations, commit, then patch this worker's cache.
+
+    `upserts` is {user_id: {event_id: vector}}, `removals` {user_id: [event_id]}.
+    """
+    users = (set(upserts) | set(removals)) - {None}
+    generations = {user_id: _bump_generation(user_id) for user_id in users}
     db.session.commit()
+    for user_id, generation in generations.items():
+        _patch_matrix(user_id, generation, upserts.get(user_id), removals.get(user_id, ()))
+
+
+@dataclass
+class ReindexStats:
+    checked: int = 0
+    embedded: int = 0  # distinct new texts run through the model
+    reused: int = 0  # new/changed chunks served by an already-stored vector
+    removed: int = 0  # orphans / now-empty documents dropped
 
 
-def remove_event(event_id):
-    """Drop an event from both indexes."""
+def index_events(events, stats=None):
+    """Bring a batch of events up to date: one model call, one commit.
+
+    Only new or changed chunks (by `_source_hash`) are embedded; chunks whose
+    subevent is gone, and events left with no text, are dropped. Returns the
+    (updated) ReindexStats.
+    """
     ensure_fts_table()
-    row = db.session.get(EventEmbedding, event_id)
-    if row is not None:
-        db.session.delete(row)
-    db.session.execute(db.text("DELETE FROM event_fts WHERE event_id = :id"), {"id": event_id})
-    db.session.commit()
+    stats = stats if stats is not None else ReindexStats()
+    stored = defaultdict(dict)  # event id -> {chunk: row}
+    for row in EventEmbedding.query.options(joinedload(EventEmbedding.vector)).filter(
+        EventEmbedding.event_id.in_([event.id for event in events])
+    ):
+        stored[row.event_id][row.chunk] = row
+    stale, touched, unchanged = [], [], []
+    released = set()  # digests that lost a reference
+    removals = defaultdict(list)
+    for event in events:
+        chunks = build_chunks(event)
+        rows = stored.get(event.id, {})
+        gone = [row for chunk, row in rows.items() if chunk not in chunks]
+        for row in gone:
+            released.add(row.source_hash)
+            db.session.delete(row)
+        if not chunks:
+            if rows:
+                _delete_fts(event.id)
+                removals[event.user_id].append(event.id)
+                stats.removed += 1
+            continue
+        changed = []
+        for chunk, text in chunks.items():
+            digest = _source_hash(text)
+            row = rows.get(chunk)
+            if row is None or row.source_hash != digest:  # the digest covers the model
+                changed.append((event.id, chunk, text, digest, row))
+                if row is not None:
+                    released.add(row.source_hash)
+        if changed or gone:
+            stale.extend(changed)
+            touched.append((event, chunks))
+        else:
+            unchanged.append(event)
 
+    _refresh_fts_day(unchanged)
+    _sync_meta(events)
+    vectors, embedded = _vectors_for({digest: text for _, _, text, digest, _ in stale})
+    fresh = {}
+    for event_id, chunk, _text, digest, row in stale:
+        _write_embedding(event_id, chunk, digest, row)
+        fresh[event_id, chunk] = vectors[digest]
+    upserts = defaultdict(dict)
+    for event, chunks in touched:
+        _write_fts(event, build_document(event))
+        # The cached matrix swaps whole events, so unchanged chunks ride along.
+        upserts[event.user_id][event.id] = np.stack([
+            fresh[event.id, chunk] if (event.id, chunk) in fresh
+            else _vector_of(stored[event.id][chunk].vector)
+            for chunk in sorted(chunks)
+        ])
+    _prune_vectors(released)
+    _commit_and_patch(upserts, removals)
+    stats.checked += len(events)
+    stats.embedded += embedded
+    stats.reused += len(stale) - embedded
+    return stats
 
-def index_event_safe(event):
-    """Index hook for request paths — never let an index error break CRUD."""
-    try:
-        index_event(event)
-    except Exception:
-        db.session.rollback()
-        current_app.logger.exception("Failed to index event %s", getattr(event, "id", "?"))
 
+def index_event(event):
+    """(Re)embed and (re)index a single event. Call after the event is committed."""
+    index_events([event])
+
+
+def remove_event(event_id, user_id=None):
+    """Drop an event from the indexes. `user_id` is looked up if not given."""
+    if user_id is None:
+        event = db.session.get(Event, event_id)
+        user_id = event.user_id if event is not None else None
+    remove_events({event_id: user_id})
+
+
+def remove_events(owners):
+    """Drop several events from the indexes in one commit.
+
+    `owners` maps event id → owning user id (None if unknown), so the owners'
+    cached matrices are invalidated even when the events are already deleted.
+    """
+    ensure_fts_table()
+    if not owners:
+        return
+    doomed = EventEmbedding.query.filter(EventEmbedding.event_id.in_(list(owners)))
+    released = {row.source_hash for row in doomed}
+    doomed.delete(synchronize_session="fetch")
+    _prune_vectors(released)
+    removals = defaultdict(list)
+    for event_id, user_id in owners.items():
+        _delete_fts(event_id)
+        _delete_meta(event_id)
+        removals[user_id].append(event_id)
+    _commit_and_patch({}, removals)
+
+
+def _iter_event_batches(batch_size):
+    """Every event (subevents eager-loaded), in id order, `batch_size` at a time.
+
+    Keyset pagination on the primary key: each page is an index range scan, and
+    a page's objects are expunged once it's processed so memory stays flat for
+    any corpus.
+    """
+    last_id = 0
+    while True:
+        batch = (
+            Event.query.options(selectinload(Event.subevents))
+            .filter(Event.id > last_id)
+            .order_by(Event.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            return
+        last_id = batch[-1].id
+        yield batch
+        for event in batch:
+            db.session.expunge(event)  # cascades to its subevents
 
-def remove_event_safe(event_id):
-    try:
-        remove_event(event_id)
-    except Exception:
-        db.session.rollback()
-        current_app.logger.exception("Failed to de-index event %s", event_id)
 
+def _index_batch(events):
+    """Embed a page of events in one model call and write it in one transaction.
 
-def reindex_all():
-    """Rebuild both indexes for every event. Returns the count indexed."""
+    Texts already embedded (by an earlier batch, or twice in this one) are reused.
+    """
+    chunks = [
+        (event, chunk, _source_hash(text), text)
+        for event in events
+        for chunk, text in build_chunks(event).items()
+    ]
+    _vectors_for({digest: text for _, _, digest, text in chunks})
+    for event, chunk, digest, _text in chunks:
+        _write_embedding(event.id, chunk, digest)
+    for event in dict.fromkeys(event for event, _, _, _ in chunks):
+        _write_fts(event, build_document(event))
+    _sync_meta(events)
+    for user_id in {event.user_id for event in events if event.user_id is not None}:
+        _bump_generation(user_id)
+    db.session.commit()
+
+
+def reindex_all(batch_size=REINDEX_BATCH_SIZE, progress=None):
+    """Rebuild the indexes for every event. Returns the count indexed.
+
+    Streams events in keyset-paginated batches; each batch is one `embed_texts`
+    call and one commit. `progress(done, total, elapsed_seconds)` is called after
+    every batch, for CLI reporting.
+    """
     ensure_fts_table()
     db.session.execute(db.text("DELETE FROM event_fts"))
+    db.session.execute(db.text("DELETE FROM event_meta_fts"))
     db.session.query(EventEmbedding).delete()
+    db.session.query(EmbeddingVector).delete()
+    db.session.execute(db.text("UPDATE search_generation SET generation = generation + 1"))
     db.session.commit()
-    events = Event.query.options(selectinload(Event.subevents)).all()
-    for event in events:
-        index_event(event)
-    return len(events)
+
+    total = db.session.query(func.count(Event.id)).scalar()
+    started = time.perf_counter()
+    done = 0
+    for batch in _iter_event_batches(batch_size):
+        _index_batch(batch)
+        done += len(batch)
+        if progress is not None:
+            progress(done, total, time.perf_counter() - started)
+    refresh_centroids()
+    return done
+
+
+def reindex_changed(batch_size=REINDEX_BATCH_SIZE, progress=None):
+    """Bring the indexes up to date without wiping them. Returns ReindexStats.
+
+    Diffs each chunk's current `_source_hash` against the stored one and
+    re-embeds only new or changed texts; unchanged rows are never touched,
+    so search keeps working throughout. Rows for deleted events are dropped.
+    """
+    ensure_fts_table()
+    stats = ReindexStats()
+    total = db.session.query(func.count(Event.id)).scalar()
+    started = time.perf_counter()
+    for batch in _iter_event_batches(batch_size):
+        index_events(batch, stats)
+        if progress is not None:
+            progress(stats.checked, total, time.perf_counter() - started)
+
+    orphans = db.session.execute(
+        db.text("DELETE FROM event_embedding WHERE event_id NOT IN (SELECT id FROM events)")
+    ).rowcount
+    for table in ("event_fts", "event_meta_fts"):
+        db.session.execute(
+            db.text(f"DELETE FROM {table} WHERE rowid NOT IN (SELECT id FROM events)")
+        )
+    _prune_vectors()
+    if orphans:
+        # The deleted events' owners are unknown now; invalidate every cache.
+        db.session.execute(db.text("UPDATE search_generation SET generation = generation + 1"))
+        stats.removed += orphans
+    db.session.commit()
+    refresh_centroids()
+    return stats
+
+
+def convert_embeddings(batch_size=REINDEX_BATCH_SIZE, progress=None):
+    """Re-encode stored vectors into EMBED_ENCODING without re-embedding.
+
+    Walks embedding_vector in primary-key pages, one commit each; vectors
+    already in the target encoding are left alone. A float32 copy for rescoring
+    can only be kept for vectors that were float32 to begin with. Returns the
+    number of vectors converted.
+    """
+    total = db.session.query(func.count(EmbeddingVector.source_hash)).filter(
+        EmbeddingVector.encoding != EMBED_ENCODING
+    ).scalar()
+    started = time.perf_counter()
+    converted, last_hash = 0, ""
+    while True:
+        batch = (
+            EmbeddingVector.query.filter(
+                EmbeddingVector.source_hash > last_hash,
+                EmbeddingVector.encoding != EMBED_ENCODING,
+            )
+            .order_by(EmbeddingVector.source_hash)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+        last_hash = batch[-1].source_hash
+        for row in batch:
+            vector = vector_codec.decode(row.embedding, row.encoding, row.scale)
+            if row.encoding == "float32" and EMBED_RESCORE:
+                row.exact = row.embedding
+            elif EMBED_ENCODING == "float32":
+                row.exact = None
+            row.embedding, row.scale = vector_codec.encode(vector, EMBED_ENCODING)
+            row.encoding = EMBED_ENCODING
+        db.session.commit()
+        for row in batch:
+            db.session.expunge(row)
+        converted += len(batch)
+        if progress is not None:
+            progress(converted, total, time.perf_counter() - started)
+    if converted:
+        db.session.execute(db.text("UPDATE search_generation SET generation = generation + 1"))
+        db.session.commit()
+    return converted
 
 
 # --- querying -------------------------------------------------------------
 
 
-def _candidate_events(user_id, *, date_from, date_to, mood, who, who_op, where):
-    """Metadata-filtered, user-scoped events, newest first."""
-    query = Event.query.filter(Event.user_id == user_id)  # excludes NULL user_id
+def _candidate_events(user_id, *, date_from, date_to, mood, who, who_op, where, limit=None):
+    """Metadata-filtered, user-scoped (id, start_time) rows, newest first.
+
+    Ids only: full Event rows are hydrated later, and only for what's returned.
+    """
+    where_ids = _where_ids(user_id, where) if where else None
+    owner = Event.user_id == user_id  # excludes NULL user_id
+    if (where_ids is not None or mood) and date_from is None and date_to is None:
+        # No date range to walk ix_events_user_start by: let the matched ids
+        # drive the lookup by primary key instead (`+ 0` keeps SQLite off the index).
+        owner = Event.user_id + 0 == user_id
+    query = db.session.query(Event.id, Event.start_time).filter(owner)
     if date_from is not None:
         query = query.filter(Event.start_time >= date_from)
     if date_to is not None:
         query = query.filter(Event.start_time < date_to)
     if who:
-        # `who` is one or more names; with_who is a comma-separated string, so each
-        # name is a substring match. "and" → all present, "or" → any present.
-        clauses = [Event.with_who.ilike(f"%{name}%") for name in who]
-        query = query.filter(or_(*clauses) if who_op == "or" else and_(*clauses))
-    if where:
+        # `who` is one or more names, matched whole against the parsed people
+        # index (vocabulary.py) of the entry and its subevents — an indexed join,
+        # and "Al" no longer matches "Alice". "and" → all present, "or" → any.
+        query = query.filter(Event.id.in_(vocabulary.events_with(user_id, who, who_op)))
+    if where_ids is not None:
+        query = query.filter(Event.id.in_(_json_ids(where_ids)))
+    elif where:  # too short for a trigram: the live column, as a scan
         query = query.filter(Event.where.ilike(f"%{where}%"))
     if mood:
-        query = query.join(
-            DailyLog,
-            and_(
-                DailyLog.user_id == Event.user_id,
-                DailyLog.date == func.date(Event.start_time),
-            ),
-        ).filter(DailyLog.mood_key == mood)
-    return query.order_by(Event.start_time.desc()).all()
+        query = query.filter(Event.id.in_(_mood_event_ids(user_id, mood)))
+    query = query.order_by(Event.start_time.desc(), Event.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query.all()
 
 
-def _dense_rank(query_text, user_id, candidate_ids):
-    """Event ids ranked by cosine similarity to the query (best first)."""
-    rows = (
-        db.session.query(EventEmbedding.event_id, EventEmbedding.embedding)
-        .join(Event, Event.id == EventEmbedding.event_id)
-        .filter(Event.user_id == user_id)
-        .all()
+def _mood_event_ids(user_id, mood):
+    """A subquery of the user's event ids on any day they logged `mood`.
+
+    Driven from the mood's days: each is one ix_events_user_day lookup, and
+    only multi-day events (their own partial index) are checked against every
+    day they cover, so a trip counts toward the mood of each of its days.
+    """
+    days = db.select(DailyLog.date).where(DailyLog.user_id == user_id, DailyLog.mood_key == mood)
+    spanned = db.select(DailyLog.id).where(
+        DailyLog.user_id == user_id,
+        DailyLog.mood_key == mood,
+        DailyLog.date.between(Event.start_day, Event.end_day),
     )
-    rows = [r for r in rows if r[0] in candidate_ids]
-    if not rows:
+    return db.union_all(
+        db.select(Event.id).where(Event.user_id == user_id, Event.start_day.in_(days)),
+        db.select(Event.id).where(
+            Event.user_id == user_id, Event.end_day > Event.start_day, spanned.exists()
+        ),
+    )
+
+
+def _json_ids(ids):
+    """An id set as a subquery (one bound JSON parameter, however many ids)."""
+    return db.select(db.column("value")).select_from(
+        func.json_each(db.literal(json.dumps(sorted(ids))))
+    )
+
+
+def _trigrams(text):
+    text = text.casefold()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _meta_match(user_id, match, columns="rowid"):
+    """`columns` of the user's `event_meta_fts` rows whose place matches `match`."""
+    return db.session.execute(
+        db.text(f"SELECT {columns} FROM event_meta_fts WHERE event_meta_fts MATCH :q"),
+        {"q": f"user_key:{_phrase(_meta_key(user_id))} AND place:({match})"},
+    ).all()
+
+
+def _similar(wanted, place):
+    return len(wanted & _trigrams(place or "")) >= WHERE_FUZZY * len(wanted)
+
+
+def _where_ids(user_id, where):
+    """Ids of the user's entries whose place, or a subevent's, contains `where`.
+
+    Answered from the trigram index. If nothing contains it, the places sharing
+    most of its trigrams (a typo) are used instead. Entries still queued for
+    indexing are matched on their live fields. None if `where` is too short
+    to have a trigram.
+    """
+    wanted = _trigrams(where)
+    if not wanted:
+        return None
+    queued = _queued_ids(user_id)
+    live = [(event.id, _meta_row(event)[2]) for event in _hydrate(sorted(queued))]
+    key = where.casefold()
+    ids = {rowid for (rowid,) in _meta_match(user_id, _phrase(where))} - queued
+    ids |= {event_id for event_id, place in live if key in place.casefold()}
+    if ids or not WHERE_FUZZY:
+        return ids
+    near = _meta_match(
+        user_id, " OR ".join(_phrase(gram) for gram in sorted(wanted)), "rowid, place"
+    )
+    ids = {rowid for rowid, place in near if rowid not in queued and _similar(wanted, place)}
+    return ids | {event_id for event_id, place in live if _similar(wanted, place)}
+
+
+def _hydrate(event_ids):
+    """Load full Events for `event_ids` in one IN query, preserving their order."""
+    if not event_ids:
+        return []
+    by_id = {e.id: e for e in Event.query.filter(Event.id.in_(list(event_ids))).all()}
+    return [by_id[eid] for eid in event_ids if eid in by_id]
+
+
+def _dense_rank(query_text, user_id, candidate_ids, trace=None):
+    """Event ids ranked by cosine similarity to the query (best first)."""
+    trace = trace if trace is not None else SearchTrace()
+    entry = _user_matrix(user_id)
+    if not len(entry.ids) or not candidate_ids:
+        return []
+    wanted = np.fromiter(candidate_ids, dtype=np.int64, count=len(candidate_ids))
+    rows = np.flatnonzero(np.isin(entry.ids, wanted))
+    if not len(rows):
         return []
-    ids = [r[0] for r in rows]
-    matrix = np.stack([np.frombuffer(r[1], dtype=np.float32) for r in rows])
-    scores = matrix @ embed_query(query_text)
-    ranked = [(ids[i], float(scores[i])) for i in np.argsort(-scores)]
-    return [eid for eid, score in ranked if score >= DENSE_MIN_SCORE]
+    with trace.stage("embed"):
+        query = embed_query(query_text)
+    if entry.centroids is not None and len(rows) >= ANN_MIN_ROWS:
+        cells = vector_index.probe(query, entry.centroids, ANN_NPROBE)
+        rows = rows[np.isin(entry.lists[rows], cells)]
+    scores = vector_codec.score(entry.matrix, entry.scales, query, rows)
+    event_ids, scores = _max_per_event(entry.ids[rows], scores)
+    if EMBED_RESCORE and entry.matrix.dtype != np.float32:
+        _rescore(event_ids, scores, query)
+    order = np.argsort(-scores)
+    return [int(event_ids[i]) for i in order if scores[i] >= DENSE_MIN_SCORE]
+
+
+def _max_per_event(event_ids, scores):
+    """Max-sim: each event scores as its best chunk → (unique event ids, scores)."""
+    order = np.argsort(-scores, kind="stable")
+    unique, first = np.unique(event_ids[order], return_index=True)
+    return unique, scores[order[first]]
+
+
+def _rescore(event_ids, scores, query):
+    """Replace the top EMBED_RESCORE compact scores with exact float32 ones, in place.
+
+    One read of the top events' stored float32 chunk copies; events without one
+    (e.g. converted from int8) keep their approximate score.
+    """
+    top = np.argsort(-scores)[:EMBED_RESCORE]
+    by_id = {int(event_ids[i]): i for i in top}
+    exact = (
+        db.session.query(EventEmbedding.event_id, EmbeddingVector.exact)
+        .join(EmbeddingVector, EmbeddingVector.source_hash == EventEmbedding.source_hash)
+        .filter(EventEmbedding.event_id.in_(list(by_id)), EmbeddingVector.exact.isnot(None))
+    )
+    best = {}
+    for event_id, blob in exact:
+        score = float(np.frombuffer(blob, dtype=np.float32) @ query)
+        best[event_id] = max(score, best.get(event_id, score))
+    for event_id, score in best.items():
+        scores[by_id[event_id]] = score
 
 
 def _fts_match(query_text):
@@ -231,19 +1192,104 @@ def _fts_match(query_text):
     return " OR ".join(f'"{t}"' for t in tokens)
 
 
-def _sparse_rank(query_text, candidate_ids):
-    """Event ids ranked by BM25 lexical relevance (best first)."""
+def _sparse_rank(query_text, user_id, *, date_from=None, date_to=None, only=None,
+                 exclude=(), depth=SPARSE_DEPTH, conn=None):
+    """Event ids ranked by BM25 lexical relevance (best first), at most `depth`.
+
+    The user scope is part of the MATCH itself (the indexed `user_key` token),
+    so cost scales with one user's matches, not the household's. The date range
+    and any id restriction (`only` / `exclude`) are applied in the same
+    statement, and only the top `depth` rows leave SQLite. Runs on the session
+    unless given a connection of its own (`conn`).
+    """
     match = _fts_match(query_text)
     if not match:
         return []
-    rows = db.session.execute(
+    clauses = ["event_fts MATCH :q"]
+    params = {"q": f'user_key:"{_user_key(user_id)}" AND text:({match})', "k": depth}
+    if date_from is not None:
+        clauses.append("day >= :day_from")
+        params["day_from"] = date_from.date().isoformat()
+    if date_to is not None:
+        # `day` is a date, so a bound with a time of day keeps its whole day;
+        # callers drop anything outside their candidate set afterwards.
+        midnight = date_to.time() == datetime.min.time()
+        last = date_to.date() if midnight else date_to.date() + timedelta(days=1)
+        clauses.append("day < :day_to")
+        params["day_to"] = last.isoformat()
+    if only is not None:
+        clauses.append("rowid IN (SELECT value FROM json_each(:only))")
+        params["only"] = json.dumps(sorted(only))
+    if exclude:
+        clauses.append("rowid NOT IN (SELECT value FROM json_each(:exclude))")
+        params["exclude"] = json.dumps(sorted(exclude))
+    rows = (conn if conn is not None else db.session).execute(
         db.text(
-            "SELECT event_id, bm25(event_fts) AS rank "
-            "FROM event_fts WHERE event_fts MATCH :q ORDER BY rank"
+            # Weight 0 on user_key: the scoping token must not sway relevance.
+            "SELECT rowid, bm25(event_fts, 1.0, 0.0) AS rank FROM event_fts "
+            f"WHERE {' AND '.join(clauses)} ORDER BY rank LIMIT :k"
         ),
-        {"q": match},
+        params,
     ).all()
-    return [r[0] for r in rows if r[0] in candidate_ids]
+    return [r[0] for r in rows]
+
+
+_leg_pool = None
+_leg_pool_lock = threading.Lock()
+
+
+def _legs():
+    # Created on first use, so each gunicorn worker gets its own after the fork.
+    global _leg_pool
+    with _leg_pool_lock:
+        if _leg_pool is None:
+            _leg_pool = ThreadPoolExecutor(SEARCH_LEG_THREADS, thread_name_prefix="search-leg")
+    return _leg_pool
+
+
+def _sparse_leg(engine, query_text, user_id, **filters):
+    """`_sparse_rank` on a pooled connection of its own → (ids, ms taken).
+
+    Runs on the leg pool with no app context, hence the engine passed in.
+    """
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        ranked = _sparse_rank(query_text, user_id, conn=conn, **filters)
+    return ranked, (time.perf_counter() - started) * 1000
+
+
+def _queued_ids(user_id):
+    """The user's entries waiting in the index outbox (their index rows are stale)."""
+    rows = db.session.query(IndexOutbox.event_id).filter(IndexOutbox.user_id == user_id).all()
+    return {r[0] for r in rows}
+
+
+def _pending_ids(user_id, candidate_ids):
+    """Candidates still waiting in the index outbox."""
+    return _queued_ids(user_id) & candidate_ids
+
+
+def _token_hit(query_token, doc_tokens):
+    # Loose stand-in for FTS5's porter stemming: "running" still finds "run".
+    if len(query_token) < 3:
+        return query_token in doc_tokens
+    return any(
+        len(t) >= 3 and (t.startswith(query_token) or query_token.startswith(t))
+        for t in doc_tokens
+    )
+
+
+def _pending_rank(query_text, events):
+    """Lexical-only ranking of not-yet-indexed events, over their live text."""
+    tokens = {t.lower() for t in re.findall(r"\w+", query_text, flags=re.UNICODE)}
+    scored = []
+    for event in events:
+        doc_tokens = set(re.findall(r"\w+", build_document(event).lower(), flags=re.UNICODE))
+        hits = sum(1 for t in tokens if _token_hit(t, doc_tokens))
+        if hits:
+            scored.append((hits, event.id))
+    scored.sort(key=lambda hit: hit[0], reverse=True)
+    return [eid for _, eid in scored]
 
 
 def _rrf(*ranked_lists):
@@ -256,31 +1302,66 @@ def _rrf(*ranked_lists):
 
 
 def search(user_id, q=None, *, date_from=None, date_to=None, mood=None,
-           who=None, who_op="and", where=None, limit=20):
+           who=None, who_op="and", where=None, limit=20, trace=None):
     """Hybrid search. Returns [(Event, score|None)] best first.
 
     `who` is a name or list of names; `who_op` ("and"/"or") sets how multiple
     combine. With no query text, returns the metadata-filtered candidates by
     recency (score None). With query text, fuses dense + sparse rankings via RRF.
+    Stage timings and candidate/hit counts are recorded on `trace` if given.
     """
+    trace = trace if trace is not None else SearchTrace()
     ensure_fts_table()
     q = (q or "").strip()
     if isinstance(who, str):
         who = [who]
 
-    candidates = _candidate_events(
-        user_id, date_from=date_from, date_to=date_to, mood=mood,
-        who=who, who_op=who_op, where=where,
-    )
-    if not candidates:
-        return []
-    by_id = {e.id: e for e in candidates}
-
+    filters = {
+        "date_from": date_from, "date_to": date_to, "mood": mood,
+        "who": who, "who_op": who_op, "where": where,
+    }
     if not q:
-        return [(e, None) for e in candidates[:limit]]
+        with trace.stage("candidates"):
+            rows = _candidate_events(user_id, **filters, limit=limit)
+        trace.count("candidates", len(rows))
+        with trace.stage("hydrate"):
+            return [(e, None) for e in _hydrate([r.id for r in rows])]
 
-    candidate_ids = set(by_id)
-    dense = _dense_rank(q, user_id, candidate_ids)
-    sparse = _sparse_rank(q, candidate_ids)
-    fused = _rrf(dense, sparse)[:limit]
-    return [(by_id[eid], score) for eid, score in fused if eid in by_id]
+    with trace.stage("candidates"):
+        candidate_ids = {r.id for r in _candidate_events(user_id, **filters)}
+        # Entries still queued for indexing have stale (or no) vectors/FTS rows, so
+        # they're matched lexically on their live text until the indexer catches up.
+        pending = _pending_ids(user_id, candidate_ids) if candidate_ids else set()
+    trace.count("candidates", len(candidate_ids))
+    if not candidate_ids:
+        return []
+    candidate_ids -= pending
+    # User + date scoping happens inside the FTS query; the candidate ids are
+    # only shipped to SQLite when mood/who/where narrowed them further.
+    sparse_filters = {
+        "date_from": date_from, "date_to": date_to,
+        "only": candidate_ids if (mood or who or where) else None,
+        "exclude": pending, "depth": max(SPARSE_DEPTH, limit),
+    }
+    if SEARCH_PARALLEL and _index_dir() is not None:
+        leg = _legs().submit(_sparse_leg, db.engine, q, user_id, **sparse_filters)
+        with trace.stage("dense"):
+            dense = _dense_rank(q, user_id, candidate_ids, trace)
+        with trace.stage("sparse_wait"):  # the part of the keyword leg not hidden
+            sparse, sparse_ms = leg.result()
+        trace.add("sparse", sparse_ms)
+    else:
+        with trace.stage("dense"):
+            dense = _dense_rank(q, user_id, candidate_ids, trace)
+        with trace.stage("sparse"):
+            sparse = _sparse_rank(q, user_id, **sparse_filters)
+    sparse = [eid for eid in sparse if eid in candidate_ids]
+    with trace.stage("pending"):
+        fresh = _pending_rank(q, _hydrate(sorted(pending)))
+    trace.count("dense_hits", len(dense))
+    trace.count("sparse_hits", len(sparse))
+    trace.count("pending", len(pending))
+    fused = _rrf(dense, sparse, fresh)[:limit]
+    scores = dict(fused)
+    with trace.stage("hydrate"):
+        return [(e, scores[e.id]) for e in _hydrate([eid for eid, _ in fused])]
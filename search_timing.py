@@ -0,0 +1,117 @@
+"""Stage timings for the search pipeline, per request and rolled up per worker.
+
+A `SearchTrace` rides along one /search/data request: each `stage()` block adds
+its wall time under a name, and `count()` notes sizes along the way (candidates,
+dense hits, ...). Nested stages are subtracted from their parent, so the stages
+of one request add up to its total — except legs run on another thread
+(`add()`), which overlap the rest by design. Finished traces feed a bounded window per
+stage that `percentiles()` reads back (the /search/status payload), and every
+`TIMING_LOG_EVERY` searches the same summary is logged.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Most recent searches kept per stage for the rolling percentiles.
+TIMING_WINDOW = int(os.environ.get("SEARCH_TIMING_WINDOW", "1000"))
+# Log the rolling percentiles every this many searches (0 = never).
+TIMING_LOG_EVERY = int(os.environ.get("SEARCH_TIMING_LOG_EVERY", "500"))
+_PERCENTILES = (50, 95, 99)
+
+
+class SearchTrace:
+    def __init__(self):
+        self.timings = {}  # stage -> ms, in the order stages first ran
+        self.counts = {}
+        self._started = time.perf_counter()
+        self._nested = []  # seconds spent in child stages, one slot per open stage
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        self.timings.setdefault(name, 0.0)  # listed where it starts, not where it ends
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            own = elapsed - self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+            self.timings[name] += own * 1000
+
+    def add(self, name, ms):
+        """Record a stage timed elsewhere (on another thread, overlapping the rest)."""
+        self.timings[name] = self.timings.get(name, 0.0) + ms
+
+    def count(self, name, value):
+        self.counts[name] = value
+
+    def total_ms(self):
+        return (time.perf_counter() - self._started) * 1000
+
+    def server_timing(self):
+        """The `Server-Timing` header value: one metric per stage, then the total."""
+        metrics = [f"{name};dur={ms:.1f}" for name, ms in self.timings.items()]
+        metrics.append(f"total;dur={self.total_ms():.1f}")
+        return ", ".join(metrics)
+
+    def debug(self):
+        """Per-stage ms and counts for the `debug=1` search payload."""
+        timings = {name: round(ms, 2) for name, ms in self.timings.items()}
+        timings["total"] = round(self.total_ms(), 2)
+        return {"timings_ms": timings, "counts": dict(self.counts)}
+
+
+class StageStats:
+    """Rolling per-stage latency windows for this worker."""
+
+    def __init__(self, window=TIMING_WINDOW):
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+        self.searches = 0
+
+    def record(self, trace):
+        """Add a finished trace. Returns how many searches have been recorded."""
+        with self._lock:
+            for name, ms in trace.timings.items():
+                self._samples[name].append(ms)
+            self._samples["total"].append(trace.total_ms())
+            self.searches += 1
+            return self.searches
+
+    def percentiles(self):
+        with self._lock:
+            samples = {name: np.fromiter(window, dtype=np.float64)
+                       for name, window in self._samples.items()}
+        summary = {}
+        for name, values in samples.items():
+            points = np.percentile(values, _PERCENTILES)
+            summary[name] = {"count": len(values)} | {
+                f"p{p}": round(float(ms), 2) for p, ms in zip(_PERCENTILES, points, strict=True)
+            }
+        return summary
+
+
+_stats = StageStats()
+
+
+def record(trace):
+    """Fold a finished request's trace into the rolling percentiles."""
+    searches = _stats.record(trace)
+    if TIMING_LOG_EVERY and searches % TIMING_LOG_EVERY == 0:
+        logger.info("search stage timings over the last %d searches (ms): %s",
+                    min(searches, TIMING_WINDOW), _stats.percentiles())
+
+
+def percentiles():
+    """{stage: {count, p50, p95, p99}} in ms over this worker's recent searches."""
+    return _stats.percentiles()
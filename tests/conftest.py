@@ -14,6 +14,7 @@ def app(tmp_path):
         "TESTING": True,
         "SECRET_KEY": "test-secret",
         "ATTACHMENT_DIR": str(attachment_dir),
+        "SEARCH_INDEX_WORKER": "inline",
     })
     with app.app_context():
         db.create_all()
@@ -0,0 +1,114 @@
+import random
+from datetime import date, datetime, timedelta
+from io import BytesIO
+from types import SimpleNamespace
+
+import numpy as np
+
+import day_summary
+from models import DaySummary, Event, User, db
+
+
+def _user_id():
+    return db.session.execute(db.select(User.id).where(User.username == "grey")).scalar_one()
+
+
+def _rows():
+    return {
+        row.date: (row.event_count, row.mood_key, row.has_marker, row.attachment_count)
+        for row in DaySummary.query.order_by(DaySummary.date)
+    }
+
+
+def test_write_paths_keep_the_summary_in_step(authed_client):
+    authed_client.post("/events", json={
+        "name": "Trip", "start_date": "30-04-2026", "start_time": "09:00",
+        "end_date": "02-05-2026", "end_time": "18:00",
+    })
+    authed_client.post("/events", json={
+        "name": "Lunch", "start_date": "02-05-2026", "start_time": "12:00",
+        "end_date": "02-05-2026", "end_time": "13:00",
+    })
+    authed_client.post("/mood/update", json={"year": 2026, "month": 5, "day": 2, "mood": "great"})
+    authed_client.post("/mood/marker/toggle", json={"year": 2026, "month": 5, "day": 7})
+    authed_client.post("/attachments", data={
+        "year": 2026, "month": 5, "day": 7, "file": (BytesIO(b"PNG"), "a.png", "image/png"),
+    }, content_type="multipart/form-data")
+
+    assert _rows() == {
+        date(2026, 4, 30): (1, None, False, 0),
+        date(2026, 5, 1): (1, None, False, 0),
+        date(2026, 5, 2): (2, "great", False, 0),
+        date(2026, 5, 7): (0, None, True, 1),
+    }
+    assert day_summary.check() == []
+    month = authed_client.get("/get_month?year=2026&month=5").get_json()
+    assert month["days_with_events"] == [1, 2]
+    assert month["days_with_marker"] == [7]
+    assert list(month["mood_colors"]) == ["2"]
+
+    trip = Event.query.filter_by(name="Trip").one()
+    authed_client.put(f"/events/{trip.id}", json={
+        "name": "Trip", "start_date": "01-05-2026", "start_time": "09:00",
+        "end_date": "01-05-2026", "end_time": "18:00",
+    })
+    authed_client.delete(f"/events/{trip.id}")
+    authed_client.post("/mood/update", json={"year": 2026, "month": 5, "day": 2, "mood": None})
+    attachment = authed_client.get("/attachments?year=2026&month=5&day=7").get_json()
+    authed_client.delete(f"/attachments/{attachment['attachments'][0]['id']}")
+    authed_client.post("/mood/marker/toggle", json={"year": 2026, "month": 5, "day": 7})
+
+    assert _rows() == {date(2026, 5, 2): (1, None, False, 0)}  # empty days keep no row
+    assert day_summary.check() == []
+    year = authed_client.get("/get_year?year=2026").get_json()["months"]
+    assert [m["days_with_events"] for m in year[3:5]] == [[], [2]]
+
+
+def test_check_reports_drift_and_rebuild_repairs_it(authed_client):
+    authed_client.post("/events", json={
+        "name": "Lunch", "start_date": "11-05-2026", "start_time": "12:00",
+        "end_date": "11-05-2026", "end_time": "13:00",
+    })
+    uid = _user_id()
+    db.session.execute(db.text(
+        "UPDATE events SET start_time = '2026-05-10 12:00:00.000000', "
+        "end_time = '2026-05-10 13:00:00.000000'"
+    ))
+    db.session.commit()
+
+    assert day_summary.check(uid) == [
+        (uid, date(2026, 5, 10), None, (1, None, False, 0)),
+        (uid, date(2026, 5, 11), (1, None, False, 0), None),
+    ]
+    assert day_summary.rebuild(uid) == 1
+    db.session.commit()
+    assert day_summary.check() == []
+    assert _rows() == {date(2026, 5, 10): (1, None, False, 0)}
+
+
+def test_event_day_counts_match_a_day_by_day_walk():
+    rng = random.Random(7)
+    events = []
+    for _ in range(300):
+        start = datetime(2026, 1, 1) + timedelta(hours=rng.randint(0, 24 * 120))
+        end = rng.choice([None, start + timedelta(hours=rng.randint(-30, 24 * 20))])
+        events.append(SimpleNamespace(start_time=start, end_time=end))
+    start, end = date(2026, 2, 1), date(2026, 3, 1)
+
+    walked = [0] * (end - start).days
+    for event in events:
+        day = max(event.start_time.date(), start)
+        while day <= min((event.end_time or event.start_time).date(), end - timedelta(days=1)):
+            walked[(day - start).days] += 1
+            day += timedelta(days=1)
+
+    assert day_summary.event_day_counts(events, start, end).tolist() == walked
+    assert day_summary.event_day_counts([], start, end).tolist() == [0] * 28
+
+
+def test_day_counts_clip_spans_to_the_window():
+    origin = date(2026, 5, 1).toordinal()
+    first = np.array([origin - 3, origin + 1, origin + 2, origin + 9])
+    last = np.array([origin + 1, origin + 1, origin + 1, origin + 20])  # third one inverted
+    counts = day_summary.day_counts(first, last, date(2026, 5, 1), date(2026, 5, 11))
+    assert counts.tolist() == [1, 2, 0, 0, 0, 0, 0, 0, 0, 1]
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import embedding_backend
+import search_index
+from embedding_backend import FakeBackend, SidecarBackend, SidecarServer
+
+
+class _CountingBackend(FakeBackend):
+    def __init__(self):
+        super().__init__(dim=8)
+        self.batches = []
+
+    def embed(self, texts, kind="passage"):
+        self.batches.append((kind, len(texts)))
+        time.sleep(0.02)  # a forward pass takes a while; requests pile up meanwhile
+        return super().embed(texts, kind)
+
+
+@pytest.fixture
+def sidecar(tmp_path):
+    backend = _CountingBackend()
+    server = SidecarServer(str(tmp_path / "embed.sock"), backend, max_wait=0.05)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, backend
+    server.shutdown()
+    server.server_close()
+
+
+def test_fake_backend_is_deterministic():
+    backend = FakeBackend(dim=16)
+    a, b, c = backend.embed(["gym", "gym", "dinner with Mom"])
+    assert np.array_equal(a, b)
+    assert not np.array_equal(a, c)
+
+
+def test_embed_functions_use_configured_backend(monkeypatch):
+    monkeypatch.setattr(embedding_backend, "_backend", FakeBackend(dim=16))
+    monkeypatch.setattr(search_index, "_query_caches", {})
+    (doc,) = search_index.embed_texts(["gym"])
+    assert doc.shape == (16,) and np.isclose(np.linalg.norm(doc), 1.0)
+    assert np.allclose(search_index.embed_query("gym"), doc)
+
+
+def test_sidecar_round_trip(sidecar):
+    server, _ = sidecar
+    client = SidecarBackend(server.server_address)
+    vectors = client.embed(["gym", "dinner"])
+    assert [v.tolist() for v in vectors] == [v.tolist() for v in FakeBackend(8).embed(
+        ["gym", "dinner"])]
+    assert client.embed([]) == []
+
+
+def test_sidecar_batches_concurrent_workers(sidecar):
+    server, backend = sidecar
+    results = {}
+
+    def worker(i):
+        results[i] = SidecarBackend(server.server_address).embed([f"query {i}"], kind="query")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(results) == 8
+    assert len(backend.batches) < 8  # several workers shared a forward pass
+    assert sum(n for _, n in backend.batches) == 8
+
+
+def test_sidecar_falls_back_in_process_when_unreachable(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_backend, "LocalBackend", lambda: FakeBackend(dim=4))
+    client = SidecarBackend(str(tmp_path / "missing.sock"))
+    assert client.embed(["gym"])[0].shape == (4,)
+
+
+def test_sidecar_falls_back_on_a_dropped_reply_and_retries_later(sidecar, monkeypatch):
+    server, _ = sidecar
+    monkeypatch.setattr(embedding_backend, "LocalBackend", lambda: FakeBackend(dim=4))
+    client = SidecarBackend(server.server_address, retry_after=60.0)
+    request = client._request
+
+    def truncated(texts, kind):
+        raise ConnectionError("embedding sidecar closed the connection")
+
+    monkeypatch.setattr(client, "_request", truncated)
+    assert client.embed(["gym"])[0].shape == (4,)
+    monkeypatch.setattr(client, "_request", request)
+    assert client.embed(["gym"])[0].shape == (4,)  # still cooling down
+
+    client._down_until = time.monotonic()
+    assert client.embed(["gym"])[0].shape == (8,)  # sidecar again
+    assert client._down_until is None
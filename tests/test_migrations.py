@@ -0,0 +1,38 @@
+import logging.config
+import pathlib
+from datetime import date
+
+from flask_migrate import upgrade
+
+from app import create_app
+from models import db
+
+MIGRATIONS = str(pathlib.Path(__file__).resolve().parent.parent / "migrations")
+
+
+def test_event_span_backfill_accepts_an_event_ending_before_it_starts(tmp_path, monkeypatch):
+    # alembic.ini's logging config would disable the app's loggers for later tests.
+    monkeypatch.setattr(logging.config, "fileConfig", lambda *a, **kw: None)
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'old.db'}",
+        "TESTING": True,
+        "SECRET_KEY": "test-secret",
+        "SEARCH_INDEX_WORKER": "inline",
+    })
+    with app.app_context():
+        upgrade(directory=MIGRATIONS, revision="d0e1f2a3b4c5")
+        db.session.execute(db.text(
+            "INSERT INTO users (id, username, password_hash) VALUES (1, 'grey', 'x')"
+        ))
+        db.session.execute(db.text(
+            "INSERT INTO events (id, user_id, name, start_time, end_time) VALUES "
+            "(1, 1, 'Typo', '2026-06-12 09:00:00.000000', '2026-06-10 10:00:00.000000')"
+        ))
+        db.session.commit()
+
+        upgrade(directory=MIGRATIONS)
+
+        span = db.session.execute(
+            db.text("SELECT first_day, last_day FROM event_span WHERE id = 1")
+        ).one()
+        assert tuple(span) == (date(2026, 6, 10).toordinal(), date(2026, 6, 12).toordinal())
@@ -0,0 +1,54 @@
+import numpy as np
+
+import embedding_backend
+import search_index
+from embedding_backend import FakeBackend
+from query_cache import QueryEmbeddingCache
+
+
+class _CountingBackend(FakeBackend):
+    def __init__(self):
+        super().__init__(dim=8)
+        self.calls = 0
+
+    def embed(self, texts, kind="passage"):
+        self.calls += 1
+        return super().embed(texts, kind)
+
+
+def test_memory_tier_normalizes_and_evicts():
+    cache = QueryEmbeddingCache(capacity=2)
+    cache.put("m", "Dinner  with Mom", np.ones(3, dtype=np.float32))
+    assert cache.get("m", "dinner with mom") is not None
+    assert cache.get("other-model", "dinner with mom") is None
+
+    cache.put("m", "gym", np.zeros(3, dtype=np.float32))
+    cache.put("m", "walk", np.zeros(3, dtype=np.float32))
+    assert cache.get("m", "dinner with mom") is None  # least recently used went first
+    assert cache.stats["memory_hits"] == 1 and cache.stats["memory_misses"] == 2
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "query_cache.db")
+    QueryEmbeddingCache(path=path).put("m", "gym", np.arange(3, dtype=np.float32))
+
+    fresh = QueryEmbeddingCache(path=path)  # new process: empty LRU, same file
+    assert fresh.get("m", "GYM").tolist() == [0.0, 1.0, 2.0]
+    assert fresh.stats["disk_hits"] == 1
+    fresh.get("m", "gym")
+    assert fresh.stats["memory_hits"] == 1  # promoted into the LRU
+
+
+def test_repeat_queries_skip_the_model(app, monkeypatch):
+    backend = _CountingBackend()
+    monkeypatch.setattr(embedding_backend, "_backend", backend)
+    monkeypatch.setattr(search_index, "_query_caches", {})
+
+    first = search_index.embed_query("coffee with Sam")
+    assert np.array_equal(search_index.embed_query("Coffee with Sam "), first)
+    assert backend.calls == 1
+
+    monkeypatch.setattr(search_index, "_query_caches", {})  # simulate a worker restart
+    search_index.embed_query("coffee with sam")
+    assert backend.calls == 1
+    assert search_index.query_cache_stats()["disk_hits"] == 1
@@ -2,7 +2,7 @@ from datetime import date, datetime
 
 import pytest
 
-from query_router import route_query
+from query_router import VocabularyMatcher, route_query
 
 TODAY = date(2026, 6, 23)  # a Tuesday
 
@@ -209,6 +209,15 @@ def test_where_requires_cue():
     assert r.residual_q == "lunch"
 
 
+@pytest.mark.parametrize("q", ["@ the park lunch", "lunch @ park", "lunch, @ the park"])
+def test_at_sign_cues_a_place_anywhere(q):
+    # "@" is a token of its own, so it cues a place at the start of the query or
+    # after punctuation too (the old `\b@` pattern needed a word character before it).
+    r = _rw(q)
+    assert r.where == "The park"
+    assert "park" not in r.residual_q and "@" not in r.residual_q
+
+
 def test_bare_place_not_matched_without_cue():
     r = _rw("park bench")  # no at/in cue → "park" stays content
     assert r.where is None
@@ -221,3 +230,57 @@ def test_who_where_and_date_combined():
     assert (r.date_from, r.date_to) == (datetime(2026, 5, 1), datetime(2026, 6, 1))
     assert r.residual_q == "dinner"
     assert r.labels == ["last month", "with: Sarah"]
+
+
+def test_longest_place_wins():
+    r = route_query("coffee at Blue Bottle Cafe", today=TODAY,
+                    places=["Blue Bottle", "Blue Bottle Cafe"])
+    assert r.where == "Blue Bottle Cafe"
+    assert r.residual_q == "coffee"
+
+
+def test_longest_name_wins_and_apostrophes_split_like_word_boundaries():
+    r = _rw("Mom's birthday with Alex")
+    assert r.who == ["Mom"]  # the first run of names, as before
+    r = route_query("lunch with Mary Ann", today=TODAY, people=["Mary", "Mary Ann"])
+    assert r.who == ["Mary Ann"] and r.residual_q == "lunch"
+
+
+def test_prebuilt_matcher_scales_to_thousands_of_names():
+    people = [f"Friend{i}" for i in range(5000)] + ["Mom", "Dad"]
+    matcher = VocabularyMatcher(people, [f"Cafe {i}" for i in range(2000)] + ["The park"])
+    r = route_query("walk in the park with Friend4321 or Dad", today=TODAY, matcher=matcher)
+    assert (r.who, r.who_op, r.where) == (["Friend4321", "Dad"], "or", "The park")
+    assert r.residual_q == "walk"
+
+
+@pytest.mark.parametrize("q", ["dec july to june", "june or april to may", "from work after May"])
+def test_ranges_and_bounds_only_tried_where_they_first_could_start(q):
+    # A range only at the leftmost date expression, an open-ended bound only at
+    # the first before/until/after/since/from; a bare month alone is no date.
+    r = route_query(q, today=TODAY)
+    assert (r.date_from, r.date_to, r.date_label) == (None, None, None)
+
+
+def test_iso_date_is_not_read_as_a_year_after_a_month():
+    # "2024-06-20" is one token, so "june" isn't "June 2024"; the bare month stays text.
+    r = route_query("june 2024-06-20", today=TODAY)
+    assert (r.date_from, r.date_to) == (datetime(2024, 6, 20), datetime(2024, 6, 21))
+    assert r.residual_q == "june"
+
+
+def test_iso_range_reads_as_one_expression():
+    r = route_query("trip 2026-01-05 - 2026-02-02", today=TODAY)
+    assert (r.date_from, r.date_to) == (datetime(2026, 1, 5), datetime(2026, 2, 3))
+    assert r.residual_q == "trip"
+
+
+def test_matcher_memoizes_routed_queries_per_day():
+    matcher = VocabularyMatcher(["Mom"], ["The park"])
+    first = route_query("walk with Mom last week", today=TODAY, matcher=matcher)
+    first.who.append("mutated")  # callers get a copy, never the memo entry
+    again = route_query("walk with Mom last week", today=TODAY, matcher=matcher)
+    assert again.who == ["Mom"] and again.date_label == "last week"
+    later = route_query("walk with Mom last week", today=date(2026, 7, 20), matcher=matcher)
+    assert later.date_from == datetime(2026, 7, 13)
+    assert len(matcher._memo) == 2
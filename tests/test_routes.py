@@ -1,8 +1,10 @@
 import pathlib
+from datetime import date
 from io import BytesIO
 
 from werkzeug.security import generate_password_hash
 
+import day_summary
 from models import Attachment, User, db
 
 
@@ -70,6 +72,75 @@ def test_event_crud(authed_client):
     assert authed_client.get("/events?year=2026&month=5&day=11").get_json()["events"] == []
 
 
+def test_day_view_lists_events_covering_the_day(authed_client):
+    for name, start, end in (
+        ("Trip", "09-05-2026", "12-05-2026"),
+        ("Lunch", "11-05-2026", "11-05-2026"),
+        ("Later", "13-05-2026", "13-05-2026"),
+    ):
+        authed_client.post("/events", json={
+            "name": name, "start_date": start, "start_time": "09:00",
+            "end_date": end, "end_time": "10:00",
+        })
+
+    def names(day):
+        listed = authed_client.get(f"/events?year=2026&month=5&day={day}").get_json()
+        return [e["name"] for e in listed["events"]]
+
+    assert names(9) == ["Trip"]
+    assert names(11) == ["Trip", "Lunch"]
+    assert names(12) == ["Trip"]
+    assert names(13) == ["Later"]
+
+
+def test_calendar_windows_follow_event_spans(authed_client):
+    trip = {"name": "Trip", "start_time": "09:00", "end_time": "10:00"}
+    authed_client.post("/events", json={
+        **trip, "start_date": "29-05-2026", "end_date": "02-06-2026",
+    })
+
+    def days(month):
+        month_data = authed_client.get(f"/get_month?year=2026&month={month}").get_json()
+        return month_data["days_with_events"]
+
+    assert days(5) == [29, 30, 31]
+    assert days(6) == [1, 2]
+    week = authed_client.get("/get_week?year=2026&month=6&day=3").get_json()
+    assert [e["name"] for e in week["events"]] == ["Trip"]
+    year = authed_client.get("/get_year?year=2026").get_json()["months"]
+    assert year[5]["days_with_events"] == [1, 2]
+
+    event_id = authed_client.get("/events?year=2026&month=5&day=31").get_json()["events"][0]["id"]
+    authed_client.put(f"/events/{event_id}", json={
+        **trip, "start_date": "10-06-2026", "end_date": "11-06-2026",
+    })
+    assert days(5) == []
+    assert days(6) == [10, 11]
+
+    authed_client.delete(f"/events/{event_id}")
+    assert days(6) == []
+
+
+def test_event_ending_before_it_starts_still_saves(authed_client):
+    # The routes never required end >= start; the span index must not either.
+    times = {"name": "Typo", "start_time": "09:00", "end_time": "10:00"}
+    resp = authed_client.post("/events", json={
+        **times, "start_date": "12-06-2026", "end_date": "10-06-2026",
+    })
+    assert resp.status_code == 200
+    event_id = db.session.execute(db.text("SELECT id FROM events")).scalar_one()
+    resp = authed_client.put(f"/events/{event_id}", json={
+        **times, "start_date": "20-06-2026", "end_date": "15-06-2026",
+    })
+    assert resp.status_code == 200
+
+    span = db.session.execute(db.text(
+        "SELECT first_day, last_day FROM event_span WHERE id = :id"), {"id": event_id}
+    ).one()
+    assert tuple(span) == (date(2026, 6, 15).toordinal(), date(2026, 6, 20).toordinal())
+    assert day_summary.check() == []
+
+
 def test_subevent_crud(authed_client):
     parent = authed_client.post("/events", json={
         "name": "Conference",
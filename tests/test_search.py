@@ -1,11 +1,12 @@
 import hashlib
+import pathlib
 
 import numpy as np
 import pytest
 from werkzeug.security import generate_password_hash
 
 import search_index
-from models import User, db
+from models import Event, User, db
 
 
 @pytest.fixture(autouse=True)
@@ -82,6 +83,19 @@ def test_search_filter_by_date_range(authed_client):
     assert [r["name"] for r in results] == ["Late"]
 
 
+def test_search_filter_by_mood_counts_every_day_of_a_multi_day_entry(authed_client):
+    _make_event(authed_client, "Camping trip", day=9, end_date="12-05-2026")
+    _make_event(authed_client, "Dentist", day=11)
+    _make_event(authed_client, "Brunch", day=14)
+    for day, mood in ((11, "rough"), (14, "great")):
+        authed_client.post(
+            "/mood/update", json={"year": 2026, "month": 5, "day": day, "mood": mood}
+        )
+
+    results = authed_client.get("/search/data?mood=rough").get_json()["results"]
+    assert sorted(r["name"] for r in results) == ["Camping trip", "Dentist"]
+
+
 def test_search_scoped_to_user(authed_client, app):
     _make_event(authed_client, "Secret meeting", notes="confidential")
 
@@ -173,3 +187,517 @@ def test_search_reflects_edits_and_deletes(authed_client):
 
     authed_client.delete(f"/events/{event_id}")
     assert authed_client.get("/search/data?q=retrospective").get_json()["results"] == []
+
+
+def _user_id():
+    return db.session.execute(db.select(User.id).where(User.username == "grey")).scalar_one()
+
+
+def test_dense_matrix_cached_and_patched_on_write(authed_client, app):
+    _make_event(authed_client, "Coffee")
+    uid = _user_id()
+    first = search_index._user_matrix(uid)
+    assert list(first.ids) and search_index._user_matrix(uid) is first  # reused, not rebuilt
+
+    _make_event(authed_client, "Dentist", day=12)
+    patched = search_index._user_matrix(uid)
+    assert len(patched.ids) == 2
+    assert patched.generation == search_index._current_generation(uid)
+
+
+def test_dense_matrix_rebuilt_after_other_worker_write(authed_client, app):
+    _make_event(authed_client, "Coffee")
+    uid = _user_id()
+    cached = search_index._user_matrix(uid)
+
+    # Another worker indexed something: its generation bump is all we can see.
+    search_index._bump_generation(uid)
+    db.session.commit()
+    assert search_index._user_matrix(uid) is not cached
+
+
+def test_dense_matrix_cache_is_lru_bounded(authed_client, app, monkeypatch):
+    monkeypatch.setattr(search_index, "MATRIX_CACHE_USERS", 1)
+    search_index.clear_matrix_cache()
+    _make_event(authed_client, "Coffee")
+    db.session.add(User(username="mallory", password_hash=generate_password_hash("pw")))
+    db.session.commit()
+
+    search_index._user_matrix(_user_id())
+    other = db.session.execute(db.select(User.id).where(User.username == "mallory")).scalar_one()
+    search_index._user_matrix(other)
+    assert len(search_index._matrix_cache) == 1
+
+
+def test_reindex_streams_in_batches(authed_client, monkeypatch):
+    for day in range(1, 6):
+        _make_event(authed_client, f"Entry {day}", day=day)
+    calls = []
+    embed = search_index.embed_texts
+    monkeypatch.setattr(search_index, "embed_texts", lambda texts: calls.append(len(texts))
+                        or embed(texts))
+    reports = []
+
+    count = search_index.reindex_all(batch_size=2, progress=lambda *a: reports.append(a))
+    assert count == 5
+    assert calls == [2, 2, 1]  # one model call per batch, not per event
+    assert [done for done, _total, _elapsed in reports] == [2, 4, 5]
+    assert authed_client.get("/search/data?q=entry").get_json()["results"]
+
+
+def test_reindex_changed_only_touches_stale_rows(authed_client):
+    from models import Event, EventEmbedding
+
+    _make_event(authed_client, "Coffee")
+    _make_event(authed_client, "Dentist", day=12)
+    _make_event(authed_client, "Gym", day=13)
+    coffee, dentist, gym = Event.query.order_by(Event.id).all()
+    gym_id = gym.id
+
+    # Drift: one edit that bypassed indexing, one lost row, one orphaned row.
+    coffee.notes = "oat flat white"
+    db.session.delete(db.session.get(EventEmbedding, (dentist.id, 0)))
+    db.session.execute(db.text("DELETE FROM events WHERE id = :id"), {"id": gym_id})
+    db.session.commit()
+
+    stats = search_index.reindex_changed()
+    # Dentist's text is unchanged, so its lost row is re-pointed at the stored vector.
+    assert (stats.checked, stats.embedded, stats.reused, stats.removed) == (2, 1, 1, 1)
+    assert db.session.get(EventEmbedding, (gym_id, 0)) is None
+    assert search_index.reindex_changed().embedded == 0  # idempotent
+    hit = authed_client.get("/search/data?q=flat white").get_json()["results"]
+    assert hit[0]["name"] == "Coffee"
+
+
+def test_switching_backend_model_reembeds_everything(authed_client, monkeypatch):
+    import embedding_backend
+    from models import EmbeddingVector
+
+    _make_event(authed_client, "Coffee")
+    _make_event(authed_client, "Gym", day=12)
+    assert search_index.reindex_changed().embedded == 0
+
+    monkeypatch.setattr(embedding_backend, "_backend", embedding_backend.FakeBackend())
+    assert search_index.reindex_changed().embedded == 2
+    models = {row.model for row in EmbeddingVector.query.filter(
+        EmbeddingVector.source_hash.in_(db.select(search_index.EventEmbedding.source_hash))
+    )}
+    assert models == {"fake-sha256"}
+
+
+def test_dense_rank_uses_persisted_ivf_index(authed_client, app, monkeypatch):
+    monkeypatch.setattr(search_index, "ANN_MIN_ROWS", 2)
+    monkeypatch.setattr(search_index, "ANN_NPROBE", 1)
+    _make_event(authed_client, "Coffee")
+    _make_event(authed_client, "Dentist", day=12)
+
+    entry = search_index._user_matrix(_user_id())
+    assert entry.centroids is not None and len(entry.lists) == len(entry.ids)
+    assert search_index._ann_path(_user_id()).exists()
+
+    _make_event(authed_client, "Gym", day=13)  # new row is assigned a cell in place
+    assert len(search_index._user_matrix(_user_id()).lists) == 3
+    results = authed_client.get("/search/data?q=Gym").get_json()["results"]
+    assert results[0]["name"] == "Gym"
+
+
+def test_search_never_trains_centroids(authed_client, app, monkeypatch):
+    import vector_index
+
+    monkeypatch.setattr(search_index, "ANN_MIN_ROWS", 2)
+    monkeypatch.setattr(search_index, "ANN_NPROBE", 1)
+    app.config["SEARCH_INDEX_WORKER"] = "external"
+    _make_event(authed_client, "Coffee")
+    _make_event(authed_client, "Dentist", day=12)
+    search_index.index_events(Event.query.all())  # indexed, but not by the indexer
+    train = vector_index.train_centroids
+    monkeypatch.setattr(vector_index, "train_centroids", lambda *a: pytest.fail("trained"))
+
+    results = authed_client.get("/search/data?q=Dentist").get_json()["results"]
+    assert results[0]["name"] == "Dentist"  # exact search until centroids exist
+    assert search_index._user_matrix(_user_id()).centroids is None
+
+    monkeypatch.setattr(vector_index, "train_centroids", train)
+    assert search_index.refresh_centroids() == 1
+    assert search_index.refresh_centroids() == 0  # not outgrown yet
+    entry = search_index._user_matrix(_user_id())  # picked up without a reload
+    assert entry.centroids is not None and len(entry.lists) == len(entry.ids)
+
+
+def test_pending_entries_match_lexically_until_indexed(authed_client, app):
+    from index_queue import drain_all
+
+    app.config["SEARCH_INDEX_WORKER"] = "external"  # nothing drains on write
+    _make_event(authed_client, "Standup", notes="sprint retrospective")
+    _make_event(authed_client, "Standup", day=12, notes="sprint retrospective")
+
+    assert authed_client.get("/search/status").get_json()["pending"] == 2  # deduped per event
+    assert db.session.query(search_index.EventEmbedding).count() == 0
+    hits = authed_client.get("/search/data?q=retrospectives").get_json()["results"]
+    assert len(hits) == 2
+
+    assert drain_all() == 2
+    assert authed_client.get("/search/status").get_json()["pending"] == 0
+    assert db.session.query(search_index.EventEmbedding).count() == 2
+
+
+def test_outbox_coalesces_repeated_edits(authed_client, app):
+    from models import IndexOutbox
+
+    app.config["SEARCH_INDEX_WORKER"] = "external"
+    _make_event(authed_client, "Standup")
+    event_id = authed_client.get("/events?year=2026&month=5&day=11").get_json()["events"][0]["id"]
+    for notes in ("first", "second", "third"):
+        authed_client.put(f"/events/{event_id}", json={
+            "name": "Standup", "notes": notes,
+            "start_date": "11-05-2026", "start_time": "14:00",
+            "end_date": "11-05-2026", "end_time": "15:00",
+        })
+
+    row = db.session.get(IndexOutbox, event_id)
+    assert db.session.query(IndexOutbox).count() == 1 and row.version == 4
+
+
+def test_only_one_indexer_drains_at_a_time(authed_client, app):
+    import fcntl
+
+    import index_queue
+
+    lock_path = pathlib.Path(db.engine.url.database).parent / "indexer.lock"
+    with open(lock_path, "a") as other_worker:
+        fcntl.flock(other_worker, fcntl.LOCK_EX)  # another process is draining
+        _make_event(authed_client, "Standup")
+        assert index_queue.queue_depth() == 1  # this one skipped its turn
+        fcntl.flock(other_worker, fcntl.LOCK_UN)
+    index_queue.notify()
+    assert index_queue.queue_depth() == 0
+
+
+def test_failing_entry_is_retried_alone_then_parked(authed_client, app, monkeypatch):
+    import index_queue
+    from models import IndexOutbox
+
+    app.config["SEARCH_INDEX_WORKER"] = "external"
+    monkeypatch.setattr(index_queue, "MAX_ATTEMPTS", 2)
+    index_events = search_index.index_events
+
+    def failing(events):
+        if any(event.name == "Broken" for event in events):
+            raise ValueError("cannot embed")
+        index_events(events)
+
+    monkeypatch.setattr(search_index, "index_events", failing)
+    for day, name in ((11, "Standup"), (12, "Broken"), (13, "Lunch")):
+        _make_event(authed_client, name, day=day)
+    broken = Event.query.filter_by(name="Broken").one()
+
+    assert index_queue.drain_all() == 3  # batch fails, then one by one
+    assert db.session.query(search_index.EventEmbedding).count() == 2
+    row = db.session.get(IndexOutbox, broken.id)
+    assert (row.attempts, row.last_error) == (1, "ValueError: cannot embed")
+    status = authed_client.get("/search/status").get_json()
+    assert (status["pending"], status["parked"]) == (1, [])
+
+    assert index_queue.drain_all() == 1
+    status = authed_client.get("/search/status").get_json()
+    assert status["pending"] == 0
+    assert status["parked"] == [
+        {"event_id": broken.id, "attempts": 2, "error": "ValueError: cannot embed"}
+    ]
+    assert index_queue.drain_all() == 0  # parked rows are skipped
+
+    authed_client.put(f"/events/{broken.id}", json={
+        "name": "Fixed", "start_date": "12-05-2026", "start_time": "14:00",
+        "end_date": "12-05-2026", "end_time": "15:00",
+    })
+    assert authed_client.get("/search/status").get_json()["parked"] == []
+    assert index_queue.drain_all() == 1
+    assert db.session.query(IndexOutbox).count() == 0
+
+
+def test_sparse_rank_scopes_user_date_and_depth_in_sql(authed_client, app):
+    from datetime import datetime
+
+    from models import Event
+
+    for day in (5, 12, 19):
+        _make_event(authed_client, "Yoga class", day=day)
+    db.session.add(User(username="mallory", password_hash=generate_password_hash("pw")))
+    db.session.commit()
+    other = app.test_client()
+    other.post("/auth/login", data={"username": "mallory", "password": "pw"})
+    _make_event(other, "Yoga retreat", day=12)
+
+    uid = _user_id()
+    mine = {e.id for e in Event.query.filter_by(user_id=uid)}
+    assert set(search_index._sparse_rank("yoga", uid)) == mine
+    in_range = search_index._sparse_rank(
+        "yoga", uid, date_from=datetime(2026, 5, 10), date_to=datetime(2026, 5, 13))
+    assert [db.session.get(Event, eid).start_time.day for eid in in_range] == [12]
+    assert len(search_index._sparse_rank("yoga", uid, depth=2)) == 2
+
+
+def test_fts_day_follows_date_only_edits(authed_client):
+    _make_event(authed_client, "Yoga class", day=5)
+    event_id = authed_client.get("/events?year=2026&month=5&day=5").get_json()["events"][0]["id"]
+    authed_client.put(f"/events/{event_id}", json={
+        "name": "Yoga class",
+        "start_date": "25-05-2026", "start_time": "14:00",
+        "end_date": "25-05-2026", "end_time": "15:00",
+    })
+
+    hits = authed_client.get("/search/data?q=yoga&from=2026-05-20&to=2026-05-31").get_json()
+    assert [r["id"] for r in hits["results"]] == [event_id]
+
+
+def test_search_hydrates_only_the_returned_events(authed_client):
+    from models import Event
+
+    for day in range(1, 11):
+        _make_event(authed_client, "Yoga class", day=day)
+    uid = _user_id()
+    db.session.expunge_all()
+
+    rows = search_index._candidate_events(
+        uid, date_from=None, date_to=None, mood=None, who=None, who_op="and", where=None)
+    assert len(rows) == 10 and not any(isinstance(o, Event) for o in db.session)
+
+    for q in ("", "yoga"):
+        db.session.expunge_all()
+        results = search_index.search(uid, q, limit=3)
+        assert len(results) == 3
+        assert sum(isinstance(o, Event) for o in db.session) == 3
+    assert [e.start_time.day for e, _ in search_index.search(uid, limit=3)] == [10, 9, 8]
+
+
+def test_compact_encoding_reads_mixed_rows_and_converts(authed_client, monkeypatch):
+    from models import EmbeddingVector
+
+    _make_event(authed_client, "Coffee")  # stored as float32
+    monkeypatch.setattr(search_index, "EMBED_ENCODING", "int8")
+    monkeypatch.setattr(search_index, "EMBED_RESCORE", 5)
+    _make_event(authed_client, "Dentist", day=12)  # stored as int8 + exact copy
+    search_index.clear_matrix_cache()
+
+    entry = search_index._user_matrix(_user_id())
+    assert entry.matrix.dtype == np.int8 and len(entry.scales) == 2
+    for q in ("Coffee", "Dentist"):
+        assert authed_client.get(f"/search/data?q={q}").get_json()["results"][0]["name"] == q
+
+    assert search_index.convert_embeddings() == 1
+    assert {r.encoding for r in EmbeddingVector.query} == {"int8"}
+    assert all(r.exact is not None for r in EmbeddingVector.query)
+    assert search_index.convert_embeddings() == 0  # idempotent
+
+
+def test_rescore_restores_exact_scores(authed_client, monkeypatch):
+    monkeypatch.setattr(search_index, "EMBED_ENCODING", "int8")
+    monkeypatch.setattr(search_index, "EMBED_RESCORE", 10)
+    monkeypatch.setattr(search_index, "DENSE_MIN_SCORE", -1.0)
+    _make_event(authed_client, "Coffee")
+    _make_event(authed_client, "Dentist", day=12)
+    uid = _user_id()
+    entry = search_index._user_matrix(uid)
+    query = search_index.embed_query("Coffee")
+    scores = search_index.vector_codec.score(entry.matrix, entry.scales, query)
+    event_ids, scores = search_index._max_per_event(entry.ids, scores)
+    search_index._rescore(event_ids, scores, query)
+    exact = np.stack(search_index.embed_texts(["Coffee", "Dentist"])) @ query
+    assert np.allclose(scores, exact, atol=1e-6)
+
+
+def test_dense_matrix_is_shared_vector_file(authed_client, app):
+    from models import Event
+
+    _make_event(authed_client, "Coffee")
+    _make_event(authed_client, "Dentist", day=12)
+    uid = _user_id()
+    entry = search_index._user_matrix(uid)
+    assert isinstance(entry.matrix, np.memmap) and entry.segment is not None
+
+    # Another worker starts cold: it maps the same file instead of reading SQLite.
+    search_index.clear_matrix_cache()
+    assert search_index._user_matrix(uid).segment == entry.segment
+
+    coffee = Event.query.filter_by(name="Coffee").one()
+    authed_client.put(f"/events/{coffee.id}", json={
+        "name": "Coffee", "notes": "oat flat white",
+        "start_date": "11-05-2026", "start_time": "14:00",
+        "end_date": "11-05-2026", "end_time": "15:00",
+    })
+    patched = search_index._user_matrix(uid)
+    assert sorted(patched.ids) == [-1, coffee.id, coffee.id + 1]  # old row tombstoned
+    assert authed_client.get("/search/data?q=flat white").get_json()["results"]
+
+    assert search_index.compact_vector_stores(min_dead_ratio=0.3) == (1, 1)
+    search_index.clear_matrix_cache()
+    assert sorted(search_index._user_matrix(uid).ids) == [coffee.id, coffee.id + 1]
+    hits = authed_client.get("/search/data?q=Dentist").get_json()["results"]
+    assert hits[0]["name"] == "Dentist"
+
+
+def test_subevent_edits_reembed_only_their_chunk(authed_client, monkeypatch):
+    from models import Event, EventEmbedding
+
+    _make_event(authed_client, "Lisbon trip", notes="long weekend")
+    trip = Event.query.one()
+    for name, minute in (("Pasteis de nata", "10"), ("Tram 28 ride", "30")):
+        authed_client.post(f"/events/{trip.id}/subevents", json={
+            "name": name, "start_date": "11-05-2026", "start_time": f"14:{minute}",
+            "end_date": "11-05-2026", "end_time": f"14:{minute}",
+        })
+    assert EventEmbedding.query.filter_by(event_id=trip.id).count() == 3
+
+    embedded = []
+    embed = search_index.embed_texts
+    monkeypatch.setattr(search_index, "embed_texts",
+                        lambda texts: embedded.extend(texts) or embed(texts))
+    tram = next(sub for sub in trip.subevents if sub.name.startswith("Tram"))
+    authed_client.put(f"/events/subevents/{tram.id}", json={
+        "name": "Tram 28 ride", "notes": "to the castle",
+        "start_date": "11-05-2026", "start_time": "14:30",
+        "end_date": "11-05-2026", "end_time": "14:30",
+    })
+    assert embedded == ["Tram 28 ride to the castle"]
+
+    # Max-sim: a query matching one subevent surfaces the whole trip.
+    entry = search_index._user_matrix(_user_id())
+    assert list(entry.ids).count(trip.id) == 3
+    hits = authed_client.get("/search/data?q=Pasteis de nata").get_json()["results"]
+    assert hits[0]["name"] == "Lisbon trip"
+
+    authed_client.delete(f"/events/subevents/{tram.id}")
+    assert EventEmbedding.query.filter_by(event_id=trip.id).count() == 2
+    assert embedded == ["Tram 28 ride to the castle"]  # deletion embeds nothing
+
+
+def test_identical_texts_share_one_vector(authed_client, monkeypatch):
+    from models import EmbeddingVector, Event
+
+    embedded = []
+    embed = search_index.embed_texts
+    monkeypatch.setattr(search_index, "embed_texts",
+                        lambda texts: embedded.extend(texts) or embed(texts))
+    for day in (1, 2, 3):
+        _make_event(authed_client, "Gym", day=day)
+    _make_event(authed_client, "Dinner with Mom", day=4)
+    assert embedded == ["Gym", "Dinner with Mom"]  # recurring entry embedded once
+    assert search_index.dedup_stats() == {"chunks": 4, "vectors": 2, "dedup_ratio": 0.5}
+
+    embedded.clear()
+    search_index.reindex_all(batch_size=2)
+    assert embedded == ["Gym", "Dinner with Mom"]  # also across reindex batches
+    hits = authed_client.get("/search/data?q=Gym").get_json()["results"]
+    assert len(hits) == 3
+
+    # A vector is dropped only once nothing points at it.
+    gyms = Event.query.filter_by(name="Gym").all()
+    for gym in gyms[:2]:
+        authed_client.delete(f"/events/{gym.id}")
+    assert db.session.get(EmbeddingVector, search_index._source_hash("Gym")) is not None
+    authed_client.delete(f"/events/{gyms[2].id}")
+    assert db.session.get(EmbeddingVector, search_index._source_hash("Gym")) is None
+    assert search_index.dedup_stats()["vectors"] == 1
+
+
+def test_reused_vector_survives_a_concurrent_prune(authed_client, monkeypatch):
+    from models import EmbeddingVector
+
+    _make_event(authed_client, "Gym", day=1)
+    digest = search_index._source_hash("Gym")
+    vector_of = search_index._vector_of
+
+    def pruned_after_read(stored):
+        # Another worker drops the vector between this one's lookup and its write.
+        db.session.execute(
+            db.text("DELETE FROM embedding_vector WHERE source_hash = :d"), {"d": digest}
+        )
+        return vector_of(stored)
+
+    monkeypatch.setattr(search_index, "_vector_of", pruned_after_read)
+    _make_event(authed_client, "Gym", day=2)
+    db.session.expire_all()
+    assert db.session.get(EmbeddingVector, digest) is not None
+    monkeypatch.setattr(search_index, "_vector_of", vector_of)
+    assert len(authed_client.get("/search/data?q=Gym").get_json()["results"]) == 2
+
+
+def test_search_reports_stage_timings(authed_client):
+    _make_event(authed_client, "Coffee with Sam")
+    _make_event(authed_client, "Gym", day=12)
+
+    resp = authed_client.get("/search/data?q=coffee")
+    stages = [m.split(";")[0] for m in resp.headers["Server-Timing"].split(", ")]
+    assert stages[:2] == ["vocab", "route"]
+    assert {"candidates", "embed", "dense", "sparse", "serialize", "total"} <= set(stages)
+    assert "debug" not in resp.get_json()
+
+    debug = authed_client.get("/search/data?q=coffee&debug=1").get_json()["debug"]
+    assert debug["counts"]["candidates"] == 2
+    assert debug["counts"]["sparse_hits"] == 1
+    assert debug["timings_ms"]["total"] >= debug["timings_ms"]["dense"]
+
+    timings = authed_client.get("/search/status").get_json()["timings"]
+    assert timings["sparse"]["count"] >= 2 and "p95" in timings["total"]
+
+
+def test_keyword_leg_runs_beside_the_dense_leg(authed_client, monkeypatch):
+    import threading
+
+    _make_event(authed_client, "Coffee with Sam", where="Blue Bottle")
+    _make_event(authed_client, "Dinner with Mom", day=12)
+
+    threads = []
+    sparse_rank = search_index._sparse_rank
+    monkeypatch.setattr(search_index, "_sparse_rank", lambda *a, **kw: threads.append(
+        threading.current_thread().name) or sparse_rank(*a, **kw))
+
+    def names(q):
+        return [r["name"] for r in authed_client.get(f"/search/data?q={q}").get_json()["results"]]
+
+    parallel = names("coffee"), names("mom")
+    assert all(name.startswith("search-leg") for name in threads)
+    monkeypatch.setattr(search_index, "SEARCH_PARALLEL", False)
+    assert (names("coffee"), names("mom")) == parallel == (["Coffee with Sam"], ["Dinner with Mom"])
+    assert threads[-1] == threading.current_thread().name
+
+
+def test_where_filter_matches_substrings_typos_and_subevent_places(authed_client):
+    _make_event(authed_client, "Walk", where="Riverside Park")
+    _make_event(authed_client, "Lunch", day=12, where="Blue Bottle")
+    _make_event(authed_client, "Trip", day=13)
+    trip = Event.query.filter_by(name="Trip").one()
+    authed_client.post(f"/events/{trip.id}/subevents", json={
+        "name": "Picnic",
+        "start_date": "13-05-2026", "start_time": "14:00",
+        "end_date": "13-05-2026", "end_time": "14:30",
+        "where": "Hyde Park",
+    })
+
+    def names(where):
+        res = authed_client.get(f"/search/data?where={where}").get_json()["results"]
+        return sorted(r["name"] for r in res)
+
+    assert names("park") == ["Trip", "Walk"]  # a subevent's place counts for its entry
+    assert names("BOTTLE") == ["Lunch"]
+    assert names("Blue Botle") == ["Lunch"]  # no substring hit: nearest by trigrams
+    assert names("Bl") == ["Lunch"]  # shorter than a trigram: scanned
+    assert names("museum") == []
+
+
+def test_where_filter_reads_queued_entries_live(authed_client, app):
+    _make_event(authed_client, "Walk", where="Riverside Park")
+    app.config["SEARCH_INDEX_WORKER"] = "external"  # edits below stay queued
+    walk = Event.query.filter_by(name="Walk").one()
+    authed_client.put(f"/events/{walk.id}", json={
+        "name": "Walk", "where": "Home",
+        "start_date": "11-05-2026", "start_time": "14:00",
+        "end_date": "11-05-2026", "end_time": "15:00",
+    })
+    _make_event(authed_client, "Gym", day=12, where="City Gym")
+
+    assert authed_client.get("/search/data?where=park").get_json()["results"] == []
+    assert [r["name"] for r in authed_client.get("/search/data?where=home").get_json()["results"]] \
+        == ["Walk"]
+    assert [r["name"] for r in authed_client.get("/search/data?where=gym").get_json()["results"]] \
+        == ["Gym"]
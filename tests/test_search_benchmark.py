@@ -0,0 +1,21 @@
+import json
+
+from benchmarks import search_benchmark
+
+
+def test_benchmark_reports_build_latency_and_recall(tmp_path):
+    out = tmp_path / "run.json"
+    search_benchmark.main([
+        "--events", "300", "--users", "2", "--rounds", "1", "-k", "5",
+        "--ann-min-rows", "50", "--dir", str(tmp_path / "db"), "--out", str(out),
+    ])
+    report = json.loads(out.read_text())
+
+    assert report["corpus"]["events"] == 300
+    assert report["build"]["chunks"] >= 300 and 0 <= report["build"]["dedup_ratio"] < 1
+    for mode in ("parallel", "serial"):
+        stages = report["latency_ms"][mode]
+        assert {"vocab", "route", "candidates", "dense", "sparse", "total"} <= set(stages)
+        assert stages["total"]["p50"] <= stages["total"]["p99"]
+    assert report["recall"]["queries"] > 0 and 0 <= report["recall"]["mean"] <= 1
+    assert report["memory"]["max_rss_mb"] > 0
@@ -0,0 +1,37 @@
+import time
+
+import search_timing
+from search_timing import SearchTrace, StageStats
+
+
+def test_nested_stages_are_not_double_counted():
+    trace = SearchTrace()
+    with trace.stage("dense"):
+        time.sleep(0.01)
+        with trace.stage("embed"):
+            time.sleep(0.02)
+    assert trace.timings["embed"] >= 20
+    assert 10 <= trace.timings["dense"] < 20  # its own time, without the embed
+    header = trace.server_timing()
+    assert header.startswith("dense;dur=") and ", embed;dur=" in header
+    assert header.rsplit(", ", 1)[1].startswith("total;dur=")
+
+
+def test_stage_stats_percentiles_roll_over_a_window():
+    stats = StageStats(window=10)
+    for ms in range(100):
+        trace = SearchTrace()
+        trace.timings["sparse"] = float(ms)
+        stats.record(trace)
+    sparse = stats.percentiles()["sparse"]
+    assert sparse["count"] == 10  # only the last 10 searches
+    assert sparse["p50"] == 94.5 and sparse["p99"] >= 98
+
+
+def test_record_logs_every_n_searches(monkeypatch, caplog):
+    monkeypatch.setattr(search_timing, "_stats", StageStats())
+    monkeypatch.setattr(search_timing, "TIMING_LOG_EVERY", 2)
+    with caplog.at_level("INFO", logger="search_timing"):
+        for _ in range(3):
+            search_timing.record(SearchTrace())
+    assert len(caplog.records) == 1
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import vector_codec
+
+
+def _corpus(n=2000, dim=384, seed=3):
+    rng = np.random.default_rng(seed)
+    rows = rng.normal(size=(n, dim))
+    rows /= np.linalg.norm(rows, axis=1, keepdims=True)
+    return rows.astype(np.float32)
+
+
+def _recall_at_10(encoding, corpus, queries):
+    compact, scales = vector_codec.encode_matrix(corpus, encoding)
+    hits = 0
+    for query in queries:
+        exact = set(np.argsort(-(corpus @ query))[:10])
+        approx = set(np.argsort(-vector_codec.score(compact, scales, query))[:10])
+        hits += len(exact & approx)
+    return hits / (10 * len(queries))
+
+
+@pytest.mark.parametrize("encoding, floor", [("float16", 0.99), ("int8", 0.95)])
+def test_compact_encodings_keep_recall_at_10(encoding, floor):
+    corpus = _corpus()
+    # Queries near existing rows, so the top 10 is meaningful rather than noise.
+    rng = np.random.default_rng(4)
+    queries = corpus[:40] + 0.5 * rng.normal(size=(40, corpus.shape[1])) / 20
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    assert _recall_at_10(encoding, corpus, queries.astype(np.float32)) >= floor
+
+
+@pytest.mark.parametrize("encoding", vector_codec.ENCODINGS)
+def test_row_roundtrip(encoding):
+    vector = _corpus(1)[0]
+    blob, scale = vector_codec.encode(vector, encoding)
+    assert len(blob) == vector.size * vector_codec.dtype(encoding).itemsize
+    assert np.allclose(vector_codec.decode(blob, encoding, scale), vector, atol=0.01)
+
+
+def test_blockwise_score_matches_dense_product(monkeypatch):
+    monkeypatch.setattr(vector_codec, "_BLOCK_ROWS", 7)
+    corpus = _corpus(50, 16)
+    compact, scales = vector_codec.encode_matrix(corpus, "int8")
+    rows = np.array([3, 9, 40, 41, 49])
+    expected = vector_codec.to_float32(compact, scales)[rows] @ corpus[0]
+    assert np.allclose(vector_codec.score(compact, scales, corpus[0], rows), expected)
@@ -0,0 +1,43 @@
+import numpy as np
+
+import vector_index
+
+
+def _clustered(n_clusters=8, per_cluster=50, dim=16, seed=1):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dim))
+    rows = np.concatenate([c + 0.05 * rng.normal(size=(per_cluster, dim)) for c in centers])
+    rows /= np.linalg.norm(rows, axis=1, keepdims=True)
+    return rows.astype(np.float32)
+
+
+def test_probing_every_cell_is_exact():
+    matrix = _clustered()
+    centroids = vector_index.train_centroids(matrix, 8)
+    cells = vector_index.probe(matrix[0], centroids, nprobe=len(centroids))
+    lists = vector_index.assign(matrix, centroids)
+    assert np.isin(lists, cells).all()
+
+
+def test_single_probe_recalls_nearest_neighbour():
+    matrix = _clustered()
+    centroids = vector_index.train_centroids(matrix, 8)
+    lists = vector_index.assign(matrix, centroids)
+    hits = 0
+    for i in range(0, len(matrix), 10):
+        query = matrix[i]
+        rows = np.flatnonzero(np.isin(lists, vector_index.probe(query, centroids, 1)))
+        exact = np.argsort(-(matrix @ query))[1:6]  # skip the query row itself
+        hits += len(set(exact) & set(rows))
+    assert hits / (5 * len(range(0, len(matrix), 10))) > 0.9
+
+
+def test_centroids_roundtrip_and_reject_other_model(tmp_path):
+    centroids = vector_index.train_centroids(_clustered(), 4)
+    path = tmp_path / "ann" / "user_1.npz"
+    vector_index.save_centroids(path, centroids, trained_rows=400, model="m")
+
+    loaded, trained_rows = vector_index.load_centroids(path, model="m", dim=16)
+    assert np.array_equal(loaded, centroids) and trained_rows == 400
+    assert vector_index.load_centroids(path, model="other", dim=16) is None
+    assert vector_index.load_centroids(tmp_path / "missing.npz", model="m", dim=16) is None
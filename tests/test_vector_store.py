@@ -0,0 +1,77 @@
+import numpy as np
+
+import vector_store
+
+
+def _rows(n, dim=4, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def _store(tmp_path, ids=(1, 2, 3)):
+    store = vector_store.VectorStore(tmp_path / "user_1")
+    store.rebuild(
+        lambda: (np.array(ids, dtype=np.int64), _rows(len(ids)), None),
+        encoding="float32", model="m", generation=1,
+    )
+    return store
+
+
+def test_rebuild_maps_rows_read_only(tmp_path):
+    view = _store(tmp_path).open()
+    assert isinstance(view.matrix, np.memmap) and not view.matrix.flags.writeable
+    assert list(view.ids) == [1, 2, 3] and view.generation == 1
+    assert np.allclose(view.matrix, _rows(3))
+
+
+def test_apply_appends_and_tombstones(tmp_path):
+    store = _store(tmp_path)
+    before = store.open()
+    view = store.apply(
+        2, ids=np.array([2, 4]), matrix=_rows(2, seed=1), scales=None, removals=[3],
+        encoding="float32", model="m",
+    )
+    assert list(view.ids) == [1, -1, -1, 2, 4] and view.dead == 2
+    assert np.allclose(view.matrix[3:], _rows(2, seed=1))
+    assert np.allclose(before.matrix, _rows(3))  # an older mapping is untouched
+
+
+def test_apply_skips_when_not_one_generation_behind(tmp_path):
+    store = _store(tmp_path)
+    kwargs = dict(ids=np.array([4]), matrix=_rows(1), scales=None, removals=[],
+                  encoding="float32", model="m")
+    assert store.apply(3, **kwargs) is None
+    assert store.apply(2, **{**kwargs, "encoding": "int8"}) is None
+    assert store.open().generation == 1
+
+
+def test_rebuild_keeps_a_newer_store(tmp_path):
+    store = _store(tmp_path)
+    calls = []
+    store.rebuild(lambda: calls.append(1), encoding="float32", model="m", generation=1)
+    assert not calls
+
+
+def test_compact_drops_dead_rows(tmp_path):
+    store = _store(tmp_path)
+    old = store.open()
+    store.apply(2, ids=np.array([1]), matrix=_rows(1, seed=2), scales=None, removals=[2],
+                encoding="float32", model="m")
+    assert store.compact() == 2
+    view = store.open()
+    assert list(view.ids) == [3, 1] and view.dead == 0 and view.segment != old.segment
+    assert np.allclose(view.matrix, np.vstack([_rows(3)[2], _rows(1, seed=2)[0]]))
+    assert np.allclose(old.matrix, _rows(3))  # unlinked, but still mapped
+    assert len(list((tmp_path / "user_1").glob(f"{old.segment}.*"))) == 0
+
+
+def test_int8_scales_travel_with_rows(tmp_path):
+    store = vector_store.VectorStore(tmp_path / "user_1")
+    store.rebuild(
+        lambda: (np.array([1], dtype=np.int64), np.ones((1, 4), np.int8),
+                 np.array([0.5], np.float32)),
+        encoding="int8", model="m", generation=1,
+    )
+    view = store.apply(2, ids=np.array([2]), matrix=np.ones((1, 4), np.int8),
+                       scales=np.array([0.25], np.float32), removals=[],
+                       encoding="int8", model="m")
+    assert list(view.scales) == [0.5, 0.25]
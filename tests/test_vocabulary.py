@@ -0,0 +1,103 @@
+import vocabulary
+from models import Event, EventPerson, Person, User, VocabularyTerm, db
+
+
+def _make_event(client, name, day=11, **fields):
+    resp = client.post("/events", json={
+        "name": name,
+        "start_date": f"{day:02d}-05-2026", "start_time": "14:00",
+        "end_date": f"{day:02d}-05-2026", "end_time": "15:00",
+        **fields,
+    })
+    assert resp.status_code == 200
+
+
+def _user_id():
+    return db.session.execute(db.select(User.id).where(User.username == "grey")).scalar_one()
+
+
+def test_vocabulary_tracks_creates_edits_and_deletes(authed_client):
+    _make_event(authed_client, "Lunch", with_who="Mom, Dad", where="Home")
+    _make_event(authed_client, "Coffee", day=12, with_who="Mom", where="Blue Bottle")
+    uid = _user_id()
+    known = vocabulary.for_user(uid)
+    assert known.people == {"Dad": 1, "Mom": 2}
+    assert known.places == {"Blue Bottle": 1, "Home": 1}
+    assert vocabulary.for_user(uid) is known  # cached until the next write
+
+    coffee = Event.query.filter_by(name="Coffee").one()
+    authed_client.put(f"/events/{coffee.id}", json={
+        "name": "Coffee",
+        "start_date": "12-05-2026", "start_time": "14:00",
+        "end_date": "12-05-2026", "end_time": "15:00",
+        "with_who": "Sam", "where": "Blue Bottle",
+    })
+    known = vocabulary.for_user(uid)
+    assert known.people == {"Dad": 1, "Mom": 1, "Sam": 1}
+
+    lunch = Event.query.filter_by(name="Lunch").one()
+    authed_client.delete(f"/events/{lunch.id}")
+    known = vocabulary.for_user(uid)
+    assert known.people == {"Sam": 1} and known.places == {"Blue Bottle": 1}
+    assert [p.name for p in Person.query.filter_by(user_id=uid)] == ["Sam"]  # orphans dropped
+    # Incremental counts and links agree with a rebuild from scratch.
+    stored = _stored(uid)
+    vocabulary.rebuild(uid)
+    assert _stored(uid) == stored
+
+
+def _stored(uid):
+    terms = {(t.kind, t.term, t.uses) for t in VocabularyTerm.query.filter_by(user_id=uid)}
+    links = set(
+        db.session.query(Person.key, EventPerson.event_id)
+        .join(EventPerson, EventPerson.person_id == Person.id)
+        .filter(Person.user_id == uid)
+    )
+    return terms, links
+
+
+def test_vocabulary_cache_follows_other_workers_writes(authed_client):
+    _make_event(authed_client, "Lunch", with_who="Mom")
+    uid = _user_id()
+    cached = vocabulary.for_user(uid)
+
+    # Another worker recorded a change: its generation bump is all we see.
+    db.session.add(VocabularyTerm(user_id=uid, kind="where", term="The park", uses=1))
+    vocabulary._bump_generation(uid)
+    db.session.commit()
+    assert vocabulary.for_user(uid) is not cached
+    assert "The park" in vocabulary.for_user(uid).places
+
+
+def test_search_routes_who_without_scanning_events(authed_client, monkeypatch):
+    _make_event(authed_client, "Coffee", with_who="Mom")
+    _make_event(authed_client, "Coffee", day=12, with_who="Sarah")
+    vocabulary.for_user(_user_id())
+    monkeypatch.setattr(vocabulary, "_scan_people", lambda user_id: 1 / 0)
+    monkeypatch.setattr(vocabulary, "_scan_places", lambda user_id: 1 / 0)
+
+    res = authed_client.get("/search/data?q=coffee with Sarah").get_json()
+    assert [r["with_who"] for r in res["results"]] == ["Sarah"]
+
+
+def test_who_filter_matches_whole_names_including_subevents(authed_client):
+    _make_event(authed_client, "Lunch", with_who="Alice")
+    _make_event(authed_client, "Trip", day=12, with_who="al")
+    trip = Event.query.filter_by(name="Trip").one()
+    authed_client.post(f"/events/{trip.id}/subevents", json={
+        "name": "Museum",
+        "start_date": "12-05-2026", "start_time": "14:00",
+        "end_date": "12-05-2026", "end_time": "14:30",
+        "with_who": "Dad",
+    })
+    uid = _user_id()
+    assert vocabulary.for_user(uid).people == {"Alice": 1, "Dad": 1, "al": 1}
+
+    def names(query):
+        res = authed_client.get(f"/search/data?{query}").get_json()
+        return sorted(r["name"] for r in res["results"])
+
+    assert names("who=Al") == ["Trip"]  # no longer a substring of "Alice"
+    assert names("who=DAD") == ["Trip"]  # named on a subevent, any casing
+    assert names("q=with Alice and Dad") == []
+    assert names("q=with Alice or Dad") == ["Lunch", "Trip"]
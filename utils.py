@@ -2,9 +2,10 @@ import calendar
 from collections import defaultdict
 from datetime import date, datetime, time, timedelta
 
-from sqlalchemy import func
+from sqlalchemy import and_, func
 
-from models import DailyLog, Event
+import day_summary
+from models import DailyLog, Event, db, event_span
 from moods import MOOD_BY_KEY, MOODS
 
 
@@ -44,49 +45,41 @@ def get_month_calendar(year, month):
     }
 
 
-def get_daily_logs(start_date, end_date, user_id: int):
-    daily_info = (
-        DailyLog.query.filter(
-            DailyLog.user_id == user_id,
-            DailyLog.date >= start_date,
-            DailyLog.date < end_date,
-        )
-        .all()
-    )
-    mood_logs = {
-        log.date.day: MOOD_BY_KEY[log.mood_key].color
-        for log in daily_info
-        if log.mood_key
-    }
-    marked_days = [log.date.day for log in daily_info if log.has_marker]
-    return mood_logs, marked_days
-
+def _summarize_days(rows):
+    """Mood colours, days with events and days with a marker, by day of month,
+    from `day_summary` rows."""
+    mood_colors = {row.date.day: MOOD_BY_KEY[row.mood_key].color for row in rows if row.mood_key}
+    days_with_events = [row.date.day for row in rows if row.has_event]
+    days_with_marker = [row.date.day for row in rows if row.has_marker]
+    return mood_colors, days_with_events, days_with_marker
 
-def collect_event_days_in_range(events, start_date, end_date):
-    """Which calendar days (day-of-month) in [start_date, end_date) have any event."""
-    days_with_events = set()
-    for event in events:
-        end_time = event.end_time or event.start_time
-        event_start = max(event.start_time.date(), start_date)
-        event_end = min(end_time.date(), end_date - timedelta(days=1))
 
-        current_date = event_start
-        while current_date <= event_end:
-            days_with_events.add(current_date.day)
-            current_date += timedelta(days=1)
+def events_overlapping(start, end, user_id: int):
+    """Filter for the user's events overlapping [start, end) (dates or datetimes).
 
-    return sorted(days_with_events)
-
-
-def get_month_events(start_date, end_date, user_id: int):
+    The `event_span` R*Tree narrows them to the days of the window, so the cost
+    follows the events in it, not the user's history; the exact comparison on
+    the times is then made only on those rows.
+    """
     # Treat null end_time as a single-day event ending at start_time.
     effective_end = func.coalesce(Event.end_time, Event.start_time)
-    events = Event.query.filter(
-        Event.user_id == user_id,
-        Event.start_time < end_date,
-        effective_end >= start_date,
-    ).all()
-    return collect_event_days_in_range(events, start_date, end_date)
+    # The last day an event can start on and still start before `end`.
+    last_day = end.toordinal()
+    if not isinstance(end, datetime) or end.time() == time.min:
+        last_day -= 1
+    spans = db.select(event_span.c.id).where(
+        event_span.c.user_min == user_id,
+        event_span.c.user_max == user_id,
+        event_span.c.first_day <= last_day,
+        event_span.c.last_day >= start.toordinal(),
+    )
+    return and_(
+        # `+ 0` keeps SQLite off ix_events_user_start: the span ids drive the lookup.
+        Event.user_id + 0 == user_id,
+        Event.id.in_(spans),
+        Event.start_time < end,
+        effective_end >= start,
+    )
 
 
 def get_month_data(year, month, user_id: int | None):
@@ -98,8 +91,9 @@ def get_month_data(year, month, user_id: int | None):
     start_date = datetime(year, month, 1).date()
     end_date = (datetime(year, month + 1, 1) if month < 12 else datetime(year + 1, 1, 1)).date()
 
-    mood_colors, days_with_marker = get_daily_logs(start_date, end_date, user_id)
-    days_with_events = get_month_events(start_date, end_date, user_id)
+    # Read from the per-day summary: one indexed row per day with anything on it.
+    rows = day_summary.for_range(user_id, start_date, end_date)
+    mood_colors, days_with_events, days_with_marker = _summarize_days(rows)
     return calendar_data, mood_colors, days_with_events, days_with_marker
 
 
@@ -133,13 +127,8 @@ def get_week_data(year, month, day, user_id: int | None):
 
     window_start = datetime.combine(week_start, time(0, 0))
     window_end = datetime.combine(week_end, time(0, 0))
-    effective_end = func.coalesce(Event.end_time, Event.start_time)
     events = (
-        Event.query.filter(
-            Event.user_id == user_id,
-            Event.start_time < window_end,
-            effective_end >= window_start,
-        )
+        Event.query.filter(events_overlapping(window_start, window_end, user_id))
         .order_by(Event.start_time)
         .all()
     )
@@ -191,48 +180,20 @@ def get_year_data(year: int, user_id: int | None) -> list[dict]:
             for m in range(1, 13)
         ]
 
-    year_start = date(year, 1, 1)
-    year_end = date(year + 1, 1, 1)
-
-    daily_info = (
-        DailyLog.query.filter(
-            DailyLog.user_id == user_id,
-            DailyLog.date >= year_start,
-            DailyLog.date < year_end,
-        )
-        .all()
-    )
-    mood_by_month: dict[int, dict[int, str]] = defaultdict(dict)
-    markers_by_month: dict[int, list[int]] = defaultdict(list)
-    for log in daily_info:
-        m = log.date.month
-        d = log.date.day
-        if log.mood_key:
-            mood_by_month[m][d] = MOOD_BY_KEY[log.mood_key].color
-        if log.has_marker:
-            markers_by_month[m].append(d)
-
-    effective_end = func.coalesce(Event.end_time, Event.start_time)
-    events = (
-        Event.query.filter(
-            Event.user_id == user_id,
-            Event.start_time < year_end,
-            effective_end >= year_start,
-        )
-        .all()
-    )
+    rows_by_month = defaultdict(list)
+    for row in day_summary.for_range(user_id, date(year, 1, 1), date(year + 1, 1, 1)):
+        rows_by_month[row.date.month].append(row)
 
     months_data = []
     for month in range(1, 13):
-        m_start = date(year, month, 1)
-        m_end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        mood_colors, days_with_events, days_with_marker = _summarize_days(rows_by_month[month])
         months_data.append(
             {
                 "month": month,
                 "calendar_data": get_month_calendar(year, month),
-                "mood_colors": dict(mood_by_month[month]),
-                "days_with_events": collect_event_days_in_range(events, m_start, m_end),
-                "days_with_marker": sorted(markers_by_month[month]),
+                "mood_colors": mood_colors,
+                "days_with_events": days_with_events,
+                "days_with_marker": days_with_marker,
             }
         )
     return months_data
@@ -0,0 +1,71 @@
+"""Compact on-disk / in-memory encodings for unit-length embedding vectors.
+
+  * float32 — raw, 4 bytes/dim (the original format)
+  * float16 — 2 bytes/dim; ample precision for cosine on unit vectors
+  * int8    — 1 byte/dim, symmetric per-vector scale (max |x| → 127)
+
+Each embedding_vector row records its encoding (and int8 scale), so rows in
+different formats stay readable while a conversion is under way. Scoring runs
+directly over the compact matrix in fixed-size blocks, so the float32 working
+copy never exceeds one block no matter how many rows a user has.
+"""
+
+import numpy as np
+
+ENCODINGS = ("float32", "float16", "int8")
+_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+_BLOCK_ROWS = 4096
+
+
+def dtype(encoding):
+    return np.dtype(_DTYPES[encoding])
+
+
+def encode_matrix(matrix, encoding):
+    """float32 (n, dim) → (compact matrix, per-row scales or None)."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if encoding == "float32":
+        return np.ascontiguousarray(matrix), None
+    if encoding == "float16":
+        return matrix.astype(np.float16), None
+    if encoding == "int8":
+        peak = np.abs(matrix).max(axis=1) if len(matrix) else np.empty(0, np.float32)
+        scales = np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+        quantized = np.rint(matrix / scales[:, None]).clip(-127, 127).astype(np.int8)
+        return quantized, scales
+    raise ValueError(f"Unknown embedding encoding: {encoding!r}")
+
+
+def encode(vector, encoding):
+    """One float32 vector → (bytes, scale or None) for an embedding_vector row."""
+    compact, scales = encode_matrix(np.asarray(vector)[None], encoding)
+    return compact[0].tobytes(), (float(scales[0]) if scales is not None else None)
+
+
+def decode(blob, encoding, scale=None):
+    """An embedding_vector row's bytes → float32 vector."""
+    vector = np.frombuffer(blob, dtype=_DTYPES[encoding]).astype(np.float32)
+    return vector * scale if encoding == "int8" else vector
+
+
+def to_float32(matrix, scales=None):
+    matrix = np.asarray(matrix).astype(np.float32)
+    return matrix * scales[:, None] if scales is not None else matrix
+
+
+def score(matrix, scales, query, rows=None):
+    """`matrix[rows] @ query` for any encoding, decoded one block at a time.
+
+    `query` is one vector (dim,) or several as columns (dim, k).
+    """
+    if rows is None:
+        rows = np.arange(len(matrix))
+    if matrix.dtype == np.float32 and not isinstance(matrix, np.memmap):
+        return matrix[rows] @ query
+    out = np.empty((len(rows), *query.shape[1:]), dtype=np.float32)
+    for start in range(0, len(rows), _BLOCK_ROWS):
+        block = rows[start:start + _BLOCK_ROWS]
+        out[start:start + len(block)] = to_float32(
+            matrix[block], scales[block] if scales is not None else None
+        ) @ query
+    return out
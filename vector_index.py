@@ -0,0 +1,88 @@
+"""Inverted-file (IVF) approximate nearest-neighbour index for dense search.
+
+Pure numpy, no extra dependency. Spherical k-means splits a user's unit
+vectors into `n_lists` cells; a query scores the centroids, probes the
+`nprobe` closest cells and ranks only their members exactly. `nprobe` is the
+recall/latency knob: probing every cell is exact brute force.
+
+Only the centroids are persisted (the k-means is the expensive part). Cell
+membership is one matrix product away, so search_index recomputes it when a
+user's vectors are loaded and keeps it current on each indexed write.
+"""
+
+import math
+import os
+
+import numpy as np
+
+_FORMAT = 1
+
+
+def suggested_lists(n_rows):
+    """Cell count for `n_rows` vectors — the usual √n heuristic."""
+    return max(1, int(math.sqrt(n_rows)))
+
+
+def train_centroids(matrix, n_lists, *, iterations=10, sample=20_000, seed=0):
+    """Spherical k-means over (a sample of) L2-normalized rows → (n_lists, dim)."""
+    rng = np.random.default_rng(seed)
+    if len(matrix) > sample:
+        matrix = matrix[rng.choice(len(matrix), sample, replace=False)]
+    n_lists = min(n_lists, len(matrix))
+    centroids = matrix[rng.choice(len(matrix), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        labels = assign(matrix, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, matrix)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        # Empty cells keep their previous centroid rather than collapsing to 0.
+        sums[empty] = centroids[empty]
+        norms[empty] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return np.ascontiguousarray(centroids)
+
+
+def assign(matrix, centroids):
+    """Index of each row's closest centroid (cosine == dot for unit vectors)."""
+    if not len(matrix):
+        return np.empty(0, dtype=np.int32)
+    return np.argmax(matrix @ centroids.T, axis=1).astype(np.int32)
+
+
+def probe(query, centroids, nprobe):
+    """The `nprobe` cells whose centroids are closest to `query`."""
+    scores = centroids @ query
+    if nprobe >= len(scores):
+        return np.arange(len(scores), dtype=np.int32)
+    return np.argpartition(-scores, nprobe - 1)[:nprobe].astype(np.int32)
+
+
+def save_centroids(path, centroids, *, trained_rows, model):
+    """Atomically write centroids (temp file + rename, safe across workers)."""
+    path = os.fspath(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        np.savez(
+            fh,
+            format=np.int64(_FORMAT),
+            centroids=centroids,
+            trained_rows=np.int64(trained_rows),
+            model=np.array(model),
+        )
+    os.replace(tmp, path)
+
+
+def load_centroids(path, *, model, dim):
+    """(centroids, trained_rows) from `path`, or None if absent/incompatible."""
+    try:
+        with np.load(os.fspath(path)) as data:
+            if int(data["format"]) != _FORMAT or str(data["model"]) != model:
+                return None
+            centroids = data["centroids"]
+            if centroids.ndim != 2 or centroids.shape[1] != dim:
+                return None
+            return np.ascontiguousarray(centroids, dtype=np.float32), int(data["trained_rows"])
+    except (OSError, KeyError, ValueError):
+        return None
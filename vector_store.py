@@ -0,0 +1,200 @@
+"""Memory-mapped per-user vector files, shared zero-copy by every worker on a host.
+
+Each user's vectors live in `<instance>/vectors/user_<id>/`:
+
+  meta.json        {"segment", "rows", "dead", "dim", "encoding", "model", "generation"}
+  <segment>.vec    rows × dim matrix in `encoding`'s dtype (vector_codec), append-only
+  <segment>.ids    int64 event id of each row
+  <segment>.scale  float32 per-row scale (int8 only)
+  <segment>.dead   one byte per row, 1 = tombstoned (deleted, or superseded by a
+                   later row for the same event)
+
+Rows are never rewritten in place: an edit appends a row and tombstones the old
+one, so a worker's mapping stays valid while others write. Readers map the
+matrix read-only and the OS page cache holds one copy for all of them; only the
+ids (8 bytes a row) are copied per worker. `compact` rewrites the live rows into
+a fresh segment once tombstones pile up; the old files are unlinked, which
+leaves any worker still mapping them unaffected.
+
+SQLite stays the source of truth. `generation` mirrors search_generation at the
+time of the last write, so a stale or missing store is rebuilt from it.
+Writers serialize on an exclusive flock; readers take a shared one just long
+enough to read meta, ids and tombstones consistently.
+"""
+
+import fcntl
+import json
+import os
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import numpy as np
+
+import vector_codec
+
+
+@dataclass
+class StoreView:
+    segment: str
+    generation: int
+    encoding: str
+    model: str
+    ids: np.ndarray  # int64 per row; tombstoned rows are -1
+    matrix: np.ndarray  # read-only memmap (or empty array)
+    scales: np.ndarray | None
+    dead: int  # tombstoned rows
+
+
+class VectorStore:
+    def __init__(self, directory):
+        self.directory = os.fspath(directory)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def _locked(self, exclusive):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path("lock"), "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _meta(self):
+        try:
+            with open(self._path("meta.json")) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, meta):
+        tmp = self._path(f"meta.json.{os.getpid()}.tmp")
+        with open(tmp, "w") as fh:
+            json.dump(meta, fh)
+        os.replace(tmp, self._path("meta.json"))
+
+    def _view(self, meta):
+        seg, rows, dim = meta["segment"], meta["rows"], meta["dim"]
+        dtype = vector_codec.dtype(meta["encoding"])
+        ids = np.fromfile(self._path(f"{seg}.ids"), dtype=np.int64, count=rows)
+        dead = np.fromfile(self._path(f"{seg}.dead"), dtype=np.uint8, count=rows)
+        ids[dead.astype(bool)] = -1
+        if rows:
+            matrix = np.memmap(self._path(f"{seg}.vec"), dtype=dtype, mode="r", shape=(rows, dim))
+        else:
+            matrix = np.empty((0, dim), dtype=dtype)
+        scales = None
+        if meta["encoding"] == "int8":
+            scales = np.fromfile(self._path(f"{seg}.scale"), dtype=np.float32, count=rows)
+        return StoreView(
+            seg, meta["generation"], meta["encoding"], meta["model"], ids, matrix, scales,
+            meta["dead"],
+        )
+
+    def open(self):
+        """A consistent view of the store, or None if it doesn't exist yet."""
+        with self._locked(exclusive=False):
+            meta = self._meta()
+            return self._view(meta) if meta is not None else None
+
+    def _write_segment(self, ids, matrix, scales, *, encoding, model, generation):
+        old = self._meta()
+        seg = uuid.uuid4().hex[:12]
+        matrix = np.ascontiguousarray(matrix)
+        matrix.tofile(self._path(f"{seg}.vec"))
+        np.asarray(ids, dtype=np.int64).tofile(self._path(f"{seg}.ids"))
+        np.zeros(len(ids), dtype=np.uint8).tofile(self._path(f"{seg}.dead"))
+        if scales is not None:
+            np.asarray(scales, dtype=np.float32).tofile(self._path(f"{seg}.scale"))
+        self._write_meta({
+            "segment": seg, "rows": len(ids), "dead": 0,
+            "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+            "encoding": encoding, "model": model, "generation": generation,
+        })
+        if old is not None:
+            for ext in ("vec", "ids", "dead", "scale"):
+                try:
+                    os.unlink(self._path(f"{old['segment']}.{ext}"))
+                except FileNotFoundError:
+                    pass
+
+    def rebuild(self, load, *, encoding, model, generation):
+        """Replace the store with `load()` → (ids, matrix, scales) unless a writer
+        already brought it to `generation` (or beyond) in the same format."""
+        with self._locked(exclusive=True):
+            meta = self._meta()
+            if not (meta is not None and meta["generation"] >= generation
+                    and meta["encoding"] == encoding and meta["model"] == model):
+                ids, matrix, scales = load()
+                self._write_segment(
+                    ids, matrix, scales, encoding=encoding, model=model, generation=generation
+                )
+                meta = self._meta()
+            return self._view(meta)
+
+    def apply(self, generation, *, ids, matrix, scales, removals, encoding, model):
+        """Append rows for `ids` and tombstone their previous rows and `removals`.
+
+        Only applied when the store is exactly one generation behind in the same
+        format; otherwise it's left stale for the next reader to rebuild.
+        Returns the new view, or None when not applied.
+        """
+        with self._locked(exclusive=True):
+            meta = self._meta()
+            if (meta is None or meta["generation"] != generation - 1
+                    or meta["encoding"] != encoding or meta["model"] != model):
+                return None
+            seg, rows = meta["segment"], meta["rows"]
+            if len(ids) and meta["dim"] not in (0, matrix.shape[1]):
+                return None
+
+            stored = np.fromfile(self._path(f"{seg}.ids"), dtype=np.int64, count=rows)
+            dead = np.fromfile(self._path(f"{seg}.dead"), dtype=np.uint8, count=rows)
+            changed = np.fromiter([*ids, *removals], dtype=np.int64)
+            superseded = np.flatnonzero(np.isin(stored, changed) & (dead == 0))
+
+            if len(ids):
+                # Appends past `rows` are invisible to readers until meta says so.
+                for ext, data in (
+                    ("vec", np.ascontiguousarray(matrix)),
+                    ("ids", np.asarray(ids, dtype=np.int64)),
+                    ("dead", np.zeros(len(ids), dtype=np.uint8)),
+                    ("scale", scales),
+                ):
+                    if data is None:
+                        continue
+                    with open(self._path(f"{seg}.{ext}"), "r+b") as fh:
+                        fh.truncate(rows * data.itemsize * (data.size // len(ids)))
+                        fh.seek(0, os.SEEK_END)
+                        data.tofile(fh)
+            if len(superseded):
+                marks = np.memmap(self._path(f"{seg}.dead"), dtype=np.uint8, mode="r+")
+                marks[superseded] = 1
+                marks.flush()
+                del marks
+            meta.update(
+                rows=rows + len(ids), dead=meta["dead"] + len(superseded), generation=generation
+            )
+            if len(ids) and not meta["dim"]:
+                meta["dim"] = int(matrix.shape[1])
+            self._write_meta(meta)
+            return self._view(meta)
+
+    def compact(self):
+        """Rewrite only the live rows into a new segment. Returns rows dropped."""
+        with self._locked(exclusive=True):
+            meta = self._meta()
+            if meta is None or not meta["dead"]:
+                return 0
+            view = self._view(meta)
+            live = view.ids >= 0
+            self._write_segment(
+                view.ids[live],
+                np.asarray(view.matrix[live]).reshape(-1, meta["dim"]),
+                view.scales[live] if view.scales is not None else None,
+                encoding=meta["encoding"], model=meta["model"], generation=meta["generation"],
+            )
+            return int((~live).sum())
@@ -0,0 +1,310 @@
+"""Per-user people/places vocabulary for who/where query routing and filtering.
+
+`query_router.route_query` matches a query against the names and places the
+user has logged. Rather than scanning `events` on every keystroke, those live
+in indexed tables kept up to date incrementally by the event write paths
+(`record`) in the same transaction:
+
+  * people — every name in the comma-separated `with_who` of an event or its
+    subevents, parsed into `person` and linked through `event_person`, which
+    who-filters in search join on;
+  * places — `vocabulary_term`, each `where` with the number of events at it.
+
+Each worker caches a user's vocabulary until their `vocabulary_generation`
+moves on, so a search pays one primary-key read.
+"""
+
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+
+from models import (
+    Event,
+    EventPerson,
+    Person,
+    SubEvent,
+    VocabularyGeneration,
+    VocabularyTerm,
+    db,
+)
+from query_router import VocabularyMatcher
+
+CACHE_USERS = 64  # users' vocabularies each worker keeps (LRU beyond that)
+
+
+@dataclass
+class Vocabulary:
+    generation: int
+    people: dict  # name -> events logged with them, alphabetical
+    places: dict  # place -> events logged there, alphabetical
+    # Compiled once per generation, so routing never rebuilds it per query.
+    matcher: VocabularyMatcher = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.matcher = VocabularyMatcher(self.people, self.places)
+
+
+def person_key(name):
+    """What a name is matched on: "Mom", "mom " and "MOM" are one person."""
+    return name.strip().casefold()
+
+
+def names_in(with_who):
+    """The people in a comma-separated `with_who`, a joint "Mom, Dad" naming each."""
+    return [part.strip() for part in (with_who or "").split(",") if part.strip()]
+
+
+def _terms(where):
+    return Counter({("where", where): 1}) if where else Counter()
+
+
+def terms_of(event):
+    """The (kind, term) pairs an event contributes to `vocabulary_term`.
+    Subevents contribute none: routing filters on the entry's own where."""
+    if not isinstance(event, Event):
+        return Counter()
+    return _terms(event.where)
+
+
+def _scan_places(user_id):
+    counts = Counter()
+    for (where,) in db.session.query(Event.where).filter(Event.user_id == user_id):
+        counts.update(_terms(where))
+    return counts
+
+
+def _scan_people(user_id):
+    """{event_id: {key: spelling}} read from the user's events and subevents."""
+    rows = db.session.query(Event.id, Event.with_who).filter(Event.user_id == user_id).union_all(
+        db.session.query(SubEvent.event_id, SubEvent.with_who)
+        .join(Event, Event.id == SubEvent.event_id)
+        .filter(Event.user_id == user_id)
+    )
+    people = {}
+    for event_id, with_who in rows:
+        for name in names_in(with_who):
+            people.setdefault(event_id, {}).setdefault(person_key(name), name)
+    return people
+
+
+def _people_of(event_id):
+    """{key: spelling} for everyone named on one event or its subevents."""
+    rows = db.session.query(Event.with_who).filter(Event.id == event_id).union_all(
+        db.session.query(SubEvent.with_who).filter(SubEvent.event_id == event_id)
+    )
+    people = {}
+    for (with_who,) in rows:
+        for name in names_in(with_who):
+            people.setdefault(person_key(name), name)
+    return people
+
+
+def _stored_generation(user_id):
+    # A fresh SELECT, like search_index._current_generation, so another worker's
+    # write is never hidden behind the identity map.
+    return db.session.execute(
+        db.select(VocabularyGeneration.generation).where(VocabularyGeneration.user_id == user_id)
+    ).scalar()
+
+
+def _bump_generation(user_id):
+    db.session.execute(
+        db.text(
+            "INSERT INTO vocabulary_generation (user_id, generation) VALUES (:uid, 1) "
+            "ON CONFLICT(user_id) DO UPDATE SET generation = generation + 1"
+        ),
+        {"uid": user_id},
+    )
+
+
+def _person_ids(user_id, spellings):
+    """{key: person id} for `spellings` ({key: name}), adding anyone new."""
+    db.session.execute(
+        db.text(
+            "INSERT INTO person (user_id, name, key) VALUES (:uid, :name, :key) "
+            "ON CONFLICT(user_id, key) DO NOTHING"
+        ),
+        [{"uid": user_id, "name": name, "key": key} for key, name in spellings.items()],
+    )
+    return dict(
+        db.session.query(Person.key, Person.id).filter(
+            Person.user_id == user_id, Person.key.in_(list(spellings))
+        )
+    )
+
+
+def _link_people(user_id, event_id):
+    """Link the event to exactly the people its text names. Returns whether any
+    link changed; people left with no events are dropped."""
+    db.session.flush()
+    wanted = _people_of(event_id)
+    linked = dict(
+        db.session.query(Person.key, Person.id)
+        .join(EventPerson, EventPerson.person_id == Person.id)
+        .filter(EventPerson.event_id == event_id)
+    )
+    added = {key: wanted[key] for key in wanted.keys() - linked.keys()}
+    removed = [linked[key] for key in linked.keys() - wanted.keys()]
+    if added:
+        db.session.execute(db.insert(EventPerson), [
+            {"person_id": person_id, "event_id": event_id}
+            for person_id in _person_ids(user_id, added).values()
+        ])
+    if removed:
+        EventPerson.query.filter(
+            EventPerson.event_id == event_id, EventPerson.person_id.in_(removed)
+        ).delete(synchronize_session=False)
+        Person.query.filter(
+            Person.id.in_(removed),
+            ~db.select(EventPerson.event_id).where(EventPerson.person_id == Person.id).exists(),
+        ).delete(synchronize_session=False)
+    return bool(added or removed)
+
+
+def rebuild(user_id):
+    """Recount a user's places and relink their people from `events` (caller commits)."""
+    db.session.flush()
+    VocabularyTerm.query.filter_by(user_id=user_id).delete()
+    user_people = db.select(Person.id).where(Person.user_id == user_id)
+    EventPerson.query.filter(EventPerson.person_id.in_(user_people)).delete(
+        synchronize_session=False
+    )
+    Person.query.filter_by(user_id=user_id).delete()
+
+    counts = _scan_places(user_id)
+    if counts:
+        db.session.execute(db.insert(VocabularyTerm), [
+            {"user_id": user_id, "kind": kind, "term": term, "uses": uses}
+            for (kind, term), uses in counts.items()
+        ])
+    people = _scan_people(user_id)
+    spellings = {}
+    for named in people.values():
+        for key, name in named.items():
+            spellings.setdefault(key, name)
+    if spellings:
+        ids = _person_ids(user_id, spellings)
+        db.session.execute(db.insert(EventPerson), [
+            {"person_id": ids[key], "event_id": event_id}
+            for event_id, named in people.items() for key in named
+        ])
+    _bump_generation(user_id)
+
+
+def rebuild_all():
+    """Rebuild every user's vocabulary (caller commits). Returns the users rebuilt."""
+    user_ids = {
+        uid for (uid,) in db.session.query(Event.user_id).filter(Event.user_id.isnot(None))
+        .distinct()
+    } | {uid for (uid,) in db.session.query(VocabularyGeneration.user_id)}
+    for user_id in sorted(user_ids):
+        rebuild(user_id)
+    return len(user_ids)
+
+
+def _owner(event):
+    """(entry id, user id) of the diary entry an event or subevent belongs to."""
+    if isinstance(event, SubEvent):
+        parent = event.parent_event or db.session.get(Event, event.event_id)
+        return event.event_id, parent.user_id if parent else None
+    return event.id, event.user_id
+
+
+def record(event, before=None, after=None):
+    """Apply one event's or subevent's change (caller commits).
+
+    `before` → `after` are its `terms_of`; omit `after` for a deletion (call it
+    after `db.session.delete`) and `before` for a creation. People are relinked
+    from the entry's stored text either way. A user whose vocabulary was never
+    built gets a full rebuild instead, so the stored tables are always complete.
+    """
+    entry_id, user_id = _owner(event)
+    if user_id is None:
+        return
+    if _stored_generation(user_id) is None:
+        rebuild(user_id)
+        return
+    changed = _link_people(user_id, entry_id)
+    delta = Counter(after or {})
+    delta.subtract(Counter(before or {}))
+    for (kind, term), change in delta.items():
+        if change:
+            changed = True
+            db.session.execute(
+                db.text(
+                    "INSERT INTO vocabulary_term (user_id, kind, term, uses) "
+                    "VALUES (:uid, :kind, :term, :change) "
+                    "ON CONFLICT(user_id, kind, term) DO UPDATE SET uses = uses + :change"
+                ),
+                {"uid": user_id, "kind": kind, "term": term, "change": change},
+            )
+    if not changed:
+        return
+    db.session.execute(
+        db.text("DELETE FROM vocabulary_term WHERE user_id = :uid AND uses <= 0"),
+        {"uid": user_id},
+    )
+    _bump_generation(user_id)
+
+
+def events_with(user_id, names, op="and"):
+    """A subquery of the user's event ids whose people include all (op "and")
+    or any (op "or") of `names`, matched case-insensitively and whole-name."""
+    keys = list({person_key(name) for name in names})
+    query = (
+        db.select(EventPerson.event_id)
+        .join(Person, Person.id == EventPerson.person_id)
+        .where(Person.user_id == user_id, Person.key.in_(keys))
+    )
+    if op != "or":
+        query = query.group_by(EventPerson.event_id).having(db.func.count() == len(keys))
+    return query
+
+
+_cache = OrderedDict()  # (db url, user_id) -> Vocabulary, LRU order
+_cache_lock = threading.Lock()
+
+
+def _vocabulary(generation, people, places):
+    return Vocabulary(generation, dict(sorted(people.items())), dict(sorted(places.items())))
+
+
+def _live(user_id):
+    people, spellings = Counter(), {}
+    for named in _scan_people(user_id).values():
+        for key, name in named.items():
+            people[spellings.setdefault(key, name)] += 1
+    places = {term: uses for (_, term), uses in _scan_places(user_id).items()}
+    return _vocabulary(0, people, places)
+
+
+def for_user(user_id):
+    """The user's people and places with use counts, re-read only when stale."""
+    generation = _stored_generation(user_id)
+    if generation is None:
+        # Never built (no entries written through the app yet): read them live.
+        return _live(user_id)
+    key = (str(db.engine.url), user_id)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached.generation == generation:
+            _cache.move_to_end(key)
+            return cached
+    people = dict(
+        db.session.query(Person.name, db.func.count(EventPerson.event_id))
+        .join(EventPerson, EventPerson.person_id == Person.id)
+        .filter(Person.user_id == user_id)
+        .group_by(Person.id)
+    )
+    places = dict(
+        db.session.query(VocabularyTerm.term, VocabularyTerm.uses).filter(
+            VocabularyTerm.user_id == user_id, VocabularyTerm.kind == "where"
+        )
+    )
+    vocabulary = _vocabulary(generation, people, places)
+    with _cache_lock:
+        _cache[key] = vocabulary
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_USERS:
+            _cache.popitem(last=False)
+    return vocabulary